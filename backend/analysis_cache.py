@@ -0,0 +1,99 @@
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+HASH_BLOCK = 1 << 20
+
+def content_hash(fileobj):
+    """sha256 of a binary file object, read in blocks and rewound afterwards."""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for block in iter(lambda: fileobj.read(HASH_BLOCK), b''):
+        digest.update(block)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+def spool_upload(fileobj, dir=None, suffix='.csv'):
+    """Copy a binary file object to a new temp file, hashing it on the way.
+
+    Returns (path, sha256) so a pool worker can read the upload by path and
+    the cache key costs no second pass. The caller removes the file.
+    """
+    digest = hashlib.sha256()
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=dir)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            fileobj.seek(0)
+            for block in iter(lambda: fileobj.read(HASH_BLOCK), b''):
+                digest.update(block)
+                out.write(block)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, digest.hexdigest()
+
+# Analysis IDs are keyed with a server secret: ANALYSIS_ID_KEY (hex) if set,
+# else a random key per process (the cache they address is per process too).
+ANALYSIS_KEY_ENV = 'ANALYSIS_ID_KEY'
+
+def analysis_secret():
+    if os.environ.get(ANALYSIS_KEY_ENV):
+        return bytes.fromhex(os.environ[ANALYSIS_KEY_ENV])
+    return secrets.token_bytes(32)
+
+def analysis_id(key, tenant, digest):
+    """HMAC of tenant + upload hash: stable for identical re-uploads, but not
+    derivable without ``key``, so knowing a file never reveals its analysis ID."""
+    return hmac.new(key, f"{tenant}:{digest}".encode(), 'sha256').hexdigest()[:32]
+
+class AnalysisCache:
+    """Thread-safe LRU with TTL and an approximate memory budget.
+
+    Entry size defaults to the length of its JSON encoding. ``on_evict(key,
+    value)`` runs for every entry dropped by LRU, TTL or budget pressure.
+    """
+
+    def __init__(self, max_entries=256, ttl=3600, max_bytes=64 * 2**20, on_evict=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self.entries = OrderedDict()  # key -> (value, size, stored_at)
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if self.ttl and time.monotonic() - entry[2] > self.ttl:
+                self._drop(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, size=None):
+        size = len(json.dumps(value, default=str)) if size is None else size
+        with self.lock:
+            if key in self.entries:
+                self.bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size, time.monotonic())
+            self.bytes += size
+            while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+                self._drop(next(iter(self.entries)))
+
+    def _drop(self, key):
+        value, size, _ = self.entries.pop(key)
+        self.bytes -= size
+        if self.on_evict:
+            self.on_evict(key, value)
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,253 @@
+import atexit
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+AUDIT_LOG_PATH = 'docs/audit_log.jsonl'
+GENESIS = '0' * 64
+
+def _line_hash(line):
+    return hashlib.sha256(line.encode('utf-8')).hexdigest()
+
+def _last_line(path, block=1 << 16):
+    """Last line of a file ('' if empty/missing), reading only its tail."""
+    if not os.path.exists(path):
+        return ''
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - block))
+        lines = f.read().rstrip(b'\n').split(b'\n')
+    return lines[-1].decode('utf-8') if lines and lines[-1] else ''
+
+class AuditLog:
+    """Append-only JSON-lines audit trail written by a background thread.
+
+    record() only enqueues, so a request pays for building a dict, not a
+    file open. The writer drains everything queued into one write, so
+    batches grow with load while a lone record is flushed within
+    ``flush_interval``. With ``chain`` each record carries the SHA-256 of
+    the previous line (across rotations), making edits or deletions
+    detectable with verify_chain(). Files rotate to ``path.1`` .. ``path.N``
+    by size and/or age. The queue is bounded: when full, record() blocks
+    rather than dropping audit records. A batch that fails to write is kept
+    and retried every ``retry_interval`` seconds (the chain only advances
+    once it is on disk); if the writer thread dies, record() and flush()
+    raise RuntimeError instead of waiting on it.
+    """
+
+    def __init__(self, path=AUDIT_LOG_PATH, chain=True, max_bytes=10 * 2**20, max_age=None, backups=5,
+                 flush_interval=0.2, max_batch=10_000, queue_size=100_000, fsync=False, retry_interval=1.0):
+        self.path = path
+        self.chain = chain
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.fsync = fsync
+        self.retry_interval = retry_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.thread = None
+        self.lock = threading.Lock()
+        self.file = None
+        self.opened_at = None
+        self.prev_hash = None
+        self.written = 0
+        self.error = None  # exception that stopped the writer thread
+
+    def _check_writer(self):
+        if not self.thread.is_alive():
+            raise RuntimeError(f"Audit writer for {self.path} is not running ({self.error!r})")
+
+    def record(self, actor, action, **details):
+        """Queue one audit record; returns immediately unless the queue is full."""
+        if self.thread is None:
+            self._start()
+        item = {'ts': time.time(), 'actor': actor, 'action': action, **details}
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            while True:  # wait for the writer, but not for a dead one
+                self._check_writer()
+                try:
+                    self.queue.put(item, timeout=self.flush_interval)
+                    return
+                except queue.Full:
+                    pass
+        if self.error is not None:
+            self._check_writer()
+
+    def _start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self.thread.start()
+                atexit.register(self.close)
+
+    def flush(self, timeout=None):
+        """Block until everything recorded so far is written (or ``timeout`` passes)."""
+        if self.thread is None:
+            return
+        self._check_writer()
+        done = threading.Event()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.queue.put(done)
+        while not done.wait(self.flush_interval):
+            self._check_writer()
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+
+    def close(self):
+        if self.thread is None or not self.thread.is_alive():
+            return
+        self.queue.put(None)
+        self.thread.join()
+
+    def _open(self):
+        log_dir = os.path.dirname(self.path)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        if self.chain and self.prev_hash is None:
+            last = _last_line(self.path) or _last_line(f"{self.path}.1")
+            self.prev_hash = _line_hash(last) if last else GENESIS
+        self._reopen()
+
+    def _reopen(self):
+        # Unbuffered: a failed write leaves nothing behind to be flushed later
+        self.file = open(self.path, 'ab', buffering=0)
+        self.opened_at = time.monotonic()
+
+    def _rotate_if_needed(self, incoming):
+        too_big = self.max_bytes and self.file.tell() > 0 and self.file.tell() + incoming > self.max_bytes
+        too_old = self.max_age and time.monotonic() - self.opened_at >= self.max_age and self.file.tell() > 0
+        if not (too_big or too_old):
+            return
+        self.file.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._reopen()
+
+    def _write(self, records):
+        """Append ``records``; on OSError the file, chain and records are left as they were."""
+        lines, prev = [], self.prev_hash
+        for rec in records:
+            # formatted off the request path, into a copy so a failed batch can be retried
+            rec = {**rec, 'ts': datetime.fromtimestamp(rec['ts'], timezone.utc).isoformat()}
+            if self.chain:
+                rec['prev'] = prev
+            line = json.dumps(rec, sort_keys=True, separators=(',', ':'), default=str)
+            if self.chain:
+                prev = _line_hash(line)
+            lines.append(line + '\n')
+        data = memoryview(''.join(lines).encode('utf-8'))
+        if self.file.closed:  # a rotation failed after closing the file
+            self._reopen()
+        self._rotate_if_needed(len(data))
+        start = self.file.tell()
+        try:
+            while data:
+                data = data[self.file.write(data):]
+            if self.fsync:
+                os.fsync(self.file.fileno())
+        except OSError:
+            try:
+                self.file.truncate(start)  # drop a partly written batch
+                self.file.seek(start)
+            except OSError:
+                pass
+            raise
+        self.prev_hash = prev
+        self.written += len(records)
+
+    def _run(self):
+        try:
+            self._open()
+            self._loop()
+        except BaseException as e:
+            self.error = e
+            raise
+        finally:
+            if self.file is not None:
+                self.file.close()
+
+    def _loop(self):
+        pending, waiters, stopping, failing = [], [], False, False
+        while not stopping:
+            items = []
+            if not pending:
+                try:
+                    items.append(self.queue.get(timeout=self.flush_interval))
+                except queue.Empty:
+                    if self.max_age and not self.file.closed:
+                        self._rotate_if_needed(0)
+                    continue
+            while len(pending) + len(items) < self.max_batch:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            pending += [item for item in items if isinstance(item, dict)]
+            waiters += [item for item in items if isinstance(item, threading.Event)]
+            stopping = any(item is None for item in items)
+            if pending:
+                try:
+                    self._write(pending)
+                    pending = []
+                    if failing:
+                        print("Audit writes resumed")
+                        failing = False
+                except OSError as e:
+                    if not failing:
+                        print(f"Audit write failed ({len(pending)} records kept for retry): {e}")
+                        failing = True
+                    if stopping:
+                        print(f"Audit log closed with {len(pending)} unwritten records")
+                    else:
+                        time.sleep(self.retry_interval)
+                        continue
+            for waiter in waiters:
+                waiter.set()
+            waiters = []
+
+def verify_chain(paths):
+    """Check hash links over log files given oldest first.
+
+    Returns (ok, records checked, first bad "path:line" or None).
+    """
+    prev, count = None, 0
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for number, line in enumerate(f, 1):
+                line = line.rstrip('\n')
+                link = json.loads(line).get('prev')
+                if prev is not None and link != prev:
+                    return False, count, f"{path}:{number}"
+                prev = _line_hash(line)
+                count += 1
+    return True, count, None
+
+def rotated_files(path=AUDIT_LOG_PATH):
+    """Existing log files for ``path``, oldest first (for verify_chain)."""
+    backups, i = [], 1
+    while os.path.exists(f"{path}.{i}"):
+        backups.append(f"{path}.{i}")
+        i += 1
+    return backups[::-1] + ([path] if os.path.exists(path) else [])
+
+_logs = {}  # path -> AuditLog
+
+def get_audit_log(path=AUDIT_LOG_PATH):
+    """Process-wide AuditLog for ``path``; its writer starts on the first record."""
+    if path not in _logs:
+        _logs[path] = AuditLog(path)
+    return _logs[path]
@@ -0,0 +1,72 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+import shutil
+
+# On-disk frame layout: one .npy per column plus meta.json (as EventGraph
+# does), so numeric columns can be memory-mapped back without a parser.
+# String/object columns are dictionary-encoded (codes + uniques) like the
+# ingestion store; categoricals keep their categories and order.
+FORMAT_VERSION = 1
+
+def _encode(series):
+    """(kind, {suffix: array}, extra meta) for one column."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return 'category', {
+            'codes': series.cat.codes.to_numpy(),
+            'uniques': np.asarray(series.cat.categories.astype(str), dtype=str),
+        }, {'ordered': bool(series.cat.ordered)}
+    if series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+        codes, uniques = pd.factorize(series)
+        return 'dictionary', {
+            'codes': codes.astype(np.int32),
+            'uniques': np.asarray([str(u) for u in uniques], dtype=str),
+        }, {}
+    values = series.to_numpy()
+    if values.dtype == object:
+        raise TypeError(f"Column {series.name!r} ({series.dtype}) has no columnar encoding")
+    return 'array', {'values': values}, {}
+
+def _decode(kind, arrays, meta, index):
+    if kind == 'category':
+        return pd.Series(pd.Categorical.from_codes(arrays['codes'], categories=arrays['uniques'],
+                                                   ordered=meta['ordered']), index=index)
+    if kind == 'dictionary':
+        uniques = np.append(arrays['uniques'].astype(object), np.nan)
+        return pd.Series(uniques[arrays['codes']], index=index, dtype=object)  # code -1 -> NaN
+    return pd.Series(arrays['values'], index=index)
+
+def save_frame(df, path):
+    """Write ``df`` as a binary columnar checkpoint directory (replacing ``path``)."""
+    tmp = f"{path}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    columns = []
+    default_index = isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1
+    items = list(df.items()) if default_index else [('__index__', df.index.to_series())] + list(df.items())
+    for i, (name, series) in enumerate(items):
+        kind, arrays, extra = _encode(series)
+        for suffix, array in arrays.items():
+            np.save(os.path.join(tmp, f"{i}.{suffix}.npy"), array)
+        columns.append({'name': name, 'kind': kind, 'dtype': str(series.dtype), **extra})
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump({'version': FORMAT_VERSION, 'rows': len(df), 'columns': columns}, f)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+
+def load_frame(path, mmap_mode=None):
+    """Read a save_frame() checkpoint; ``mmap_mode='r'`` maps numeric columns."""
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    index = pd.RangeIndex(meta['rows'])
+    data = {}
+    for i, column in enumerate(meta['columns']):
+        suffixes = ('codes', 'uniques') if column['kind'] != 'array' else ('values',)
+        arrays = {s: np.load(os.path.join(path, f"{i}.{s}.npy"), mmap_mode=mmap_mode) for s in suffixes}
+        series = _decode(column['kind'], arrays, column, index)
+        if column['name'] == '__index__':
+            index = pd.Index(series.to_numpy())
+        else:
+            data[column['name']] = series.set_axis(index)
+    return pd.DataFrame(data, index=index)
@@ -1,23 +1,55 @@
-from fastapi import FastAPI, UploadFile, File, Query, Request, WebSocket
-from fastapi.responses import HTMLResponse, FileResponse, StreamingResponse
+from fastapi import FastAPI, UploadFile, File, Query, Request, Response, WebSocket
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 import pandas as pd
-import io
 import os
 from datetime import datetime, timedelta
-import random
 import json
 from typing import Optional
 import asyncio
-from fastapi import WebSocket  # Must be here
+import functools
+from contextlib import asynccontextmanager
+from fastapi import WebSocket, WebSocketDisconnect  # Must be here
+from backend.live_tail import LiveTail, SQLiteTailSource, FileTailSource
+from backend.upload_analysis import analyze_upload, render_upload_report
+from backend.analysis_cache import AnalysisCache, analysis_id, analysis_secret, content_hash, spool_upload
+from backend.jobs import JobCancelled, JobLimitError, JobManager, checkpoint
+from backend.audit import AUDIT_LOG_PATH, get_audit_log
+from backend.m12_report import FORMATS, render_report as render_incident_report
+from backend.synthetic import COLUMNS as SYNTHETIC_COLUMNS, Reservoir, SyntheticLogs, csv_text
+from backend.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY, MetricsMiddleware, profiler
+import hmac
+import uuid
 
-app = FastAPI(title="AI Log Forensics Pro")
+# CPU-bound /analyze work runs in a warm process pool, never on the event loop;
+# each tenant gets at most JOB_TENANT_LIMIT workers and JOB_TENANT_QUEUE waiting jobs.
+jobs = JobManager(
+    max_workers=int(os.environ.get("JOB_WORKERS", os.cpu_count() or 1)),
+    per_tenant=int(os.environ.get("JOB_TENANT_LIMIT", 2)),
+    max_queued=int(os.environ.get("JOB_TENANT_QUEUE", 16)),
+    warm_modules=["backend.upload_analysis"],
+)
+
+@asynccontextmanager
+async def lifespan(app):
+    await asyncio.to_thread(jobs.warm)
+    yield
+    jobs.shutdown()
+
+app = FastAPI(title="AI Log Forensics Pro", lifespan=lifespan)
 
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
+app.add_middleware(MetricsMiddleware)  # outermost: times every request end to end
+
+# Per-analysis reports live outside every mount: they are served only through
+# /view_report and /download_report, which check the caller's tenant.
+ANALYSIS_REPORT_DIR = os.environ.get("ANALYSIS_REPORT_DIR", "data/analysis_reports")
+ANALYSIS_ID_KEY = analysis_secret()
 
 os.makedirs("reports", exist_ok=True)
+os.makedirs(ANALYSIS_REPORT_DIR, exist_ok=True)
 os.makedirs("datasets", exist_ok=True)
 os.makedirs("backend/templates", exist_ok=True)
 os.makedirs("backend/static", exist_ok=True)
@@ -28,11 +60,53 @@ app.mount("/static", StaticFiles(directory="backend/static"), name="static")
 
 templates = Jinja2Templates(directory="backend/templates")
 
-MITRE_TAGS = ["TA0001", "TA0002", "TA0004", "TA0008", "TA0010", "T1201", "T1059", "T1078"]
-ACTIONS = ["login", "usbinsert", "fileaccess", "privilegeescalation", "dataexfil"]
-USERS = ["user1", "user2", "admin", "guest"]
+SESSION_COOKIE = "forensics_session"
+TENANT_HEADER = "X-Tenant-ID"
+
+def _report_path(analysis_id):
+    return os.path.join(ANALYSIS_REPORT_DIR, f"{analysis_id}.html")
+
+def _drop_report(analysis_id, _):
+    if os.path.exists(_report_path(analysis_id)):
+        os.remove(_report_path(analysis_id))
+
+# Results keyed by analysis ID (keyed hash of tenant + upload content); each session
+# remembers its latest analysis so concurrent analysts never share results.
+analysis_cache = AnalysisCache(
+    max_entries=int(os.environ.get("ANALYSIS_CACHE_ENTRIES", 256)),
+    ttl=int(os.environ.get("ANALYSIS_CACHE_TTL", 3600)),
+    max_bytes=int(os.environ.get("ANALYSIS_CACHE_BYTES", 64 * 2**20)),
+    on_evict=_drop_report,
+)
+session_latest = AnalysisCache(max_entries=10_000, ttl=int(os.environ.get("ANALYSIS_CACHE_TTL", 3600)))
+REGISTRY.gauge("forensics_analysis_cache_entries", "Analyses held in the result cache", fn=lambda: len(analysis_cache.entries))
+REGISTRY.gauge("forensics_analysis_cache_bytes", "Approximate size of the result cache", fn=lambda: analysis_cache.bytes)
+REGISTRY.gauge("forensics_jobs_queued", "Pool jobs waiting for a worker", fn=lambda: jobs.stats()["queued"])
+REGISTRY.gauge("forensics_jobs_running", "Pool jobs running", fn=lambda: jobs.stats()["running"])
+
+def _tenant(request):
+    return request.headers.get(TENANT_HEADER, "default")
+
+def _session(request, response=None):
+    session = request.cookies.get(SESSION_COOKIE)
+    if session is None and response is not None:
+        session = uuid.uuid4().hex
+        response.set_cookie(SESSION_COOKIE, session, httponly=True, samesite="lax")
+    return session
+
+# Investigator actions go to the buffered audit trail (writer starts on first record)
+audit_log = get_audit_log(os.environ.get("AUDIT_LOG_PATH", AUDIT_LOG_PATH))
 
-last_analysis = {}
+def _audit(request, action, **details):
+    audit_log.record(f"{_tenant(request)}/{_session(request) or '-'}", action, **details)
+
+def _lookup(request, analysis_id=None):
+    """Analysis by ID, or the session's latest; only within the caller's tenant."""
+    tenant = _tenant(request)
+    if analysis_id is None:
+        analysis_id = session_latest.get((tenant, _session(request)))
+    result = analysis_cache.get(analysis_id) if analysis_id else None
+    return result if result is not None and result.get("tenant") == tenant else None
 
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
@@ -50,137 +124,236 @@ async def generate_page(request: Request):
 async def results_page(request: Request):
     return templates.TemplateResponse("results_pro.html", {"request": request})
 
+def _cached_analysis(key):
+    cached = analysis_cache.get(key)
+    return {**cached, "cached": True} if cached is not None and os.path.exists(_report_path(key)) else None
+
+def _analysis_finished(upload_path, session, job):
+    """Job callback: publish a finished analysis to the cache and the session, drop the spooled upload."""
+    if os.path.exists(upload_path):
+        os.remove(upload_path)
+    if job.status == "done":
+        analysis_cache.put(job.result["analysis_id"], job.result)
+        session_latest.put((job.tenant, session), job.result["analysis_id"], size=1)
+
 @app.post("/analyze")
-async def analyze(file: UploadFile = File(...)):
-    global last_analysis
-    content = await file.read()
-    df = pd.read_csv(io.StringIO(content.decode('utf-8')))
-    
-    risk_col = next((col for col in ['final_risk_score', 'finalriskscore', 'risk_score', 'riskscore'] if col in df.columns), None)
-    highrisk = len(df[df[risk_col] >= 80]) if risk_col else 0
-    precision = round((highrisk / len(df) * 100), 1) if len(df) > 0 else 0.0
-    
-    mitre_col = next((col for col in ['mitre_tag', 'mitretag'] if col in df.columns), None)
-    mitrecount = df[mitre_col].nunique() if mitre_col else 0
-    
-    top_threats = []
-    heatmap_data = {}
-    timeline_data = []
-    if risk_col:
-        top_df = df.nlargest(20, risk_col)
-        for _, row in top_df.iterrows():
-            threat = {
-                "user": row.get('user', 'N/A'),
-                "action": row.get('action', 'N/A'),
-                "risk": float(row[risk_col]),
-                "mitre": row.get(mitre_col, 'N/A') if mitre_col else 'N/A',
-                "explain": f"{row.get('action', 'N/A')} by {row.get('user', 'N/A')} matches MITRE {row.get(mitre_col, 'N/A')[:6]}"
-            }
-            top_threats.append(threat)
-            timeline_data.append({"time": row.get('timestamp', 'Unknown'), "risk": float(row[risk_col])})
-        
-        # MITRE Heatmap
-        if mitre_col:
-            heatmap = df.groupby([mitre_col, 'action']).size().reset_index(name='count')
-            for _, row in heatmap.iterrows():
-                key = f"{row[mitre_col][:10]}|{row['action']}"
-                heatmap_data[key] = int(row['count'])
-    
-    last_analysis = {
-        "highrisk": highrisk, "precision": precision, "mitrecount": mitrecount,
-        "total": len(df), "threats": top_threats, "heatmap": heatmap_data,
-        "timeline": timeline_data, "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
-    
-    # Generate PDF-style report
-    report_html = generate_report(last_analysis, df)
-    with open("reports/forensic_report.html", "w", encoding="utf-8") as f:  # Add encoding="utf-8"
-        f.write(report_html)
-
-
-    
-    return last_analysis
-
-def generate_report(data, df):
-    html = f"""<!DOCTYPE html>
-<html><head><title>Pro Forensic Report</title>
-<style>body{{font-family:'Segoe UI';margin:40px;background:#0a192f;color:#fff}}
-h1{{color:#64ffda;text-align:center}}table{{width:100%;border-collapse:collapse;border-radius:15px;overflow:hidden}}
-th{{background:#ff4757;padding:15px;color:#fff}}td{{padding:12px;border-bottom:1px solid #1a1a2e}}
-.high{{background:rgba(255,71,87,0.3)}}.stats{{display:grid;grid-template-columns:repeat(4,1fr);gap:20px;margin:30px 0}}</style></head>
-<body><h1>🚨 AI Log Forensics Pro Report</h1>
-<div class="stats">
-<div><h2>{data['highrisk']}</h2><p>HIGH-RISK</p></div>
-<div><h2>{data['mitrecount']}</h2><p>MITRE TECH</p></div>
-<div><h2>{data['precision']}%</h2><p>PRECISION</p></div>
-<div><h2>{data['total']}</h2><p>TOTAL LOGS</p></div>
-</div>
-<table><tr><th>User</th><th>Action</th><th>Risk Score</th><th>MITRE</th></tr>"""
-    for t in data['threats']:
-        cls = 'high' if t['risk'] >= 80 else ''
-        html += f"<tr class='{cls}'><td>{t['user']}</td><td>{t['action']}</td><td><strong>{t['risk']}</strong></td><td>{t['mitre']}</td></tr>"
-    html += "</table></body></html>"
-    return html
+async def analyze(request: Request, response: Response, file: UploadFile = File(...), wait: bool = True):
+    """Analyze an upload in the worker pool. By default waits for the result;
+    ``wait=false`` returns the job at once (poll /jobs/{job_id})."""
+    tenant = _tenant(request)
+    session = _session(request, response)
+    path, digest = await asyncio.to_thread(spool_upload, file.file)
+    key = analysis_id(ANALYSIS_ID_KEY, tenant, digest)
+    cached = _cached_analysis(key)
+    if cached is not None:
+        os.remove(path)
+        session_latest.put((tenant, session), key, size=1)
+        audit_log.record(f"{tenant}/{session}", "analyze", analysis_id=key, filename=file.filename, cached=True)
+        return cached
+    try:
+        job = jobs.submit(tenant, analyze_upload, (path, os.path.abspath(_report_path(key))),
+                          dict(on_chunk=checkpoint, analysis_id=key, tenant=tenant, cached=False),
+                          callback=functools.partial(_analysis_finished, path, session))
+    except JobLimitError as e:
+        os.remove(path)
+        return JSONResponse({"error": str(e)}, status_code=429)
+    audit_log.record(f"{tenant}/{session}", "analyze", analysis_id=key, filename=file.filename, cached=False,
+                     job_id=job.id)
+    if not wait:
+        return JSONResponse(job.info(), status_code=202)
+    return await _job_outcome(job)
+
+async def _job_outcome(job):
+    try:
+        return await asyncio.wrap_future(job.outcome)
+    except JobCancelled:
+        return JSONResponse({"error": "Job cancelled", **job.info()}, status_code=409)
+    except RuntimeError:
+        return JSONResponse({"error": job.error, **job.info()}, status_code=500)
+
+@app.get("/jobs")
+async def list_jobs(request: Request):
+    return {"jobs": [job.info() for job in jobs.list(_tenant(request))], **jobs.stats()}
+
+@app.get("/jobs/{job_id}")
+async def job_status(request: Request, job_id: str):
+    job = jobs.get(job_id, _tenant(request))
+    return job.info() if job else JSONResponse({"error": "Unknown job"}, status_code=404)
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(request: Request, job_id: str, wait: bool = False):
+    job = jobs.get(job_id, _tenant(request))
+    if job is None:
+        return JSONResponse({"error": "Unknown job"}, status_code=404)
+    if job.status in ("queued", "running") and not wait:
+        return JSONResponse(job.info(), status_code=202)
+    return await _job_outcome(job)
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(request: Request, job_id: str):
+    cancelled = jobs.cancel(job_id, _tenant(request))
+    _audit(request, "cancel_job", job_id=job_id, cancelled=cancelled)
+    job = jobs.get(job_id, _tenant(request))
+    if job is None:
+        return JSONResponse({"error": "Unknown job"}, status_code=404)
+    return {**job.info(), "cancelled": cancelled}
+
+def run_analysis(fileobj, tenant="default"):
+    """Analyze an upload in-process, once per tenant and content (identical re-uploads hit the cache)."""
+    key = analysis_id(ANALYSIS_ID_KEY, tenant, content_hash(fileobj))
+    cached = _cached_analysis(key)
+    if cached is not None:
+        return cached
+    result = analyze_upload(fileobj, _report_path(key), analysis_id=key, tenant=tenant, cached=False)
+    analysis_cache.put(key, result)
+    return result
+
+def render_report(data):
+    """Stream the forensic report as rendered chunks (see templates/forensic_report.html)."""
+    return render_upload_report(data)
+
+def generate_report(data):
+    return "".join(render_report(data))
+
+# Synthetic load-test data: generated and encoded chunk by chunk while the
+# response streams; datasets/ keeps a reservoir sample rather than the full file.
+GENERATE_MAX_ROWS = int(os.environ.get("GENERATE_MAX_ROWS", 1_000_000_000))
+DATASET_SAMPLE_ROWS = 5000
+
+def _dataset_stream(generator, sample_path):
+    reservoir = Reservoir(DATASET_SAMPLE_ROWS, generator.seed)
+    yield from generator.csv_chunks(reservoir)
+    with open(sample_path, "w", encoding="utf-8") as f:
+        f.write(",".join(SYNTHETIC_COLUMNS) + "\n" + csv_text(reservoir.sample()))
 
 @app.get("/generate_dataset")
-async def generate_dataset(num_rows: int = Query(100, ge=10, le=5000)):
-    data = {"timestamp": [], "user": [], "action": [], "final_risk_score": [], "mitre_tag": []}
-    start = datetime.now() - timedelta(hours=24)
-    for _ in range(num_rows):
-        ts = start + timedelta(minutes=random.randint(0, 1440))
-        action = random.choice(ACTIONS)
-        base_risk = random.uniform(20, 70)
-        if action in ["usbinsert", "privilegeescalation"]: base_risk += 50
-        data["timestamp"].append(ts.strftime("%Y-%m-%d %H:%M"))
-        data["user"].append(random.choice(USERS))
-        data["action"].append(action)
-        data["final_risk_score"].append(round(base_risk + random.uniform(-10, 20), 1))
-        data["mitre_tag"].append(random.choice(MITRE_TAGS))
-    
-    df = pd.DataFrame(data)
-    df.to_csv(f"datasets/synthetic_{num_rows}.csv", index=False)
-    buf = io.StringIO()
-    df.to_csv(buf, index=False)
-    return StreamingResponse(iter([buf.getvalue().encode()]), media_type="text/csv",
+async def generate_dataset(request: Request, num_rows: int = Query(100, ge=10, le=GENERATE_MAX_ROWS),
+                           seed: Optional[int] = None):
+    generator = SyntheticLogs(num_rows, start=datetime.now() - timedelta(hours=24), seed=seed)
+    _audit(request, "generate_dataset", rows=num_rows, seed=generator.seed)
+    return StreamingResponse(_dataset_stream(generator, f"datasets/synthetic_{num_rows}.csv"), media_type="text/csv",
                            headers={"Content-Disposition": f"attachment; filename=synthetic_{num_rows}.csv"})
 
 @app.get("/download_report")
-async def download_report():
-    path = "reports/forensic_report.html"
-    return FileResponse(path, filename="forensic_report_pro.html") if os.path.exists(path) else {"error": "Analyze first"}
+async def download_report(request: Request, analysis_id: Optional[str] = None):
+    result = _lookup(request, analysis_id)
+    _audit(request, "download_report", analysis_id=result["analysis_id"] if result else analysis_id, found=bool(result))
+    path = _report_path(result["analysis_id"]) if result else None
+    return FileResponse(path, filename="forensic_report_pro.html") if path and os.path.exists(path) else {"error": "Analyze first"}
+
+@app.get("/view_report")
+async def view_report(request: Request, analysis_id: Optional[str] = None):
+    result = _lookup(request, analysis_id)
+    _audit(request, "view_report", analysis_id=result["analysis_id"] if result else analysis_id, found=bool(result))
+    path = _report_path(result["analysis_id"]) if result else None
+    return FileResponse(path, media_type="text/html") if path and os.path.exists(path) else {"error": "Analyze first"}
+
+# Full M12 report over the pipeline's anonymized incidents, streamed in chunks
+INCIDENTS_PATH = os.environ.get("REPORT_INCIDENTS_PATH", "features/m11_anonymized.csv")
+_incident_reports = {}  # path -> ((mtime, size), Report); rebuilt when the file changes
+
+def _incident_report(path=INCIDENTS_PATH):
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _incident_reports.get(path)
+    if cached is None or cached[0] != stamp:
+        cached = _incident_reports[path] = (stamp, render_incident_report(pd.read_csv(path)))
+    return cached[1]
+
+@app.get("/incident_report")
+async def incident_report(request: Request, format: str = "html"):
+    _audit(request, "incident_report", format=format)
+    if format not in FORMATS:
+        return {"error": f"format must be one of {sorted(FORMATS)}"}
+    if not os.path.exists(INCIDENTS_PATH):
+        return {"error": "Run the pipeline first"}
+    report = await asyncio.to_thread(_incident_report)
+    headers = {} if format == "html" else {"Content-Disposition": f"attachment; filename=forensic_report.{format}"}
+    return StreamingResponse(report.chunks(format), media_type=FORMATS[format], headers=headers)
 
 @app.get("/api/results")
-async def api_results():
-    return last_analysis
+async def api_results(request: Request, analysis_id: Optional[str] = None):
+    _audit(request, "view_results", analysis_id=analysis_id)
+    return _lookup(request, analysis_id) or {}
 
 @app.get("/api/heatmap")
-async def api_heatmap():
-    return last_analysis.get("heatmap", {})
+async def api_heatmap(request: Request, analysis_id: Optional[str] = None):
+    return (_lookup(request, analysis_id) or {}).get("heatmap", {})
 
-@app.websocket("/ws/logs")
-async def websocket_logs(websocket: WebSocket):
-    await websocket.accept()
-    for i in range(10):  # Demo logs
-        await websocket.send_text(json.dumps({"log": f"Live log #{i}", "risk": random.randint(20, 120)}))
-        await asyncio.sleep(1)
-    await websocket.close()
+# Operational metrics (Prometheus text) and the runtime-toggled sampling profiler
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+# The profiler routes exist only when PROFILER_TOKEN is set, and need it in
+# the X-Admin-Token header; a run stops after at most PROFILER_MAX_SECONDS.
+PROFILER_TOKEN = os.environ.get("PROFILER_TOKEN")
+PROFILER_MAX_SECONDS = float(os.environ.get("PROFILER_MAX_SECONDS", 300))
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+def _profiler_denied(request):
+    if not PROFILER_TOKEN:
+        return JSONResponse({"error": "Not found"}, status_code=404)
+    if not hmac.compare_digest(request.headers.get(ADMIN_TOKEN_HEADER, ""), PROFILER_TOKEN):
+        return JSONResponse({"error": "Admin token required"}, status_code=403)
+    return None
 
-import asyncio  # Add to imports (line 10)
+@app.post("/debug/profiler/{action}")
+async def profiler_toggle(request: Request, action: str, interval: Optional[float] = Query(None, ge=0.001, le=1),
+                          duration: Optional[float] = Query(None, gt=0, le=PROFILER_MAX_SECONDS)):
+    denied = _profiler_denied(request)
+    if denied is not None:
+        return denied
+    if action not in ("start", "stop"):
+        return {"error": "action must be start or stop"}
+    _audit(request, "profiler", op=action, interval=interval, duration=duration)
+    if action == "start":
+        changed = profiler.start(interval, duration or PROFILER_MAX_SECONDS)
+    else:
+        changed = await asyncio.to_thread(profiler.stop)  # joins the sampler thread
+    return {**profiler.status(), "changed": changed}
+
+@app.get("/debug/profiler")
+async def profiler_results(request: Request, format: str = "top", limit: int = Query(30, ge=1, le=1000)):
+    denied = _profiler_denied(request)
+    if denied is not None:
+        return denied
+    if format == "folded":
+        return PlainTextResponse(profiler.folded())
+    return {**profiler.status(), "top": profiler.top(limit)}
+
+# Live tail: one shared producer follows LOG_TAIL_FILE (a growing CSV) if set,
+# else the ingestion store, and fans scored events out to every client.
+live_tail = LiveTail(FileTailSource(os.environ["LOG_TAIL_FILE"]) if os.environ.get("LOG_TAIL_FILE")
+                     else SQLiteTailSource(os.environ.get("LOG_DB_PATH", "data/raw_logs.sqlite")))
+
+async def _wait_disconnect(websocket):
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
 
-# LIVE LOG TAIL - ADD THIS
 @app.websocket("/ws/logs")
-async def websocket_logs(websocket: WebSocket):
+async def websocket_logs(websocket: WebSocket, policy: str = "drop_oldest", queue: int = 1000, batch: int = 500):
     await websocket.accept()
-    actions = ["login", "usbinsert", "fileaccess", "privilegeescalation", "dataexfil"]
-    users = ["admin", "user1", "guest"]
-    for i in range(15):
-        ip = f"{random.randint(1,255)}.{random.randint(1,255)}.{random.randint(1,255)}.{random.randint(1,255)}"
-        log = f"{random.choice(users)} {random.choice(actions)} [{ip}]"
-        risk = random.randint(20, 120)
-        await websocket.send_text(json.dumps({"log": log, "risk": risk}))
-        await asyncio.sleep(0.8)
-    await websocket.close()
-
+    try:
+        client = live_tail.subscribe(maxsize=max(queue, 1), policy=policy)
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+    # Clients only listen, so a receiver notices a disconnect even while the stream is idle
+    disconnected = asyncio.create_task(_wait_disconnect(websocket))
+    try:
+        while True:
+            frame = asyncio.create_task(client.next_frame(max_events=max(batch, 1)))
+            await asyncio.wait({frame, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected.done():
+                frame.cancel()
+                break
+            await websocket.send_text(json.dumps(frame.result()))
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        disconnected.cancel()
+        live_tail.unsubscribe(client)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,197 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+
+from scipy.sparse import csr_matrix
+
+# Node namespaces and the event columns each edge type links
+NODE_TYPES = ('user', 'action', 'ip')
+EDGE_COLUMNS = ((('user', 'user'), ('action', 'action')), (('action', 'action'), ('ip', 'source_ip')))
+# Label types kept across save/load (labels are stored as text plus a kind
+# code), so an integer user ID 7 and the string '7' stay distinct nodes;
+# other types are saved as their text.
+LABEL_KINDS = (str, int, float, bool)
+_LABEL_PARSERS = (str, int, float, lambda text: text == 'True')
+
+def _label_kind(label):
+    return next((i for i, kind in enumerate(LABEL_KINDS) if type(label) is kind), 0)
+
+def _grow(arr, needed):
+    """Amortized-doubling resize for the append-only arrays."""
+    if needed <= len(arr):
+        return arr
+    grown = np.zeros(max(needed, 2 * len(arr), 16), dtype=arr.dtype)
+    grown[:len(arr)] = arr
+    return grown
+
+class EventGraph:
+    """M6.2: Compact undirected user-action-IP graph.
+
+    Nodes are integer IDs (typed, so a user and an action with the same name
+    stay distinct); edges are parallel ``src``/``dst``/``weight`` arrays with
+    weight = number of events on that edge. Updates cost O(batch): only new
+    nodes/edges are appended and only their endpoints' degrees change.
+    Degree centrality is degree / (n - 1), as in networkx. The first update
+    after load() copies the arrays and rebuilds the lookups, O(graph).
+    """
+
+    def __init__(self):
+        self.n_nodes = 0
+        self.n_edges = 0
+        self.node_type = np.zeros(0, dtype=np.int8)
+        self.degree = np.zeros(0, dtype=np.int64)
+        self.labels = []
+        self.label_kinds = None  # kind code per label while labels are the loaded text array
+        self.src = np.zeros(0, dtype=np.int64)
+        self.dst = np.zeros(0, dtype=np.int64)
+        self.weight = np.zeros(0, dtype=np.int64)
+        self._node_index = {}
+        self._edge_index = {}
+        self._csr = None
+
+    @classmethod
+    def from_timeline(cls, timeline):
+        graph = cls()
+        graph.add_events(timeline)
+        return graph
+
+    def _node_ids(self, kind, values):
+        """Node ID per row (-1 where missing), registering unseen labels."""
+        codes, uniques = pd.factorize(values)
+        type_code = NODE_TYPES.index(kind)
+        ids = np.empty(len(uniques), dtype=np.int64)
+        for i, label in enumerate(uniques.tolist()):
+            node = self._node_index.get((type_code, label))
+            if node is None:
+                node = self.n_nodes
+                self._node_index[(type_code, label)] = node
+                self.labels.append(label)
+                self.n_nodes += 1
+            ids[i] = node
+        self.node_type = _grow(self.node_type, self.n_nodes)
+        self.degree = _grow(self.degree, self.n_nodes)
+        self.node_type[ids] = type_code
+        return np.where(codes >= 0, ids[codes] if len(ids) else -1, -1)
+
+    def add_events(self, timeline):
+        """Fold a batch of events into the graph."""
+        self._ensure_writable()
+        keys = []
+        for (left_kind, left_col), (right_kind, right_col) in EDGE_COLUMNS:
+            left = self._node_ids(left_kind, timeline[left_col])
+            right = self._node_ids(right_kind, timeline[right_col])
+            present = (left >= 0) & (right >= 0)
+            lo = np.minimum(left, right)[present]
+            hi = np.maximum(left, right)[present]
+            keys.append((lo << 32) | hi)
+        keys, counts = np.unique(np.concatenate(keys), return_counts=True)
+
+        positions = np.array([self._edge_index.get(key, -1) for key in keys.tolist()], dtype=np.int64)
+        known = positions >= 0
+        self.weight[positions[known]] += counts[known]
+
+        new_keys = keys[~known]
+        start, stop = self.n_edges, self.n_edges + len(new_keys)
+        for array in ('src', 'dst', 'weight'):
+            setattr(self, array, _grow(getattr(self, array), stop))
+        self.src[start:stop] = new_keys >> 32
+        self.dst[start:stop] = new_keys & 0xFFFFFFFF
+        self.weight[start:stop] = counts[~known]
+        self._edge_index.update(zip(new_keys.tolist(), range(start, stop)))
+        np.add.at(self.degree, self.src[start:stop], 1)
+        np.add.at(self.degree, self.dst[start:stop], 1)
+        self.n_edges = stop
+        self._csr = None
+        return self
+
+    def degree_centrality(self):
+        """Centrality per node ID, from the maintained degrees."""
+        scale = 1.0 / (self.n_nodes - 1) if self.n_nodes > 1 else 1.0
+        return self.degree[:self.n_nodes] * scale
+
+    def _label(self, node):
+        """Label of one node with its original type."""
+        if self.label_kinds is None:
+            return self.labels[node]
+        return _LABEL_PARSERS[self.label_kinds[node]](str(self.labels[node]))
+
+    def _key(self, node):
+        return NODE_TYPES[self.node_type[node]], self._label(node)
+
+    def high_centrality(self, threshold=0.2):
+        """{(node type, label): centrality} for nodes above ``threshold``."""
+        centrality = self.degree_centrality()
+        return {self._key(i): float(centrality[i]) for i in np.flatnonzero(centrality > threshold)}
+
+    def to_csr(self):
+        """Symmetric weighted adjacency (event counts) as a CSR matrix."""
+        if self._csr is None:
+            src, dst, weight = self.src[:self.n_edges], self.dst[:self.n_edges], self.weight[:self.n_edges]
+            self._csr = csr_matrix((np.concatenate([weight, weight]), (np.concatenate([src, dst]), np.concatenate([dst, src]))),
+                                   shape=(self.n_nodes, self.n_nodes))
+        return self._csr
+
+    def neighbors(self, label, kind):
+        """{(node type, label): event count} for one node."""
+        node = self._node_lookup(label, kind)
+        adjacency = self.to_csr()
+        row = slice(adjacency.indptr[node], adjacency.indptr[node + 1])
+        return {self._key(i): int(w) for i, w in zip(adjacency.indices[row], adjacency.data[row])}
+
+    def _node_lookup(self, label, kind):
+        self._decode_labels()
+        if not self._node_index and self.n_nodes:
+            self._rebuild_indexes()
+        return self._node_index[(NODE_TYPES.index(kind), label)]
+
+    def _decode_labels(self):
+        """Turn loaded label text back into a list of typed labels."""
+        if not isinstance(self.labels, list):
+            self.labels = [self._label(i) for i in range(self.n_nodes)]
+            self.label_kinds = None
+
+    def _rebuild_indexes(self):
+        types = self.node_type[:self.n_nodes].tolist()
+        self._node_index = {(t, label): i for i, (t, label) in enumerate(zip(types, self.labels))}
+        keys = (self.src[:self.n_edges] << 32) | self.dst[:self.n_edges]
+        self._edge_index = dict(zip(keys.tolist(), range(self.n_edges)))
+
+    def _ensure_writable(self):
+        """Copy memory-mapped arrays into RAM and rebuild lookups before an update."""
+        if isinstance(self.src, np.memmap) or not self.src.flags.writeable:
+            for array in ('node_type', 'degree', 'src', 'dst', 'weight'):
+                setattr(self, array, np.array(getattr(self, array)))
+        self._decode_labels()
+        if not self._node_index and self.n_nodes:
+            self._rebuild_indexes()
+
+    def save(self, path="models/event_graph"):
+        """One .npy per array, so load() can memory-map them."""
+        os.makedirs(path, exist_ok=True)
+        arrays = {
+            'node_type': self.node_type[:self.n_nodes],
+            'degree': self.degree[:self.n_nodes],
+            'src': self.src[:self.n_edges],
+            'dst': self.dst[:self.n_edges],
+            'weight': self.weight[:self.n_edges],
+            'labels': np.array([str(label) for label in self.labels], dtype=str),
+            'label_kinds': np.array([_label_kind(label) for label in self.labels], dtype=np.int8),
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(path, f"{name}.npy"), array)
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({'n_nodes': self.n_nodes, 'n_edges': self.n_edges, 'node_types': NODE_TYPES}, f)
+
+    @classmethod
+    def load(cls, path="models/event_graph", mmap_mode='r'):
+        graph = cls()
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        for name in ('node_type', 'degree', 'src', 'dst', 'weight', 'labels'):
+            setattr(graph, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode))
+        kinds_path = os.path.join(path, "label_kinds.npy")  # absent in graphs saved before label kinds
+        graph.label_kinds = (np.load(kinds_path, mmap_mode=mmap_mode) if os.path.exists(kinds_path)
+                             else np.zeros(meta['n_nodes'], dtype=np.int8))
+        graph.n_nodes, graph.n_edges = meta['n_nodes'], meta['n_edges']
+        return graph
@@ -0,0 +1,164 @@
+import pandas as pd
+import numpy as np
+
+# Multi-step attack chains, matched in order within a window per user.
+# Step names are compared with case, '_' and spaces ignored.
+KILL_CHAINS = {
+    'escalate_and_exfiltrate': ['login', 'privilege_escalation', 'dataexfil'],
+    'usb_staging': ['login', 'usb_insert', 'file_access'],
+    'escalate_then_usb': ['privilege_escalation', 'usb_insert'],
+}
+
+def _normalize(action):
+    return str(action).lower().replace('_', '').replace(' ', '')
+
+def _seconds(window):
+    return int(pd.Timedelta(window).total_seconds())
+
+def encode_events(timeline):
+    """Events as sorted (user, ts) arrays with actions encoded as small ints.
+
+    Rows without a user or timestamp are dropped; users are ordered by name
+    (as groupby does) and ties keep input order.
+    Returns a dict of arrays plus the user and action vocabularies.
+    """
+    ts = pd.to_datetime(timeline['timestamp'])
+    user_codes, users = pd.factorize(timeline['user'], sort=True)
+    action_codes, actions = pd.factorize(timeline['action'])
+    keep = (user_codes >= 0) & ts.notna().to_numpy()
+    ts = ts.to_numpy()[keep].astype('datetime64[s]').astype(np.int64)
+    user_codes = user_codes[keep]
+    order = np.lexsort((ts, user_codes))
+    dtype = np.int16 if len(actions) < 2**15 else np.int32
+    return {
+        'user': user_codes[order],
+        'ts': ts[order],
+        'action': action_codes[keep][order].astype(dtype),
+        'users': users,
+        'actions': actions,
+    }
+
+def sliding_window_ends(events, window):
+    """Exclusive end index of each event's [ts, ts + window) window within its user.
+
+    One composite sorted key (user, ts) turns the two-pointer scan into a
+    single vectorized searchsorted.
+    """
+    ts, user = events['ts'], events['user']
+    if len(ts) == 0:
+        return np.zeros(0, dtype=np.int64)
+    window_s = _seconds(window)
+    span = int(ts.max() - ts.min()) + window_s + 1
+    key = user.astype(np.int64) * span + (ts - ts.min())
+    return np.searchsorted(key, key + window_s, side='left')
+
+def ngram_counts(events, n=3, window='1h'):
+    """Counts of consecutive n-action sequences per user that fit inside ``window``.
+
+    N-grams are hashed to one int64 (base = vocabulary size) and counted in
+    one sort. Returns a DataFrame ranked by count with distinct-user counts.
+    """
+    user, action = events['user'], events['action'].astype(np.int64)
+    vocab = len(events['actions'])
+    m = len(action) - n + 1
+    if m <= 0 or vocab == 0:
+        return pd.DataFrame(columns=['pattern', 'length', 'count', 'users'])
+    if vocab ** n >= 2**63:
+        raise ValueError(f"{n}-grams over {vocab} actions do not fit a 64-bit hash")
+    # An n-gram fits when its user's sliding window from the first event spans n events
+    valid = (sliding_window_ends(events, window)[:m] >= np.arange(n, m + n)) & (action[:m] >= 0)
+    code = action[:m].copy()
+    for j in range(1, n):
+        valid &= action[j:j + m] >= 0
+        code = code * vocab + action[j:j + m]
+    code, first_user = code[valid], user[:m][valid]
+    order = np.lexsort((first_user, code))
+    code, first_user = code[order], first_user[order]
+    new_pattern = np.r_[True, code[1:] != code[:-1]]
+    new_user = new_pattern | np.r_[True, first_user[1:] != first_user[:-1]]
+    starts = np.flatnonzero(new_pattern)
+    patterns = code[starts]
+    counts = np.diff(np.r_[starts, len(code)])
+    users = np.add.reduceat(new_user.astype(np.int64), starts) if len(starts) else np.zeros(0, dtype=np.int64)
+
+    steps = np.empty((len(patterns), n), dtype=np.int64)
+    rest = patterns.copy()
+    for j in range(n - 1, -1, -1):
+        steps[:, j] = rest % vocab
+        rest //= vocab
+    labels = np.asarray(events['actions'], dtype=object)[steps]
+    result = pd.DataFrame({
+        'pattern': [' → '.join(map(str, row)) for row in labels],
+        'length': n,
+        'count': counts,
+        'users': users,
+    })
+    return result.sort_values(['count', 'users'], ascending=False, kind='stable').reset_index(drop=True)
+
+def top_patterns(timeline, lengths=(2, 3), window='1h', top=20):
+    """M6.1: Most frequent multi-step sequences across all users."""
+    events = encode_events(timeline)
+    ranked = pd.concat([ngram_counts(events, n, window) for n in lengths], ignore_index=True)
+    return ranked.sort_values(['count', 'users'], ascending=False, kind='stable').head(top).reset_index(drop=True)
+
+def find_kill_chains(timeline, chains=KILL_CHAINS, window='24h'):
+    """M6.1: Users completing each chain's steps in order within ``window``.
+
+    For every occurrence of the first step, each later step jumps to its
+    next occurrence via searchsorted on that step's sorted positions, so the
+    earliest completion is found without scanning. Overlapping starts that
+    end on the same event collapse to the tightest match.
+    """
+    events = encode_events(timeline)
+    user, ts, action = events['user'], events['ts'], events['action']
+    normalized = np.array([_normalize(a) for a in events['actions']], dtype=object)
+    window_s = _seconds(window)
+    matches = []
+    for name, steps in chains.items():
+        positions = [np.flatnonzero(np.isin(action, np.flatnonzero(normalized == _normalize(step))))
+                     for step in steps]
+        start = positions[0]
+        current, alive = start, np.ones(len(start), dtype=bool)
+        for candidates in positions[1:]:
+            if len(candidates) == 0:
+                alive[:] = False
+                break
+            idx = np.searchsorted(candidates, current, side='right')
+            alive &= idx < len(candidates)
+            current = candidates[np.minimum(idx, len(candidates) - 1)]
+            alive &= (user[current] == user[start]) & (ts[current] - ts[start] < window_s)
+        if not alive.any():
+            continue
+        found = pd.DataFrame({'start': start[alive], 'end': current[alive]}).drop_duplicates('end', keep='last')
+        matches.append(pd.DataFrame({
+            'chain': name,
+            'user': np.asarray(events['users'], dtype=object)[user[found['start']]],
+            'start': pd.to_datetime(ts[found['start']], unit='s'),
+            'end': pd.to_datetime(ts[found['end']], unit='s'),
+            'steps': len(steps),
+        }))
+    if not matches:
+        return pd.DataFrame(columns=['chain', 'user', 'start', 'end', 'steps'])
+    return pd.concat(matches, ignore_index=True).sort_values('start', kind='stable').reset_index(drop=True)
+
+def tumbling_sequences(timeline, window='1h', min_length=2):
+    """Per-user action sequences in fixed ``window`` buckets (floored epoch time)."""
+    events = encode_events(timeline)
+    user, ts = events['user'], events['ts']
+    window_s = _seconds(window)
+    bucket = ts // window_s
+    starts = np.flatnonzero(np.r_[True, (user[1:] != user[:-1]) | (bucket[1:] != bucket[:-1])]) if len(ts) else np.zeros(0, dtype=np.int64)
+    ends = np.r_[starts[1:], len(ts)]
+    keep = ends - starts >= min_length
+    labels = np.asarray(events['actions'], dtype=object).astype(str)
+    labels = np.append(labels, 'nan')[events['action']]  # code -1 (missing action) -> 'nan'
+    users = np.asarray(events['users'], dtype=object)
+    return [
+        {
+            'user': users[user[s]],
+            'window': pd.Timestamp(int(bucket[s]) * window_s, unit='s'),
+            'sequence': ' → '.join(labels[s:e]),
+            'length': int(e - s),
+        }
+        for s, e in zip(starts[keep], ends[keep])
+    ]
@@ -1,8 +1,5 @@
-import pandas as pd
-import numpy as np
 import sys
 import os
-import networkx as nx
 
 # Add project root to path
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -10,66 +7,58 @@ sys.path.insert(0, project_root)
 
 # Import functions
 from backend.ingestion import get_timeline
-from backend.features import engineer_features
+from backend.detection.event_graph import EventGraph
+from backend.detection.sequence_mining import tumbling_sequences, top_patterns, find_kill_chains
 
-def temporal_patterns(timeline):
+def temporal_patterns(timeline, window='1h', chain_window='24h'):
     """M6.1: Simple temporal analysis."""
-    # Ensure timestamp is datetime
-    timeline = timeline.copy()
-    timeline['timestamp'] = pd.to_datetime(timeline['timestamp'])
-    timeline = timeline.sort_values('timestamp')
-    
-    # Create 1-hour windows
-    timeline['window'] = timeline['timestamp'].dt.floor('1H')
-    
-    sequences = []
-    for (user, window), group in timeline.groupby(['user', 'window']):
-        seq = group['action'].tolist()
-        sequences.append({
-            'user': user,
-            'window': window,
-            'sequence': ' → '.join(seq),
-            'length': len(seq)
-        })
-    
-    # Suspicious sequences
-    suspicious = [s for s in sequences if s['length'] >= 2]
+    # Per-user action sequences in tumbling windows
+    suspicious = tumbling_sequences(timeline, window=window, min_length=2)
     
     print("=== M6.1 TEMPORAL PATTERNS ===")
-    for s in suspicious:
+    for s in suspicious[:20]:
         print(f"{s['user']} {s['window']}: {s['sequence']} (len {s['length']})")
+    if len(suspicious) > 20:
+        print(f"... {len(suspicious) - 20} more windows")
+    
+    print("\nTop sliding-window patterns:")
+    print(top_patterns(timeline, window=window, top=10))
+    
+    chains = find_kill_chains(timeline, window=chain_window)
+    print(f"\nKill chains completed within {chain_window}: {len(chains)}")
+    print(chains.head(10))
     
     return suspicious
 
-def build_event_graph(timeline):
+def build_event_graph(timeline, path="models/event_graph"):
     """M6.2: User-Action-IP graph."""
-    G = nx.Graph()
-    
-    for _, row in timeline.iterrows():
-        G.add_node(row['user'], type='user')
-        G.add_node(row['action'], type='action')
-        G.add_node(row['source_ip'], type='ip')
-        G.add_edge(row['user'], row['action'])
-        G.add_edge(row['action'], row['source_ip'])
+    G = EventGraph.from_timeline(timeline)
     
     print("\n=== M6.2 GRAPH ANALYSIS ===")
-    print(f"Nodes: {G.number_of_nodes()}, Edges: {G.number_of_edges()}")
+    print(f"Nodes: {G.n_nodes}, Edges: {G.n_edges}")
     
     # Suspicious: high degree centrality
-    centrality = nx.degree_centrality(G)
-    suspicious = {n: score for n, score in centrality.items() if score > 0.2}
+    suspicious = G.high_centrality(0.2)
     
     print("High centrality (suspicious):", suspicious)
     
-    # Save graph (fixed)
-    import pickle
-    os.makedirs("models", exist_ok=True)
-    with open("models/event_graph.pkl", "wb") as f:
-        pickle.dump(G, f)
-    print("Graph saved as event_graph.pkl")
+    # Save graph (memory-mappable arrays)
+    G.save(path)
+    print(f"Graph saved to {path}/")
     
     return G
 
+def update_event_graph(new_events, path="models/event_graph"):
+    """M6.2: Fold new events into the saved graph.
+
+    Loading, re-indexing and saving cost O(graph) per call; a long-running
+    consumer should keep the EventGraph and call add_events(), O(batch).
+    """
+    G = EventGraph.load(path) if os.path.exists(os.path.join(path, "meta.json")) else EventGraph()
+    G.add_events(new_events)
+    G.save(path)
+    return G
+
 if __name__ == "__main__":
     print("=== M6 TEMPORAL + GRAPH ===")
     timeline = get_timeline()
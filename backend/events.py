@@ -0,0 +1,74 @@
+import pandas as pd
+import numpy as np
+
+# Compact event frames, shared by every stage from M2 on:
+# - string columns are dictionary-encoded as categoricals (1-4 byte codes
+#   plus one copy of each distinct value), with sorted categories so
+#   factorize(sort=True) and groupby order match plain strings;
+# - timestamps are datetime64[s], i.e. int64 epoch seconds as stored;
+# - feature flags and counts use the smallest integer dtype that fits.
+# Stages add or replace columns on a shallow copy (df.copy(deep=False)),
+# which shares every untouched column with the input instead of copying it.
+CATEGORY_COLUMNS = ['user', 'action', 'source_ip', 'status', 'mitre_tag', 'risk_level', 'explanation']
+INT8_COLUMNS = ['login_hour', 'is_suspicious_action']
+TIMESTAMP_DTYPE = 'datetime64[s]'
+
+def _sorted_uniques(values):
+    try:
+        return pd.factorize(values, sort=True)
+    except TypeError:  # mixed types: keep first-seen order
+        return pd.factorize(values)
+
+def categorical(codes, values, index=None, name=None):
+    """``values[codes]`` as a categorical Series (numpy indexing: -1 is the last value).
+
+    ``values`` may repeat or hold None (missing); categories are its distinct
+    values, sorted. Costs O(len(values)) plus one pass over ``codes``.
+    """
+    value_codes, categories = _sorted_uniques(pd.Index(values, dtype=object))
+    dtype = np.int8 if len(categories) < 2**7 else np.int16 if len(categories) < 2**15 else np.int32
+    return pd.Series(pd.Categorical.from_codes(value_codes.astype(dtype)[codes], categories),
+                     index=index, name=name)
+
+def as_category(series):
+    """Dictionary-encode a string column (categoricals are returned as-is)."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    codes, uniques = _sorted_uniques(series)
+    return pd.Series(pd.Categorical.from_codes(codes, uniques), index=series.index, name=series.name)
+
+def small_ints(values, dtypes=(np.int8, np.int16, np.int32)):
+    """Integer ``values`` in the first of ``dtypes`` that holds them all (else int64).
+
+    Floats (columns with missing values) and empty arrays are returned unchanged.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind not in 'iub' or len(values) == 0:
+        return values
+    low, high = values.min(), values.max()
+    dtype = next((t for t in dtypes if np.iinfo(t).min <= low and high <= np.iinfo(t).max), np.int64)
+    return values.astype(dtype, copy=False)
+
+def compact_events(df):
+    """M2: ``df`` with string, timestamp and flag columns in compact form.
+
+    Returns a new frame; columns already compact are shared, not copied.
+    Timestamps are narrowed to seconds only when that loses nothing.
+    """
+    out = df.copy(deep=False)
+    for col in df.columns:
+        series = df[col]
+        if col in CATEGORY_COLUMNS and (series.dtype == object or pd.api.types.is_string_dtype(series.dtype)):
+            out[col] = as_category(series)
+        elif col == 'timestamp' and series.dtype != TIMESTAMP_DTYPE:
+            ts = pd.to_datetime(series) if not pd.api.types.is_datetime64_dtype(series.dtype) else series
+            if ts.dt.tz is None:
+                seconds = ts.astype(TIMESTAMP_DTYPE)
+                out[col] = seconds if ((seconds == ts) | ts.isna()).all() else ts
+        elif col in INT8_COLUMNS and series.dtype.kind in 'iub':
+            out[col] = series.astype(np.int8)
+    return out
+
+def event_bytes(df):
+    """Memory per event (all columns, strings included)."""
+    return df.memory_usage(deep=True, index=False).sum() / max(len(df), 1)
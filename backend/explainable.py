@@ -1,41 +1,151 @@
 import pandas as pd
 import numpy as np
+import argparse
+import operator
 import os
+import string
+import sys
 
-# Load prior risk results
-risk_df = pd.read_csv('features/risk_assessment.csv')
-
-def explain_incident(row):
-    """Simple explainable AI: top reasons for risk using M7 data."""
-    explanations = []
-    # High risk score
-    if row['final_risk_score'] > 80:
-        explanations.append(f"Extreme risk score ({row['final_risk_score']:.1f})")
-    # Suspicious actions
-    if 'usb' in str(row['action']).lower():
-        explanations.append("USB insert (MITRE T1201: Exploitation)")
-    elif 'login' in str(row['action']).lower():
-        explanations.append("Repeated logins flagged")
-    # MITRE high-impact
-    if 'T1201' in str(row['mitre_tag']):
-        explanations.append("Client execution technique")
-    # HIGH level
-    if row['risk_level'] == 'HIGH':
-        explanations.append("Classified as critical incident")
-    
-    top_reasons = explanations[:3]  # Top 3
-    return '; '.join(top_reasons) if top_reasons else "Routine activity"
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from backend.events import categorical
+
+# M8 explanation rules, in precedence order: each row lists the reasons of
+# its first ``max_reasons`` matching rules. A rule matches when ``column``
+# ``op`` ``value`` holds and none of the rules named in ``unless`` matched.
+# ``contains`` compares str(value) case-insensitively unless ``case`` is set.
+# ``reason`` may use one {column:format} field, filled from that row.
+EXPLANATION_RULES = [
+    {'name': 'extreme_score', 'column': 'final_risk_score', 'op': '>', 'value': 80,
+     'reason': "Extreme risk score ({final_risk_score:.1f})"},
+    {'name': 'usb', 'column': 'action', 'op': 'contains', 'value': 'usb',
+     'reason': "USB insert (MITRE T1201: Exploitation)"},
+    {'name': 'login', 'column': 'action', 'op': 'contains', 'value': 'login', 'unless': ['usb'],
+     'reason': "Repeated logins flagged"},
+    {'name': 'client_execution', 'column': 'mitre_tag', 'op': 'contains', 'value': 'T1201', 'case': True,
+     'reason': "Client execution technique"},
+    {'name': 'critical', 'column': 'risk_level', 'op': '==', 'value': 'HIGH',
+     'reason': "Classified as critical incident"},
+]
+DEFAULT_EXPLANATION = "Routine activity"
+
+COMPARISONS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le,
+               '==': operator.eq, '!=': operator.ne}
+
+def _test(rule, value):
+    """Rule condition for one scalar (used on column uniques)."""
+    if rule['op'] == 'contains':
+        if rule.get('case'):
+            return str(rule['value']) in str(value)
+        return str(rule['value']).lower() in str(value).lower()
+    if rule['op'] == 'in':
+        return value in rule['value']
+    try:
+        return bool(COMPARISONS[rule['op']](value, rule['value']))
+    except TypeError:
+        return False
+
+def _codes(df, column, cache):
+    """(codes, uniques) for a column, with missing values as the last unique."""
+    if column not in cache:
+        codes, uniques = pd.factorize(df[column])
+        uniques = np.append(np.asarray(uniques, dtype=object), np.nan)
+        cache[column] = (np.where(codes < 0, len(uniques) - 1, codes), uniques)
+    return cache[column]
+
+def rule_mask(df, rule, cache=None):
+    """Boolean mask of rows matching one rule's condition (``unless`` not applied).
+
+    Numeric comparisons run on the column; everything else is evaluated once
+    per distinct value and mapped back through the factorized codes.
+    """
+    cache = {} if cache is None else cache
+    column = df[rule['column']]
+    if rule['op'] in COMPARISONS and pd.api.types.is_numeric_dtype(column.dtype):
+        return COMPARISONS[rule['op']](column.to_numpy(), rule['value'])
+    codes, uniques = _codes(df, rule['column'], cache)
+    return np.array([_test(rule, u) for u in uniques], dtype=bool)[codes]
+
+def _template_field(rule):
+    fields = [field for _, field, _, _ in string.Formatter().parse(rule['reason']) if field]
+    if len(fields) > 1:
+        raise ValueError(f"Rule {rule['name']!r}: reasons may reference at most one column")
+    return fields[0] if fields else None
 
-# Add explanations
-risk_df['explanation'] = risk_df.apply(explain_incident, axis=1)
-risk_df.to_csv('features/explainable_risk_assessment.csv', index=False)
+def explain_risks(risk_df, rules=EXPLANATION_RULES, max_reasons=3):
+    """M8: The M7 results plus an ``explanation`` column (input columns are shared).
 
-print("=== M8 EXPLAINABLE AI ===")
-high_risks = risk_df[risk_df['risk_level'] == 'HIGH'].head(5)
-print(high_risks[['user', 'action', 'final_risk_score', 'risk_level', 'mitre_tag', 'explanation']])
-print(f"Saved explainable_risk_assessment.csv ({len(risk_df)} events)")
-print("HIGH risk incidents with explanations:", len(high_risks))
-print("M8 EXPLAINABLE AI ✅")
+    Rule masks are evaluated over whole columns; rows are then grouped by
+    which reasons they get (and the template values those reasons use), so
+    strings are built once per distinct explanation, not once per row.
+    """
+    explained = risk_df.copy(deep=False)
+    n = len(explained)
+    cache = {}
+    matched = {}
+    for rule in rules:
+        mask = rule_mask(explained, rule, cache)
+        for name in rule.get('unless', ()):
+            mask = mask & ~matched[name]
+        matched[rule['name']] = mask
+
+    # Keep each row's first max_reasons matches, in rule order
+    shown = []
+    count = np.zeros(n, dtype=np.int64)
+    for rule in rules:
+        mask = matched[rule['name']] & (count < max_reasons)
+        count += mask
+        shown.append(mask)
+
+    # Mixed-radix group key, one digit per rule; keys lie in [0, span)
+    key, span = np.zeros(n, dtype=np.int64), 1
+    for rule, mask in zip(rules, shown):
+        field = _template_field(rule)
+        if field is None:
+            radix, digit = 2, mask
+        else:
+            codes, uniques = _codes(explained, field, cache)
+            radix, digit = len(uniques) + 1, np.where(mask, codes + 1, 0)
+        if span * radix > 2**62:  # renumber keys 0..groups-1 before the next digit could overflow
+            key, seen = pd.factorize(key)
+            key, span = key.astype(np.int64), len(seen)
+        key = key * radix + digit
+        span *= radix
+    groups, _ = pd.factorize(key)
+
+    texts = []
+    for row in pd.Series(groups).drop_duplicates().index:  # first row of each group, in group order
+        reasons = [rule['reason'].format(**({field: explained[field].iat[row]} if field else {}))
+                   for rule, mask, field in zip(rules, shown, map(_template_field, rules)) if mask[row]]
+        texts.append('; '.join(reasons) if reasons else DEFAULT_EXPLANATION)
+    explained['explanation'] = categorical(groups, texts, index=explained.index)
+    return explained
+
+def explain_incident(row, rules=EXPLANATION_RULES):
+    """Simple explainable AI: top reasons for risk using M7 data (one row)."""
+    return explain_risks(pd.DataFrame([row]), rules)['explanation'].iat[0]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="M8: explain M7 risk assessments")
+    parser.add_argument('--input', default='features/risk_assessment.csv')
+    parser.add_argument('--output', default='features/explainable_risk_assessment.csv')
+    args = parser.parse_args(argv)
+
+    # Load prior risk results
+    risk_df = pd.read_csv(args.input)
+    
+    # Add explanations
+    risk_df = explain_risks(risk_df)
+    risk_df.to_csv(args.output, index=False)
+    
+    print("=== M8 EXPLAINABLE AI ===")
+    high_risks = risk_df[risk_df['risk_level'] == 'HIGH'].head(5)
+    print(high_risks[['user', 'action', 'final_risk_score', 'risk_level', 'mitre_tag', 'explanation']])
+    print(f"Saved {os.path.basename(args.output)} ({len(risk_df)} events)")
+    print("HIGH risk incidents with explanations:", len(high_risks))
+    print("M8 EXPLAINABLE AI ✅")
 
 if __name__ == "__main__":
-    pass
+    main()
@@ -0,0 +1,146 @@
+import pandas as pd
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from backend.ingestion import (DEFAULT_CHUNKSIZE, connect, normalize_timestamps, _load_dictionaries,
+                               _insert_events, _sql_rows, _timeline_query, _read_timeline)
+from backend.events import compact_events
+from backend.features import FEATURE_COLUMNS, engineer_features_incremental
+
+# Features live next to the raw rows (keyed by events.rowid); per-user running
+# state is keyed by dictionary code so a batch only touches its own users.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS feature_state (
+    user_id INTEGER PRIMARY KEY,
+    event_count INTEGER NOT NULL,
+    failed_logins INTEGER NOT NULL,
+    last_source_ip_id INTEGER,
+    ip_changes INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS event_features (
+    event_id INTEGER PRIMARY KEY,
+    login_hour INTEGER,
+    events_per_user INTEGER,
+    failed_logins INTEGER,
+    is_suspicious_action INTEGER,
+    ip_change INTEGER
+);
+"""
+
+def _connect(db_path):
+    conn = connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+def _load_state(conn, user_ids):
+    """Running state for just the users in the batch."""
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS batch_users (user_id INTEGER PRIMARY KEY)")
+    conn.execute("DELETE FROM batch_users")
+    conn.executemany("INSERT INTO batch_users VALUES (?)", ((int(u),) for u in user_ids))
+    return pd.read_sql(
+        "SELECT s.user_id AS user, s.event_count, s.failed_logins, "
+        "s.last_source_ip_id AS last_source_ip, s.ip_changes "
+        "FROM feature_state s JOIN batch_users b ON b.user_id = s.user_id",
+        conn, index_col='user')
+
+def _save_state(conn, state):
+    last_ip = state['last_source_ip'].astype(object).where(state['last_source_ip'].notna(), None)
+    conn.executemany(
+        "INSERT INTO feature_state (user_id, event_count, failed_logins, last_source_ip_id, ip_changes) "
+        "VALUES (?, ?, ?, ?, ?) ON CONFLICT(user_id) DO UPDATE SET "
+        "event_count = excluded.event_count, failed_logins = excluded.failed_logins, "
+        "last_source_ip_id = excluded.last_source_ip_id, ip_changes = excluded.ip_changes",
+        zip(map(int, state.index), map(int, state['event_count']), map(int, state['failed_logins']),
+            (None if ip is None else int(ip) for ip in last_ip), map(int, state['ip_changes'])))
+
+def _update_features(conn, coded, event_ids):
+    """Features for rows whose user/source_ip are dictionary codes, in ts order."""
+    state = _load_state(conn, coded['user'].dropna().unique())
+    features, new_state = engineer_features_incremental(coded, state)
+    rows = features[FEATURE_COLUMNS].copy()
+    rows.insert(0, 'event_id', list(event_ids))
+    conn.executemany(f"INSERT INTO event_features ({', '.join(rows.columns)}) "
+                     f"VALUES ({', '.join('?' * len(rows.columns))})", _sql_rows(rows))
+    _save_state(conn, new_state)
+    return features
+
+def append_batch(df, db_path="data/raw_logs.sqlite"):
+    """M3: Ingest a new batch and compute its features incrementally.
+
+    Raw rows, their features and the updated per-user state are written in
+    one transaction (all or nothing), and cost is O(batch) regardless of
+    archive size. Batches are expected in time order; ``events_per_user``
+    is the user's count as of the batch a row arrived in.
+    """
+    batch = normalize_timestamps(df.copy()).sort_values('timestamp', kind='stable').reset_index(drop=True)
+    conn = _connect(db_path)
+    try:
+        with conn:
+            encoded = _insert_events(conn, batch, _load_dictionaries(conn))
+            coded = pd.DataFrame({
+                'timestamp': batch['timestamp'],
+                'user': encoded['user_id'],
+                'action': batch['action'],
+                'source_ip': encoded['source_ip_id'],
+                'status': batch['status'],
+            })
+            features = _update_features(conn, coded, encoded['event_id'])
+    finally:
+        conn.close()
+    features[['user', 'source_ip']] = batch[['user', 'source_ip']]
+    features.insert(0, 'event_id', encoded['event_id'])
+    return features
+
+def append_csv(file_path, db_path="data/raw_logs.sqlite", chunksize=DEFAULT_CHUNKSIZE):
+    """Stream a CSV through append_batch one chunk at a time."""
+    rows = 0
+    for chunk in pd.read_csv(file_path, chunksize=chunksize):
+        rows += len(append_batch(chunk, db_path))
+    print(f"Appended {rows} rows with features from {file_path}")
+    return rows
+
+def rebuild_features(db_path="data/raw_logs.sqlite", chunksize=DEFAULT_CHUNKSIZE):
+    """Recompute all stored features and state from the events table.
+
+    Runs as one transaction, so a failed rebuild keeps the previous features.
+    """
+    conn = _connect(db_path)
+    reader = connect(db_path)
+    rows = 0
+    try:
+        query = ("SELECT e.rowid AS event_id, e.ts AS timestamp, e.user_id AS user, d_action.value AS action, "
+                 "e.source_ip_id AS source_ip, d_status.value AS status FROM events e "
+                 "LEFT JOIN dict_action d_action ON d_action.id = e.action_id "
+                 "LEFT JOIN dict_status d_status ON d_status.id = e.status_id "
+                 "ORDER BY e.ts, e.rowid")
+        with conn:
+            conn.execute("DELETE FROM feature_state")
+            conn.execute("DELETE FROM event_features")
+            for chunk in pd.read_sql(query, reader, chunksize=chunksize):
+                chunk['timestamp'] = pd.to_datetime(chunk['timestamp'], unit='s')
+                _update_features(conn, chunk.drop(columns='event_id'), chunk['event_id'])
+                rows += len(chunk)
+    finally:
+        reader.close()
+        conn.close()
+    print(f"Rebuilt features for {rows} events in {db_path}")
+    return rows
+
+def load_features(user=None, source_ip=None, start=None, end=None, limit=None, db_path="data/raw_logs.sqlite"):
+    """M3: Stored timeline + features, same filters as get_timeline."""
+    query, params = _timeline_query(None, user, source_ip, start, end, limit,
+                                    extra_select=[f"f.{col}" for col in FEATURE_COLUMNS],
+                                    extra_join=" JOIN event_features f ON f.event_id = e.rowid")
+    return compact_events(_read_timeline(query, params, db_path, connect_fn=_connect))
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        append_csv(sys.argv[1])
+    else:
+        rebuild_features()
+    print("=== M3 INCREMENTAL FEATURES ===")
+    print(load_features(limit=5))
@@ -1,38 +1,139 @@
 import pandas as pd
 import numpy as np
+import os
+import sys
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from backend.events import small_ints
+from backend.metrics import timed
+
+FEATURE_COLUMNS = ['login_hour', 'events_per_user', 'failed_logins', 'is_suspicious_action', 'ip_change']
+COUNT_DTYPES = (np.int32,)  # running counts; int64 only past 2**31 events
+SUSPICIOUS_ACTIONS = ['usb_insert', 'privilege_escalation']
+
+def _group_layout(codes):
+    """Stable sort order by group code plus the start index of each row's group."""
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    starts = np.ones(len(codes), dtype=bool)
+    starts[1:] = sorted_codes[1:] != sorted_codes[:-1]
+    group_start = np.maximum.accumulate(np.where(starts, np.arange(len(codes)), 0))
+    return order, starts, group_start
+
+def _group_cumsum(values, order, group_start):
+    """Per-group running sum in original row order, without a Python loop."""
+    v = values[order]
+    csum = np.cumsum(v)
+    out = np.empty_like(csum)
+    out[order] = csum - (csum[group_start] - v[group_start])
+    return out
+
+def _mask_missing(values, missing):
+    """Rows without a user fall outside every group, as with groupby()."""
+    if not missing.any():
+        return values
+    values = values.astype(float)
+    values[missing] = np.nan
+    return values
+
+def empty_feature_state():
+    """Per-user running state before any events have been seen."""
+    return pd.DataFrame({
+        'event_count': pd.Series(dtype='int64'),
+        'failed_logins': pd.Series(dtype='int64'),
+        'last_source_ip': pd.Series(dtype=object),
+        'ip_changes': pd.Series(dtype='int64'),
+    }, index=pd.Index([], name='user'))
 
 def engineer_features(df):
     """M3: Create AI-ready features from timeline."""
-    features = df.copy()
-    
+    features, _ = engineer_features_incremental(df)
+    return features
+
+@timed('features')
+def engineer_features_incremental(df, state=None):
+    """M3: Features for a new batch, continuing each user's running state.
+
+    ``state`` is indexed by user with the empty_feature_state() columns, as
+    returned by an earlier call (None = no history). Returns the batch
+    features and the new state for the users seen in the batch, so the cost
+    is O(batch) however long the history is. For a batch newer than the
+    history, features match a full engineer_features() recompute.
+    The input columns are shared with the result, not copied; flags and
+    hours are int8 and counts int32 unless a user has no row (then float).
+    """
+    user_codes, users = pd.factorize(df['user'])
+    users = pd.Index(np.asarray(users))  # plain values even for categorical input
+    missing_user = user_codes < 0
+    order, starts, group_start = _group_layout(user_codes)
+    prior = (empty_feature_state() if state is None else state).reindex(users)
+    # One trailing slot so rows without a user (code -1) index a harmless 0
+    seen = np.append(prior['event_count'].notna().to_numpy(), False)
+    prior_count, prior_failed, prior_changes = (
+        np.append(pd.to_numeric(prior[col]).fillna(0).to_numpy(dtype=np.int64), 0)
+        for col in ['event_count', 'failed_logins', 'ip_changes'])
+
     # Feature 1: Hour of day (normal logins are 9-5)
-    features['login_hour'] = pd.to_datetime(features['timestamp']).dt.hour
-    
+    login_hour = small_ints(pd.to_datetime(df['timestamp']).dt.hour.to_numpy(), (np.int8,))
+
     # Feature 2: Event frequency per user (sudden bursts suspicious)
-    features['events_per_user'] = features.groupby('user')['user'].transform('count')
-    
+    total = prior_count + np.bincount(user_codes[~missing_user], minlength=len(users) + 1)
+    events_per_user = _mask_missing(small_ints(total[user_codes], COUNT_DTYPES), missing_user)
+
     # Feature 3: Failed login count per user
-    features['failed_logins'] = features.apply(lambda row: 1 if row['action'] == 'login' and row['status'] == 'fail' else 0, axis=1)
-    features['failed_logins'] = features.groupby('user')['failed_logins'].transform('cumsum')
-    
+    failed = ((df['action'] == 'login') & (df['status'] == 'fail')).to_numpy(dtype=np.int64)
+    failed_cum = _group_cumsum(failed, order, group_start) + prior_failed[user_codes]
+    failed_logins = _mask_missing(small_ints(failed_cum, COUNT_DTYPES), missing_user)
+
     # Feature 4: Suspicious actions (1=suspicious, 0=normal)
-    suspicious_actions = ['usb_insert', 'privilege_escalation']
-    features['is_suspicious_action'] = features['action'].isin(suspicious_actions).astype(int)
-    
+    is_suspicious_action = df['action'].isin(SUSPICIOUS_ACTIONS).to_numpy(dtype=np.int8)
+
     # Feature 5: IP change frequency (same user, different IPs = suspicious)
-    features['ip_change'] = features.groupby('user')['source_ip'].transform(lambda x: x.ne(x.shift()).cumsum())
-    
-    return features[['timestamp', 'user', 'action', 'source_ip', 'status', 'login_hour', 'events_per_user', 'failed_logins', 'is_suspicious_action', 'ip_change']]
+    # A row counts as a change when it is the user's first event, its IP differs
+    # from the user's previous IP, or either IP is missing (NaN never equals NaN).
+    ip_codes, ips = pd.factorize(df['source_ip'])
+    ips = pd.Index(np.asarray(ips))
+    ip_sorted = ip_codes[order]
+    prev_ip = np.empty_like(ip_sorted)
+    prev_ip[1:] = ip_sorted[:-1]
+    first_users = user_codes[order][starts]
+    last_known = np.append(ips.get_indexer(prior['last_source_ip']), -1)
+    prev_ip[starts] = np.where(seen[first_users], last_known[first_users], -1)
+    changed = np.empty(len(ip_codes), dtype=np.int64)
+    changed[order] = (ip_sorted < 0) | (prev_ip < 0) | (ip_sorted != prev_ip)
+    ip_changes = _group_cumsum(changed, order, group_start) + prior_changes[user_codes]
+    ip_change = _mask_missing(small_ints(ip_changes, COUNT_DTYPES), missing_user)
+
+    # Running state as of each user's last event in the batch
+    ends = np.append(starts[1:], True)
+    end_rows = order[ends]
+    end_rows = end_rows[user_codes[end_rows] >= 0]
+    end_users = user_codes[end_rows]
+    new_state = pd.DataFrame({
+        'event_count': total[end_users],
+        'failed_logins': failed_cum[end_rows],
+        'last_source_ip': df['source_ip'].iloc[end_rows].to_numpy(),
+        'ip_changes': ip_changes[end_rows],
+    }, index=pd.Index(users[end_users], name='user'))
+
+    columns = {col: df[col] for col in ['timestamp', 'user', 'action', 'source_ip', 'status']}
+    columns.update(login_hour=login_hour, events_per_user=events_per_user, failed_logins=failed_logins,
+                   is_suspicious_action=is_suspicious_action, ip_change=ip_change)
+    features = pd.DataFrame(columns, index=df.index, copy=False)
+    return features, new_state
 
 if __name__ == "__main__":
     # Import from same folder
     from ingestion import get_timeline
     timeline = get_timeline()
-    
+
     features_df = engineer_features(timeline)
     print("=== M3 FEATURES ===")
     print(features_df[['user', 'action', 'login_hour', 'is_suspicious_action', 'ip_change']].head())
-    
+
     # Save
     features_df.to_csv("features/timeline_features.csv", index=False)
     print("Saved features/timeline_features.csv")
@@ -1,18 +1,153 @@
 import pandas as pd
+import json
 import sqlite3
+import os
+import sys
+import time
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from backend.events import TIMESTAMP_DTYPE, categorical
+from backend.metrics import timed
+
+# Tuned for bulk appends: WAL keeps readers unblocked while a large file
+# streams in, NORMAL sync is safe under WAL, negative cache_size is KiB.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -65536,
+    'temp_store': 'MEMORY',
+}
+
+DEFAULT_CHUNKSIZE = 100_000
+DICTIONARY_BATCH = 900  # ids per IN (...) lookup, under SQLite's 999 host parameter limit
+
+# String columns stored as integer codes into a per-column dictionary table
+ENCODED_COLUMNS = ['user', 'action', 'source_ip', 'status']
+TIMELINE_COLUMNS = ['timestamp'] + ENCODED_COLUMNS
+
+# Managed schema: epoch-second timestamps, dictionary-encoded strings and
+# composite indexes so filtered time-range pulls never scan or sort.
+SCHEMA = "".join(
+    f"CREATE TABLE IF NOT EXISTS dict_{col} (id INTEGER PRIMARY KEY, value TEXT NOT NULL UNIQUE);\n"
+    for col in ENCODED_COLUMNS
+) + """
+CREATE TABLE IF NOT EXISTS events (
+    ts INTEGER NOT NULL,
+    user_id INTEGER,
+    action_id INTEGER,
+    source_ip_id INTEGER,
+    status_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_events_user_ts ON events(user_id, ts);
+CREATE INDEX IF NOT EXISTS idx_events_source_ip_ts ON events(source_ip_id, ts);
+CREATE INDEX IF NOT EXISTS idx_events_ts ON events(ts);
+CREATE TABLE IF NOT EXISTS event_attributes (
+    event_id INTEGER PRIMARY KEY,
+    attributes TEXT NOT NULL
+);
+"""
+
+def connect(db_path="data/raw_logs.sqlite", pragmas=SQLITE_PRAGMAS):
+    """Open SQLite with ingestion PRAGMAs applied and the schema in place."""
+    db_dir = os.path.dirname(db_path)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name}={value}")
+    conn.executescript(SCHEMA)
+    return conn
 
 def normalize_timestamps(df):
     """Convert timestamp to datetime."""
     df['timestamp'] = pd.to_datetime(df['timestamp'])
     return df
 
+def to_epoch(timestamp):
+    """Datetime-like scalar to epoch seconds as stored in ``events.ts``."""
+    return pd.Timestamp(timestamp).value // 10**9
+
+def _load_dictionaries(conn):
+    return {col: dict(conn.execute(f"SELECT value, id FROM dict_{col}").fetchall())
+            for col in ENCODED_COLUMNS}
+
+def _encode_column(conn, col, values, codes):
+    """Map values to dictionary codes, registering unseen ones."""
+    present = values.notna()
+    values = values[present].astype(str)
+    for value in values.unique():
+        if value not in codes:
+            codes[value] = conn.execute(f"INSERT INTO dict_{col}(value) VALUES (?)", (value,)).lastrowid
+    encoded = pd.Series(pd.NA, index=present.index, dtype='Int64')
+    encoded[present] = values.map(codes)
+    return encoded
+
+def _sql_rows(frame):
+    """Rows of ``frame`` as tuples of Python scalars (missing -> None), for executemany."""
+    return zip(*[frame[col].astype(object).where(frame[col].notna(), None) for col in frame.columns])
+
+def _insert_attributes(conn, df, event_ids):
+    """Columns outside TIMELINE_COLUMNS (risk scores, MITRE tags, ...) as one JSON object per event."""
+    extra = [col for col in df.columns if col not in TIMELINE_COLUMNS]
+    if not extra or len(df) == 0:
+        return
+    records = df[extra].to_json(orient='records', lines=True, date_format='iso').splitlines()
+    conn.executemany("INSERT INTO event_attributes (event_id, attributes) VALUES (?, ?)",
+                     zip(map(int, event_ids), records))
+
+def _insert_events(conn, df, dictionaries):
+    """Encode one normalized frame and insert it inside the caller's transaction.
+
+    Returns the encoded rows with their ``event_id`` (the events rowid).
+    Columns outside TIMELINE_COLUMNS go to ``event_attributes``. Every table
+    is written with plain executemany (pandas to_sql would commit), so the
+    caller's ``with conn:`` commits or rolls back all of them together.
+    """
+    encoded = pd.DataFrame({'ts': df['timestamp'].values.astype('datetime64[s]').astype('int64')})
+    for col in ENCODED_COLUMNS:
+        if col in df.columns:
+            encoded[f'{col}_id'] = _encode_column(conn, col, df[col].reset_index(drop=True), dictionaries[col])
+    conn.executemany(f"INSERT INTO events ({', '.join(encoded.columns)}) "
+                     f"VALUES ({', '.join('?' * len(encoded.columns))})", _sql_rows(encoded))
+    # The transaction holds the write lock until commit and each row takes max(rowid) + 1,
+    # so the batch's ids are the len(encoded) ending at this connection's last rowid
+    last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+    encoded.insert(0, 'event_id', range(last_id - len(encoded) + 1, last_id + 1))
+    _insert_attributes(conn, df, encoded['event_id'])
+    return encoded
+
+def _append_events(conn, df, dictionaries):
+    """Encode one normalized frame and append it in a single transaction."""
+    try:
+        with conn:
+            return _insert_events(conn, df, dictionaries)
+    except BaseException:
+        _reset_dictionaries(conn, dictionaries)
+        raise
+
+def _reset_dictionaries(conn, dictionaries):
+    """Drop cached codes a rolled-back transaction registered (reload from the store)."""
+    for col, codes in _load_dictionaries(conn).items():
+        dictionaries[col].clear()
+        dictionaries[col].update(codes)
+
 def store_to_sqlite(df, db_path="data/raw_logs.sqlite"):
-    """Store normalized logs to SQLite."""
-    conn = sqlite3.connect(db_path)
-    df.to_sql('raw_logs', conn, if_exists='append', index=False)
-    conn.close()
+    """Store normalized logs to SQLite.
+
+    TIMELINE_COLUMNS go to ``events``; any other columns are kept per event
+    in ``event_attributes`` (see get_attributes).
+    """
+    conn = connect(db_path)
+    try:
+        _append_events(conn, df, _load_dictionaries(conn))
+    finally:
+        conn.close()
     print(f"Stored to {db_path}")
 
+@timed('ingest_csv')
 def load_csv_log(file_path, db_path="data/raw_logs.sqlite"):
     """Full ingestion pipeline."""
     df = pd.read_csv(file_path)
@@ -21,30 +156,168 @@ def load_csv_log(file_path, db_path="data/raw_logs.sqlite"):
     print(f"Loaded and normalized {len(df)} rows from {file_path}")
     return df
 
+def _report_progress(rows, chunks, elapsed):
+    rate = rows / elapsed if elapsed > 0 else 0.0
+    print(f"  chunk {chunks}: {rows} rows ({rate:,.0f} rows/sec)")
+
+@timed('ingest_stream', rows=lambda stats: stats['rows'])
+def stream_csv_log(file_path, db_path="data/raw_logs.sqlite", chunksize=DEFAULT_CHUNKSIZE, progress=_report_progress):
+    """M1: Streaming ingestion for files too large to hold in memory.
+
+    Reads ``chunksize`` rows at a time, normalizes each chunk and appends it
+    in its own transaction, so peak memory is bounded by the chunk size.
+    ``progress(rows, chunks, elapsed)`` is called after every chunk; pass
+    None to silence it. Returns ingestion stats instead of a DataFrame.
+    """
+    conn = connect(db_path)
+    dictionaries = _load_dictionaries(conn)
+    rows = chunks = 0
+    start = time.perf_counter()
+    try:
+        for chunk in pd.read_csv(file_path, chunksize=chunksize):
+            chunk = normalize_timestamps(chunk)
+            _append_events(conn, chunk, dictionaries)
+            rows += len(chunk)
+            chunks += 1
+            if progress:
+                progress(rows, chunks, time.perf_counter() - start)
+    finally:
+        conn.close()
+    elapsed = time.perf_counter() - start
+    stats = {
+        'rows': rows,
+        'chunks': chunks,
+        'seconds': round(elapsed, 3),
+        'rows_per_sec': round(rows / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+    print(f"Streamed {rows} rows from {file_path} to {db_path} ({stats['rows_per_sec']:,.0f} rows/sec)")
+    return stats
+
+def migrate_legacy_raw_logs(db_path="data/raw_logs.sqlite", chunksize=DEFAULT_CHUNKSIZE):
+    """Move a pre-schema TEXT ``raw_logs`` table into ``events``.
+
+    The old table is kept as ``raw_logs_legacy`` once copied.
+    """
+    conn = connect(db_path)
+    try:
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='raw_logs'").fetchone()
+        if not exists:
+            return 0
+        dictionaries = _load_dictionaries(conn)
+        rows = 0
+        for chunk in pd.read_sql("SELECT * FROM raw_logs ORDER BY rowid", conn, chunksize=chunksize):
+            _append_events(conn, normalize_timestamps(chunk), dictionaries)
+            rows += len(chunk)
+        with conn:
+            conn.execute("ALTER TABLE raw_logs RENAME TO raw_logs_legacy")
+    finally:
+        conn.close()
+    print(f"Migrated {rows} legacy rows in {db_path}")
+    return rows
+
+_COLUMN_SQL = {'timestamp': 'e.ts AS timestamp'}
+_COLUMN_SQL.update({col: f"e.{col}_id AS {col}" for col in ENCODED_COLUMNS})
+
+def get_attributes(event_ids=None, db_path="data/raw_logs.sqlite"):
+    """Stored non-timeline columns, indexed by event_id (all events when ``event_ids`` is None)."""
+    conn = connect(db_path)
+    try:
+        if event_ids is None:
+            rows = conn.execute("SELECT event_id, attributes FROM event_attributes ORDER BY event_id").fetchall()
+        else:
+            event_ids = [int(i) for i in event_ids]
+            rows = []
+            for i in range(0, len(event_ids), DICTIONARY_BATCH):
+                batch = event_ids[i:i + DICTIONARY_BATCH]
+                rows += conn.execute("SELECT event_id, attributes FROM event_attributes "
+                                     f"WHERE event_id IN ({','.join('?' * len(batch))}) ORDER BY event_id",
+                                     batch).fetchall()
+    finally:
+        conn.close()
+    return pd.DataFrame([json.loads(attributes) for _, attributes in rows],
+                        index=pd.Index([event_id for event_id, _ in rows], name='event_id'))
+
 def query_raw_logs(db_path="data/raw_logs.sqlite"):
     """Query all stored logs."""
-    conn = sqlite3.connect(db_path)
-    df = pd.read_sql("SELECT * FROM raw_logs ORDER BY timestamp", conn)
-    conn.close()
-    return df
+    return get_timeline(db_path=db_path)
+
+@timed('timeline')
+def get_timeline(user=None, source_ip=None, start=None, end=None, columns=None, limit=None,
+                 db_path="data/raw_logs.sqlite"):
+    """M2: Get unified timeline with filters.
+
+    ``start``/``end`` bound a half-open [start, end) range and accept any
+    value ``pd.Timestamp`` parses. ``columns`` selects a subset of
+    TIMELINE_COLUMNS (only the dictionaries needed are read) and ``limit``
+    caps the rows returned. User/IP filters are resolved to codes so the
+    (user, ts) and (source_ip, ts) indexes serve filter and order together.
+    String columns come back as sorted categoricals built straight from the
+    stored codes, and timestamps as datetime64[s] (see backend.events).
+    """
+    query, params = _timeline_query(columns, user, source_ip, start, end, limit)
+    return _read_timeline(query, params, db_path)
+
+def _timeline_query(columns=None, user=None, source_ip=None, start=None, end=None, limit=None,
+                    extra_select=(), extra_join=""):
+    """Build the get_timeline SQL; ``extra_*`` let other stores join onto events."""
+    columns = list(columns) if columns else list(TIMELINE_COLUMNS)
+    unknown = [col for col in columns if col not in _COLUMN_SQL]
+    if unknown:
+        raise ValueError(f"Unknown timeline columns: {unknown}")
 
-def get_timeline(user=None, source_ip=None):
-    """M2: Get unified timeline with filters."""
-    conn = sqlite3.connect("data/raw_logs.sqlite")
-    query = "SELECT * FROM raw_logs WHERE 1=1"
+    select = ", ".join([_COLUMN_SQL[col] for col in columns] + list(extra_select))
+    query = f"SELECT {select} FROM events e{extra_join} WHERE 1=1"
     params = []
     
     if user:
-        query += " AND user = ?"
+        query += " AND e.user_id = (SELECT id FROM dict_user WHERE value = ?)"
         params.append(user)
     if source_ip:
-        query += " AND source_ip = ?"
+        query += " AND e.source_ip_id = (SELECT id FROM dict_source_ip WHERE value = ?)"
         params.append(source_ip)
+    if start is not None:
+        query += " AND e.ts >= ?"
+        params.append(to_epoch(start))
+    if end is not None:
+        query += " AND e.ts < ?"
+        params.append(to_epoch(end))
     
-    query += " ORDER BY timestamp"
-    
-    df = pd.read_sql(query, conn, params=params)
-    conn.close()
+    query += " ORDER BY e.ts, e.rowid"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(int(limit))
+    return query, params
+
+def _decode_column(conn, col, ids):
+    """Dictionary ids (float when some are NULL) to a categorical of their values.
+
+    Only the distinct ids present are looked up, so a filtered pull reads a
+    handful of dictionary rows rather than the whole table.
+    """
+    codes, unique_ids = pd.factorize(ids)
+    unique_ids = [int(i) for i in unique_ids]
+    if len(unique_ids) > DICTIONARY_BATCH * 10:
+        values = dict(conn.execute(f"SELECT id, value FROM dict_{col}").fetchall())
+    else:
+        values = {}
+        for i in range(0, len(unique_ids), DICTIONARY_BATCH):
+            batch = unique_ids[i:i + DICTIONARY_BATCH]
+            values.update(conn.execute(f"SELECT id, value FROM dict_{col} WHERE id IN ({','.join('?' * len(batch))})",
+                                       batch).fetchall())
+    # Code -1 (NULL id) picks the trailing None
+    return categorical(codes, [values.get(i) for i in unique_ids] + [None], index=ids.index, name=col)
+
+def _read_timeline(query, params, db_path, connect_fn=connect):
+    conn = connect_fn(db_path)
+    try:
+        df = pd.read_sql(query, conn, params=params)
+        for col in ENCODED_COLUMNS:
+            if col in df.columns:
+                df[col] = _decode_column(conn, col, df[col])
+    finally:
+        conn.close()
+    if 'timestamp' in df.columns:
+        df['timestamp'] = df['timestamp'].to_numpy('int64').astype(TIMESTAMP_DTYPE)
     return df
 
 if __name__ == "__main__":
@@ -0,0 +1,266 @@
+import importlib
+import multiprocessing
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from backend.metrics import REGISTRY
+
+START_METHOD = 'spawn'  # workers never inherit the server's threads or sockets
+TERMINAL_STATES = ('done', 'failed', 'cancelled')
+
+JOBS_TOTAL = REGISTRY.counter('forensics_jobs_total', 'Pool jobs finished, by final status', ['status'])
+JOB_SECONDS = REGISTRY.histogram('forensics_job_seconds', 'Pool job run time (dispatch to finish)', ['status'])
+JOB_WAIT_SECONDS = REGISTRY.histogram('forensics_job_queue_seconds', 'Time pool jobs waited for a worker slot')
+
+class JobCancelled(Exception):
+    """Raised inside a job by checkpoint() once its cancellation was requested."""
+
+class JobLimitError(Exception):
+    """A tenant already has the maximum number of jobs queued."""
+
+# Worker-side state, set once per process by _init_worker
+_worker = {}
+
+def _init_worker(cancel_flags, progress, modules):
+    _worker.update(cancel=cancel_flags, progress=progress)
+    for module in modules:
+        importlib.import_module(module)
+
+def _ping():
+    return True
+
+def _run_job(slot, fn, args, kwargs):
+    _worker['slot'] = slot
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _worker.pop('slot', None)
+
+def checkpoint(rows=None):
+    """Call from inside a job between units of work: publishes ``rows`` done
+    and raises JobCancelled if the job was cancelled. No-op outside a pool job."""
+    slot = _worker.get('slot')
+    if slot is None:
+        return
+    if rows is not None:
+        _worker['progress'][slot] = rows
+    if _worker['cancel'][slot]:
+        raise JobCancelled()
+
+class Job:
+    """One submitted call; ``outcome`` is a Future resolved when the job reaches a terminal state."""
+
+    def __init__(self, tenant, fn, args, kwargs, callback=None):
+        self.id = uuid.uuid4().hex
+        self.tenant = tenant
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.callback = callback
+        self.status = 'queued'
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.rows = 0
+        self.result = None
+        self.error = None
+        self.slot = None
+        self.cancel_requested = False
+        self.outcome = Future()
+
+    def info(self):
+        return {'job_id': self.id, 'status': self.status, 'submitted_at': self.submitted_at,
+                'started_at': self.started_at, 'finished_at': self.finished_at, 'rows': self.rows,
+                'cancel_requested': self.cancel_requested, 'error': self.error}
+
+class JobManager:
+    """Runs CPU-bound jobs in a warm process pool, off the server's event loop.
+
+    At most ``max_workers`` jobs run at once, each in its own worker slot;
+    the rest wait in per-tenant FIFO queues. Free slots go to tenants in
+    round-robin order, skipping any tenant already running ``per_tenant``
+    jobs, so one tenant's burst of uploads cannot starve the others; a
+    tenant with ``max_queued`` jobs waiting is refused (JobLimitError).
+    Queued jobs cancel immediately; running jobs see the request at their
+    next checkpoint(), which also publishes their progress. ``callback(job)``
+    runs in the parent once a job is done, failed or cancelled. Finished
+    jobs are kept (with results) up to ``keep``, oldest dropped first.
+    """
+
+    def __init__(self, max_workers=1, per_tenant=2, max_queued=16, keep=1000, warm_modules=(),
+                 start_method=START_METHOD):
+        self.max_workers = max_workers
+        self.per_tenant = per_tenant
+        self.max_queued = max_queued
+        self.keep = keep
+        self.warm_modules = tuple(warm_modules)
+        self.context = multiprocessing.get_context(start_method)
+        self.cancel_flags = self.context.RawArray('b', max_workers)
+        self.progress = self.context.RawArray('q', max_workers)
+        self.executor = None
+        self.jobs = {}                 # id -> Job (queued, running and the last ``keep`` finished)
+        self.finished = deque()        # finished job ids, oldest first
+        self.queues = OrderedDict()    # tenant -> deque of queued Jobs, in round-robin order
+        self.running = Counter()       # tenant -> running jobs
+        self.free_slots = list(range(max_workers - 1, -1, -1))
+        self.lock = threading.Lock()
+
+    def _executor(self):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.max_workers, mp_context=self.context, initializer=_init_worker,
+                                                initargs=(self.cancel_flags, self.progress, self.warm_modules))
+        return self.executor
+
+    def warm(self):
+        """Start the workers and import ``warm_modules`` in each before the first job arrives."""
+        with self.lock:
+            executor = self._executor()
+        for future in [executor.submit(_ping) for _ in range(self.max_workers)]:
+            future.result()
+
+    def shutdown(self):
+        with self.lock:
+            queued = [job for queue in self.queues.values() for job in queue]
+            self.queues.clear()
+            executor, self.executor = self.executor, None
+        for job in queued:
+            self._finish(job, 'cancelled', error='server shutting down')
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, tenant, fn, args=(), kwargs=None, callback=None):
+        """Queue ``fn(*args, **kwargs)`` (picklable, module-level) for ``tenant``; returns the Job."""
+        job = Job(tenant, fn, tuple(args), kwargs or {}, callback)
+        with self.lock:
+            queue = self.queues.get(tenant)
+            if queue is not None and len(queue) >= self.max_queued:
+                raise JobLimitError(f"Tenant {tenant!r} already has {len(queue)} jobs queued")
+            self.queues.setdefault(tenant, deque()).append(job)
+            self.jobs[job.id] = job
+        self._dispatch()
+        return job
+
+    def get(self, job_id, tenant=None):
+        job = self.jobs.get(job_id)
+        if job is None or (tenant is not None and job.tenant != tenant):
+            return None
+        with self.lock:  # a running job without a slot is finishing; its slot may be reused already
+            if job.status == 'running' and job.slot is not None:
+                job.rows = self.progress[job.slot]
+        return job
+
+    def list(self, tenant=None):
+        return [job for job in list(self.jobs.values()) if tenant is None or job.tenant == tenant]
+
+    def stats(self):
+        with self.lock:
+            return {'queued': sum(len(queue) for queue in self.queues.values()),
+                    'running': sum(self.running.values()), 'workers': self.max_workers}
+
+    def cancel(self, job_id, tenant=None):
+        """Cancel a queued or running job; returns False if it already finished (or is unknown)."""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or (tenant is not None and job.tenant != tenant) or job.status in TERMINAL_STATES:
+                return False
+            if job.status == 'running' and job.slot is None:
+                return False  # released and finishing: the slot may already belong to another job
+            job.cancel_requested = True
+            if job.status == 'running':
+                self.cancel_flags[job.slot] = 1
+                return True
+            queue = self.queues[job.tenant]
+            queue.remove(job)
+            if not queue:
+                del self.queues[job.tenant]
+        self._finish(job, 'cancelled')
+        return True
+
+    def _next(self):
+        """Pop the next runnable job (round-robin over tenants under their limit) and give it a slot."""
+        for tenant, queue in self.queues.items():
+            if self.running[tenant] < self.per_tenant:
+                break
+        else:
+            return None
+        job = queue.popleft()
+        if queue:
+            self.queues.move_to_end(tenant)
+        else:
+            del self.queues[tenant]
+        job.slot = self.free_slots.pop()
+        self.cancel_flags[job.slot] = 0
+        self.progress[job.slot] = 0
+        self.running[tenant] += 1
+        job.status, job.started_at = 'running', time.time()
+        return job
+
+    def _dispatch(self):
+        while True:
+            with self.lock:
+                job = self._next() if self.free_slots else None
+                if job is None:
+                    return
+                executor = self._executor()
+            JOB_WAIT_SECONDS.observe(job.started_at - job.submitted_at)
+            try:
+                future = executor.submit(_run_job, job.slot, job.fn, job.args, job.kwargs)
+            except (BrokenProcessPool, RuntimeError) as e:
+                self._release(job, e, executor)
+                continue
+            future.add_done_callback(lambda future, job=job, executor=executor: self._completed(job, future, executor))
+
+    def _release(self, job, error, executor):
+        """Free a running job's slot, record its outcome and hand the slot to the next job."""
+        with self.lock:
+            job.rows = self.progress[job.slot]
+            self.free_slots.append(job.slot)
+            job.slot = None  # from here on cancel() and get() leave the slot alone
+            self.running[job.tenant] -= 1
+            if not self.running[job.tenant]:
+                del self.running[job.tenant]
+            broken = isinstance(error, BrokenProcessPool) and self.executor is executor
+            if broken:
+                self.executor = None  # a worker died; the next dispatch starts a fresh pool
+        if broken:
+            executor.shutdown(wait=False)
+        if error is None:
+            self._finish(job, 'done')
+        elif isinstance(error, JobCancelled):
+            self._finish(job, 'cancelled')
+        else:
+            self._finish(job, 'failed', error=f"{type(error).__name__}: {error}")
+        self._dispatch()
+
+    def _completed(self, job, future, executor):
+        if future.cancelled():
+            self._release(job, JobCancelled(), executor)
+            return
+        error = future.exception()
+        if error is None:
+            job.result = future.result()
+        self._release(job, error, executor)
+
+    def _finish(self, job, status, error=None):
+        job.status, job.error, job.finished_at = status, error, time.time()
+        JOBS_TOTAL.inc(status=status)
+        if job.started_at is not None:
+            JOB_SECONDS.observe(job.finished_at - job.started_at, status=status)
+        job.fn = job.args = job.kwargs = None
+        with self.lock:
+            self.finished.append(job.id)
+            while len(self.finished) > self.keep:
+                self.jobs.pop(self.finished.popleft(), None)
+        if job.callback is not None:
+            try:
+                job.callback(job)
+            except Exception as e:  # a failing callback must not wedge the scheduler
+                print(f"Job {job.id} callback failed: {e!r}")
+        if status == 'done':
+            job.outcome.set_result(job.result)
+        else:
+            job.outcome.set_exception(JobCancelled(job.id) if status == 'cancelled' else RuntimeError(job.error))
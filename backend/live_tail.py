@@ -0,0 +1,240 @@
+import pandas as pd
+import numpy as np
+import asyncio
+import csv
+import heapq
+import io
+import os
+import pathlib
+import sqlite3
+import sys
+from collections import deque
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from backend.ingestion import TIMELINE_COLUMNS
+from backend.features import FEATURE_COLUMNS, engineer_features_incremental
+from backend.risk_scoring import score_risk
+from backend.models.registry import find_model
+
+import joblib
+
+POLICIES = ('drop_oldest', 'drop_newest', 'highest_risk')
+POLICY_ALIASES = {'coalesce': 'highest_risk'}  # original name, still accepted
+
+class SQLiteTailSource:
+    """Follows the ingestion store, returning rows appended since the last poll.
+
+    Keeps one read-only connection across polls (opened once the store and
+    its events table exist); polls come from one producer, in any thread.
+    """
+
+    def __init__(self, db_path="data/raw_logs.sqlite", from_start=False):
+        self.db_path = db_path
+        self.last_id = None if not from_start else 0
+        self.conn = None
+
+    def _connection(self):
+        if self.conn is None and os.path.exists(self.db_path):
+            uri = pathlib.Path(os.path.abspath(self.db_path)).as_uri() + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='events'").fetchone():
+                self.conn = conn
+            else:
+                conn.close()  # store not initialized yet; retry next poll
+        return self.conn
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def poll(self, limit):
+        conn = self._connection()
+        if conn is None:
+            if self.last_id is None:
+                self.last_id = 0  # no events yet, so everything stored from now on is new
+            return pd.DataFrame(columns=['id'] + TIMELINE_COLUMNS)
+        if self.last_id is None:
+            self.last_id = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM events").fetchone()[0]
+        df = pd.read_sql(
+            "SELECT e.rowid AS id, e.ts AS timestamp, u.value AS user, a.value AS action, "
+            "i.value AS source_ip, s.value AS status FROM events e "
+            "LEFT JOIN dict_user u ON u.id = e.user_id LEFT JOIN dict_action a ON a.id = e.action_id "
+            "LEFT JOIN dict_source_ip i ON i.id = e.source_ip_id LEFT JOIN dict_status s ON s.id = e.status_id "
+            "WHERE e.rowid > ? ORDER BY e.rowid LIMIT ?", conn, params=[self.last_id, limit])
+        if not df.empty:
+            self.last_id = int(df['id'].iloc[-1])
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
+        return df
+
+class FileTailSource:
+    """Follows a growing CSV log (``tail -f``), surviving truncation/rotation."""
+
+    def __init__(self, path, from_start=False):
+        self.path = path
+        self.offset = None if not from_start else 0
+        self.header = None
+        self.next_id = 0
+
+    def poll(self, limit):
+        if not os.path.exists(self.path):
+            return pd.DataFrame(columns=['id'] + TIMELINE_COLUMNS)
+        with open(self.path, 'rb') as f:
+            header_line = f.readline()
+            self.header = next(csv.reader([header_line.decode('utf-8')]))
+            size = os.fstat(f.fileno()).st_size
+            if self.offset is None:
+                self.offset = size
+            if self.offset < len(header_line) or size < self.offset:
+                self.offset = len(header_line)
+            f.seek(self.offset)
+            lines = []
+            while len(lines) < limit:
+                line = f.readline()
+                if not line.endswith(b'\n'):
+                    break  # partial line still being written
+                lines.append(line)
+                self.offset += len(line)
+        df = pd.read_csv(io.BytesIO(b''.join(lines)), names=self.header, header=None) if lines else \
+            pd.DataFrame(columns=self.header)
+        df.insert(0, 'id', np.arange(self.next_id, self.next_id + len(df)))
+        self.next_id += len(df)
+        if 'timestamp' in df:
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return df
+
+class LiveScorer:
+    """Incremental M3 features + M7 risk for a stream of new events."""
+
+    def __init__(self, model=None):
+        self.state = None
+        self.events_max = 1
+        self.model = model
+        if model is None:
+            meta = find_model(FEATURE_COLUMNS)
+            self.model = joblib.load(meta['path'], mmap_mode='r') if meta else None
+
+    def score(self, batch):
+        for col in TIMELINE_COLUMNS:
+            if col not in batch:
+                batch[col] = np.nan
+        features, new_state = engineer_features_incremental(batch, self.state)
+        self.state = new_state if self.state is None else new_state.combine_first(self.state)
+        if self.model is not None:
+            features['anomaly_score'] = self.model.decision_function(features[FEATURE_COLUMNS].fillna(0).values)
+        self.events_max = max(self.events_max, features['events_per_user'].max(skipna=True) or 1)
+        risk = score_risk(features, self.events_max)[3]
+        return [
+            {'id': int(i), 'timestamp': str(ts), 'user': u, 'action': a, 'source_ip': ip,
+             'risk': int(round(r)), 'log': f"{u} {a} [{ip}]"}
+            for i, ts, u, a, ip, r in zip(batch['id'], features['timestamp'], features['user'].fillna(''),
+                                          features['action'].fillna(''), features['source_ip'].fillna(''),
+                                          np.nan_to_num(np.asarray(risk, dtype=float)))
+        ]
+
+class ClientQueue:
+    """Bounded per-client buffer; the producer never waits on a slow client.
+
+    On overflow ``drop_oldest`` keeps the newest events, ``drop_newest``
+    keeps what is queued, and ``highest_risk`` (formerly ``coalesce``) keeps
+    the ``maxsize`` highest-risk events, in arrival order, and drops the
+    rest. The count of discarded events rides on the next frame.
+    """
+
+    def __init__(self, maxsize=1000, policy='drop_oldest'):
+        policy = POLICY_ALIASES.get(policy, policy)
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}, expected one of {POLICIES}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.events = deque()
+        self.dropped = 0
+        self.ready = asyncio.Event()
+
+    def offer(self, events):
+        self.events.extend(events)
+        overflow = len(self.events) - self.maxsize
+        if overflow > 0:
+            self.dropped += overflow
+            if self.policy == 'drop_oldest':
+                for _ in range(overflow):
+                    self.events.popleft()
+            elif self.policy == 'drop_newest':
+                for _ in range(overflow):
+                    self.events.pop()
+            else:
+                keep = heapq.nlargest(self.maxsize, enumerate(self.events), key=lambda item: item[1]['risk'])
+                self.events = deque(event for _, event in sorted(keep, key=lambda item: item[0]))
+        if self.events:
+            self.ready.set()
+
+    async def next_frame(self, max_events=500):
+        """Wait for events, then drain up to ``max_events`` into one frame."""
+        await self.ready.wait()
+        n = min(max_events, len(self.events))
+        frame = {'events': [self.events.popleft() for _ in range(n)], 'dropped': self.dropped}
+        self.dropped = 0
+        if not self.events:
+            self.ready.clear()
+        return frame
+
+class LiveTail:
+    """One shared producer polling a source and fanning scored events out to clients."""
+
+    def __init__(self, source, scorer=None, poll_interval=0.25, batch_size=5000):
+        self.source = source
+        self.scorer = scorer
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.clients = set()
+        self.task = None
+        self.polling = None  # in-flight poll; outlives a cancelled producer so the next one picks it up
+
+    def subscribe(self, maxsize=1000, policy='drop_oldest'):
+        client = ClientQueue(maxsize, policy)
+        self.clients.add(client)
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+        return client
+
+    def unsubscribe(self, client):
+        self.clients.discard(client)
+        if not self.clients and self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def _poll_and_score(self):
+        batch = self.source.poll(self.batch_size)
+        if batch.empty:
+            return []
+        if self.scorer is None:
+            self.scorer = LiveScorer()
+        return self.scorer.score(batch)
+
+    async def _poll(self):
+        """Poll and score in a worker thread, one poll at a time.
+
+        Cancelling the producer does not stop its thread, so a poll left
+        running (or unread) by a cancelled producer is awaited and its events
+        used by the next one, instead of a second thread reading the source.
+        """
+        if self.polling is None:
+            self.polling = asyncio.ensure_future(asyncio.to_thread(self._poll_and_score))
+        await asyncio.wait({self.polling})  # unlike awaiting it directly, cancellation leaves the poll running
+        polling, self.polling = self.polling, None
+        return polling.result()
+
+    async def run(self):
+        while self.clients:
+            try:
+                events = await self._poll()
+            except Exception as e:
+                print(f"Live tail poll failed: {e}")
+                events = []
+            for client in list(self.clients):
+                client.offer(events)
+            if len(events) < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
@@ -1,34 +1,122 @@
 import yaml
 import pandas as pd
+import numpy as np
+import argparse
+import hashlib
+import os
+import sys
 from collections import Counter
 
-# Load MITRE config
-with open('docs/mitre_mapping.yml', 'r') as f:
-    mitre_map = yaml.safe_load(f)
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
 
-# Load data
-df = pd.read_csv('features/explainable_risk_assessment.csv')
+from backend.events import categorical
+
+MITRE_MAP_PATH = 'docs/mitre_mapping.yml'
+UNKNOWN_TAG = 'Unknown'
+REPEAT_MIN_HIGH = 3        # HIGH-risk events of one action that make it a repeat offender
+REPEAT_BOOST = 1.2
+
+def load_mitre_map(path=MITRE_MAP_PATH):
+    """M10: action -> MITRE technique mapping from the YAML config."""
+    with open(path, 'r') as f:
+        return yaml.safe_load(f) or {}
+
+def _entry_tag(entry):
+    """Tag text for one mapping value: a string, or {id/technique, name} for technique-level entries."""
+    if isinstance(entry, dict):
+        parts = [entry.get('id') or entry.get('technique'), entry.get('name')]
+        return ' - '.join(str(part) for part in parts if part) or UNKNOWN_TAG
+    return UNKNOWN_TAG if entry is None else str(entry)
+
+class MitreMap:
+    """M10: compiled action -> tag lookup.
+
+    Actions are held in a hash index and tags in an array with a trailing
+    'Unknown', so tagging a column factorizes it once and looks up only its
+    distinct actions; the size of the mapping does not affect per-row cost.
+    """
+
+    def __init__(self, mapping):
+        self.actions = pd.Index(list(mapping), dtype=object)
+        self.tags = np.array([_entry_tag(entry) for entry in mapping.values()] + [UNKNOWN_TAG], dtype=object)
+
+    def __len__(self):
+        return len(self.actions)
+
+    def __str__(self):
+        # Content fingerprint (used in pipeline cache keys)
+        digest = hashlib.sha256('\n'.join(f"{a}\t{t}" for a, t in zip(self.actions, self.tags)).encode())
+        return f"MitreMap({digest.hexdigest()[:12]}, {len(self)} actions)"
+
+    def tags_for(self, actions):
+        """Tags for a sequence of distinct actions ('Unknown' when unmapped)."""
+        return self.tags[self.actions.get_indexer(pd.Index(actions, dtype=object))]  # -1 -> trailing Unknown
+
+_mitre_maps = {}  # path -> ((mtime, size), MitreMap), filled on first use
+
+def get_mitre_map(path=MITRE_MAP_PATH):
+    """Compiled MitreMap for ``path``, built on first use and rebuilt when the file changes."""
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _mitre_maps.get(path)
+    if cached is None or cached[0] != stamp:
+        cached = _mitre_maps[path] = (stamp, MitreMap(load_mitre_map(path)))
+    return cached[1]
+
+def repeat_patterns(df):
+    """Counts of each action among HIGH-risk events."""
+    return Counter(df[df['risk_level']=='HIGH']['action'])
+
+def apply_mitre_enhanced(df, mapping=None):
+    """M10: Enhanced MITRE + cross-case pattern boost (returns a new frame).
+
+    One grouped pass: actions are factorized, HIGH-risk events counted per
+    action, and the repeat multiplier and tag are built per action and
+    broadcast back by code. ``mapping`` is a MitreMap or a plain dict.
+    """
+    mapping = get_mitre_map() if mapping is None else mapping
+    if not isinstance(mapping, MitreMap):
+        mapping = MitreMap(mapping)
+    df = df.copy(deep=False)  # new columns only; the input's are shared
+    codes, actions = pd.factorize(df['action'])
+    tags = mapping.tags_for(actions)
 
-def apply_mitre_enhanced(df):
-    """M10: Enhanced MITRE + cross-case pattern boost."""
-    # Apply mapping
-    df['mitre_tag'] = df['action'].map(mitre_map).fillna('Unknown')
-    
     # Cross-case: Boost repeats
-    pattern_counts = Counter(df[df['risk_level']=='HIGH']['action'])
-    for action, count in pattern_counts.items():
-        if count > 2:  # Repeat offender
-            df.loc[df['action']==action, 'final_risk_score'] *= 1.2
-            df['mitre_tag'] = df['mitre_tag'].where(df['action']!=action, f"{mitre_map.get(action, 'Unknown')} (Repeat x{count})")
-    
+    high = (df['risk_level'] == 'HIGH').to_numpy() & (codes >= 0)
+    counts = np.bincount(codes[high], minlength=len(actions))
+    repeats = np.flatnonzero(counts >= REPEAT_MIN_HIGH)
+    if len(repeats):
+        boost = np.ones(len(actions) + 1)
+        boost[repeats] = REPEAT_BOOST
+        df['final_risk_score'] = df['final_risk_score'].to_numpy(dtype=float) * boost[codes]  # code -1 -> 1.0
+        tags = tags.copy()
+        for i in repeats:
+            tags[i] = f"{tags[i]} (Repeat x{counts[i]})"
+    df['mitre_tag'] = categorical(codes, np.append(tags, UNKNOWN_TAG), index=df.index)
+
     df['risk_level'] = pd.cut(df['final_risk_score'], bins=[0,30,70,100], labels=['LOW','MEDIUM','HIGH'])
-    df.to_csv('features/m10_mitre_adaptive.csv', index=False)
+    return df
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="M10: MITRE mapping + repeat-pattern boost")
+    parser.add_argument('--input', default='features/explainable_risk_assessment.csv')
+    parser.add_argument('--output', default='features/m10_mitre_adaptive.csv')
+    parser.add_argument('--mitre-map', default=MITRE_MAP_PATH)
+    args = parser.parse_args(argv)
+
+    # Load data
+    df = pd.read_csv(args.input)
+    pattern_counts = repeat_patterns(df)
+    df = apply_mitre_enhanced(df, get_mitre_map(args.mitre_map))
+    df.to_csv(args.output, index=False)
     
     print("=== M10 MITRE & ADAPTIVE ===")
     print("Pattern boosts:", dict(pattern_counts))
     print(df.nlargest(5, 'final_risk_score')[['user','action','final_risk_score','mitre_tag']])
-    print("Saved m10_mitre_adaptive.csv")
+    print(f"Saved {args.output}")
     print("M10 ADAPTIVE LEARNING ✅")
 
 if __name__ == "__main__":
-    apply_mitre_enhanced(df)
+    main()
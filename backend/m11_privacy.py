@@ -1,37 +1,147 @@
 import pandas as pd
+import argparse
 import hashlib
-from datetime import datetime
-
-df = pd.read_csv('features/m10_mitre_adaptive.csv')
-
-def mask_pii(df):
-    """M11: Hash sensitive data before ML/training."""
-    df_anonym = df.copy()
-    # Hash PII
-    df_anonym['user_hash'] = df_anonym['user'].apply(lambda x: hashlib.sha256(str(x).encode()).hexdigest()[:8])
-    df_anonym['source_ip_hash'] = df_anonym['action'].apply(lambda x: hashlib.sha256(str(x).encode()).hexdigest()[:8])  # Simulate IP
-    # Drop originals
-    df_anonym.drop(['user'], axis=1, inplace=True)
-    df_anonym.rename(columns={'user_hash': 'user'}, inplace=True)
-    df_anonym.to_csv('features/m11_anonymized.csv', index=False)
+import hmac
+import os
+import secrets
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from backend.audit import AUDIT_LOG_PATH, get_audit_log
+from backend.events import categorical
+
+# Columns pseudonymized by default; others can be passed per call
+PII_COLUMNS = ['user', 'source_ip']
+# HMAC secret: PII_HMAC_KEY (hex) if set, else a key file created on first use
+PII_KEY_ENV = 'PII_HMAC_KEY'
+PII_KEY_PATH = 'data/pii_hmac.key'
+TOKEN_LENGTH = 16          # hex chars (64 bits) per pseudonym
+PARALLEL_MIN_UNIQUES = 200_000
+CACHE_MAX_ENTRIES = 1_000_000
+
+def load_secret(path=PII_KEY_PATH):
+    """Stable HMAC key, so a value maps to the same pseudonym across runs."""
+    if os.environ.get(PII_KEY_ENV):
+        return bytes.fromhex(os.environ[PII_KEY_ENV])
+    if not os.path.exists(path):
+        key_dir = os.path.dirname(path)
+        if key_dir:
+            os.makedirs(key_dir, exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            f.write(secrets.token_hex(32))
+    with open(path) as f:
+        return bytes.fromhex(f.read().strip())
+
+class Pseudonymizer:
+    """M11: Keyed (HMAC-SHA256) pseudonyms, computed once per distinct value.
+
+    Columns are factorized, only uniques not already in the cache are
+    hashed (in a thread pool when there are many), and tokens are mapped
+    back by code, so cost is bounded by distinct values rather than rows.
+    Missing values stay missing. Safe to share between threads: lookups
+    read one cache dict, and the cache is swapped, not cleared, when full.
+    """
+
+    def __init__(self, key=None, length=TOKEN_LENGTH, workers=None, cache_max=CACHE_MAX_ENTRIES):
+        self.key = load_secret() if key is None else key
+        self.length = length
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_max = cache_max
+        self.cache = {}
+        self.lock = threading.Lock()  # serializes cache updates
+
+    def __str__(self):
+        # Identifies the key without revealing it (used in pipeline cache keys)
+        fingerprint = hashlib.sha256(b'pseudonymizer:' + self.key).hexdigest()[:12]
+        return f"Pseudonymizer({fingerprint}, length={self.length})"
+
+    def _hash(self, values):
+        key, length = self.key, self.length
+        return [hmac.digest(key, str(value).encode(), 'sha256').hex()[:length] for value in values]
+
+    def _hash_many(self, values):
+        if len(values) < PARALLEL_MIN_UNIQUES or self.workers < 2:
+            return self._hash(values)
+        step = -(-len(values) // self.workers)
+        with ThreadPoolExecutor(self.workers) as pool:
+            parts = pool.map(self._hash, [values[i:i + step] for i in range(0, len(values), step)])
+        return [token for part in parts for token in part]
+
+    def tokens(self, uniques):
+        """Pseudonyms for a sequence of distinct values.
+
+        The cache is keyed by the text that is hashed, so values that compare
+        equal but print differently (1, 1.0, True) never share an entry.
+        """
+        cache = self.cache
+        texts = [str(value) for value in uniques]
+        tokens = [cache.get(text) for text in texts]
+        missing = list(dict.fromkeys(text for text, token in zip(texts, tokens) if token is None))
+        if not missing:
+            return tokens
+        hashed = dict(zip(missing, self._hash_many(missing)))
+        with self.lock:
+            if len(self.cache) + len(hashed) > self.cache_max:
+                self.cache = {}
+            self.cache.update(hashed)
+        return [hashed[text] if token is None else token for text, token in zip(texts, tokens)]
+
+    def mask(self, series):
+        """Categorical of each value's pseudonym (missing values stay missing)."""
+        codes, uniques = pd.factorize(series)
+        tokens = self.tokens(uniques.tolist()) + [None]  # code -1 -> missing
+        return categorical(codes, tokens, index=series.index, name=series.name)
+
+_pseudonymizers = {}  # key path -> Pseudonymizer, created on first use
+
+def get_pseudonymizer(path=PII_KEY_PATH):
+    """Shared Pseudonymizer for the configured secret (keeps its cache warm)."""
+    if path not in _pseudonymizers:
+        _pseudonymizers[path] = Pseudonymizer(load_secret(path))
+    return _pseudonymizers[path]
+
+def mask_pii(df, columns=PII_COLUMNS, pseudonymizer=None):
+    """M11: Pseudonymize PII columns before ML/training (returns a new frame)."""
+    pseudonymizer = get_pseudonymizer() if pseudonymizer is None else pseudonymizer
+    df_anonym = df.copy(deep=False)  # masked columns are replaced, the rest shared
+    for col in columns:
+        if col in df_anonym:
+            df_anonym[col] = pseudonymizer.mask(df_anonym[col])
     return df_anonym
 
-def audit_access(user_role, query):
-    """Log investigator actions."""
-    with open('docs/audit_log.txt', 'a') as f:
-        f.write(f"{datetime.now()}: {user_role} executed '{query}'\n")
-
-# M11 Demo
-print("=== M11 PRIVACY COMPLIANCE ===")
-anon_df = mask_pii(df)
-print("Sample anonymized:")
-print(anon_df[['user', 'action', 'final_risk_score']].head())
-print("\nAudit example:")
-audit_access("investigator", "view high risk")
-with open('docs/audit_log.txt') as f:
-    print(f.read())
-print("Saved m11_anonymized.csv & audit_log.txt")
-print("M11 PRIVACY ✅")
+def audit_access(user_role, query, path=AUDIT_LOG_PATH):
+    """Log investigator actions (queued to the background audit writer)."""
+    get_audit_log(path).record(user_role, 'query', query=query)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="M11: mask PII and demo the audit log")
+    parser.add_argument('--input', default='features/m10_mitre_adaptive.csv')
+    parser.add_argument('--output', default='features/m11_anonymized.csv')
+    parser.add_argument('--columns', nargs='+', default=PII_COLUMNS, help='PII columns to pseudonymize')
+    parser.add_argument('--key-file', default=PII_KEY_PATH)
+    parser.add_argument('--audit-log', default=AUDIT_LOG_PATH)
+    args = parser.parse_args(argv)
+
+    # M11 Demo
+    df = pd.read_csv(args.input)
+    print("=== M11 PRIVACY COMPLIANCE ===")
+    anon_df = mask_pii(df, args.columns, get_pseudonymizer(args.key_file))
+    anon_df.to_csv(args.output, index=False)
+    print("Sample anonymized:")
+    print(anon_df[['user', 'action', 'final_risk_score']].head())
+    print("\nAudit example:")
+    audit_access("investigator", "view high risk", args.audit_log)
+    get_audit_log(args.audit_log).flush()
+    with open(args.audit_log) as f:
+        print(f.readlines()[-1].rstrip())
+    print(f"Saved {args.output} & {args.audit_log}")
+    print("M11 PRIVACY ✅")
 
 if __name__ == "__main__":
-    pass
+    main()
@@ -1,44 +1,252 @@
 import pandas as pd
+import numpy as np
+import argparse
+import html
+import json
+import os
+import sys
 from datetime import datetime
 
-df = pd.read_csv('features/m11_anonymized.csv')
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
 
-html_report = f"""
-<!DOCTYPE html>
+from backend.metrics import timed
+
+REPORT_COLUMNS = ['user', 'action', 'final_risk_score', 'risk_level', 'mitre_tag', 'explanation']
+SUMMARY_KEYS = {'by_user': 'user', 'by_mitre': 'mitre_tag'}
+PAGE_SIZE = 1000           # incident rows per rendered page / chunk
+TOP_N = 5
+FORMATS = {'html': 'text/html', 'json': 'application/json', 'ndjson': 'application/x-ndjson'}
+
+HTML_HEAD = """<!DOCTYPE html>
 <html>
-<head><title>AI Log Forensics Report</title><meta charset="UTF-8"></head>
+<head><title>AI Log Forensics Report</title><meta charset="UTF-8">
+<style>table{border-collapse:collapse}th,td{padding:4px 8px;border-bottom:1px solid #ddd;text-align:left}</style></head>
 <body>
 <h1>AI-Driven Cyber Incident Report</h1>
-<p><b>Generated:</b> {datetime.now().strftime('%Y-%m-%d %H:%M IST')}</p>
-<h2>Executive Summary</h2>
-<p>{len(df[df['risk_level']=='HIGH'])} HIGH-risk incidents detected (anonymized).</p>
-<h2>Top 5 Threats</h2>
-{ df.nlargest(5,'final_risk_score')[['user','action','final_risk_score','mitre_tag','explanation']].to_html(classes='table') }
-<h2>MITRE Techniques</h2>
-<p>{df['mitre_tag'].value_counts().to_dict()}</p>
-<h2>Compliance Status</h2>
+"""
+HTML_COMPLIANCE = """<h2>Compliance Status</h2>
 <ul>
 <li>✅ PII hashed (DPDP/GDPR compliant)</li>
 <li>✅ Investigator audit logged</li>
 <li>✅ Adaptive MITRE mapping</li>
 </ul>
-<hr>
+"""
+HTML_TAIL = """<hr>
 <p><i>SaaS-ready: NL queries + auto-reports for SOC teams</i></p>
 </body>
 </html>
 """
 
-with open('reports/forensic_report.html', 'w', encoding='utf-8') as f:
-    f.write(html_report)
+def summarize(df):
+    """Per-user and per-MITRE summaries from one aggregation pass.
+
+    Rows are grouped once by (user, mitre_tag); both summaries are rolled up
+    from those pair totals, which are far fewer than the incidents.
+    Returns {'total', 'high', 'by_user', 'by_mitre'} (summaries as DataFrames).
+    """
+    keys = [col for col in SUMMARY_KEYS.values() if col in df]
+    high = (df['risk_level'] == 'HIGH').to_numpy() if 'risk_level' in df else np.zeros(len(df), dtype=bool)
+    summary = {'total': len(df), 'high': int(high.sum())}
+    if not keys or len(df) == 0:
+        return {**summary, **{name: None for name in SUMMARY_KEYS}}
+    rows = pd.DataFrame({**{col: df[col] for col in keys},
+                         'score': pd.to_numeric(df['final_risk_score'], errors='coerce'), 'high': high})
+    pairs = rows.groupby(keys, sort=False, observed=True, dropna=False).agg(
+        incidents=('high', 'size'), high=('high', 'sum'), scored=('score', 'count'),
+        total_risk=('score', 'sum'), max_risk=('score', 'max'))
+    for name, col in SUMMARY_KEYS.items():
+        if col not in keys:
+            summary[name] = None
+            continue
+        rolled = pairs.groupby(level=col, sort=False, observed=True, dropna=False).agg(
+            {'incidents': 'sum', 'high': 'sum', 'scored': 'sum', 'total_risk': 'sum', 'max_risk': 'max'})
+        rolled['mean_risk'] = (rolled['total_risk'] / rolled['scored']).round(1)
+        rolled = rolled.drop(columns=['scored', 'total_risk']).rename_axis(col).reset_index()
+        summary[name] = rolled.sort_values(['high', 'max_risk', 'incidents'], ascending=False, kind='stable',
+                                           ignore_index=True)
+    return summary
+
+def _cell_text(value):
+    if pd.isna(value):
+        return ''
+    if isinstance(value, (float, np.floating)):
+        return str(round(float(value), 2))
+    return str(value)
+
+def html_cells(series):
+    """(codes, escaped text per distinct value); text[codes] gives each row's cell."""
+    codes, uniques = pd.factorize(series)
+    text = [html.escape(_cell_text(value)) for value in uniques] + ['']
+    return codes, np.array(text, dtype=object)  # code -1 (missing) -> trailing ''
+
+def _table_head(columns):
+    return '<table>\n<tr>' + ''.join(f'<th>{html.escape(str(col))}</th>' for col in columns) + '</tr>\n'
+
+def _table_rows(cells):
+    """<tr> lines from per-column arrays of cell text (built column-wise, not per row)."""
+    if not cells or len(cells[0]) == 0:
+        return ''
+    rows = '<tr><td>' + cells[0]
+    for column in cells[1:]:
+        rows = rows + '</td><td>' + column
+    return ''.join(rows + '</td></tr>\n')
+
+def iter_html_table(frame, page_size=PAGE_SIZE):
+    """One <table> for a frame, yielded ``page_size`` rows at a time."""
+    columns = [html_cells(frame.iloc[:, i]) for i in range(len(frame.columns))]
+    yield _table_head(frame.columns)
+    for start in range(0, len(frame), page_size):
+        yield _table_rows([text[codes[start:start + page_size]] for codes, text in columns])
+    yield '</table>\n'
+
+def html_table(frame):
+    return ''.join(iter_html_table(frame, max(len(frame), 1)))
+
+class Report:
+    """M12: Report over the anonymized M11 incidents, rendered lazily in chunks.
+
+    html(), json() and ndjson() are generators: summaries come from one
+    aggregation pass (computed once and shared), then the full incident
+    table follows page by page, highest risk first. Writers and HTTP
+    responses consume the chunks, so only one page of the document is
+    held in memory at a time.
+    """
+
+    def __init__(self, df, generated=None, page_size=PAGE_SIZE, top_n=TOP_N):
+        self.df = df
+        self.generated = datetime.now() if generated is None else generated
+        self.page_size = page_size
+        self.top_n = top_n
+        self._summary = None
+        self._order = None
+        self._cells = None
+
+    def __iter__(self):
+        return self.html()
+
+    def __str__(self):
+        return ''.join(self.html())
+
+    @property
+    def columns(self):
+        return [col for col in REPORT_COLUMNS if col in self.df]
+
+    def summary(self):
+        if self._summary is None:
+            self._summary = summarize(self.df)
+        return self._summary
+
+    def order(self):
+        """Row positions by final_risk_score descending (missing scores last)."""
+        if self._order is None:
+            score = pd.to_numeric(self.df['final_risk_score'], errors='coerce').to_numpy(dtype=float)
+            self._order = np.argsort(-np.nan_to_num(score, nan=-np.inf), kind='stable')
+        return self._order
+
+    def pages(self):
+        """Incident rows in pages of ``page_size``, highest risk first."""
+        order, columns = self.order(), self.columns
+        for start in range(0, len(self.df), self.page_size):
+            yield self.df.iloc[order[start:start + self.page_size]][columns]
+
+    def html_pages(self):
+        """HTML tables for pages(); each column is formatted once per distinct value, not per page."""
+        if self._cells is None:
+            self._cells = [(codes[self.order()], text) for codes, text in
+                           (html_cells(self.df[col]) for col in self.columns)]
+        for start in range(0, len(self.df), self.page_size):
+            yield _table_head(self.columns) + _table_rows([text[codes[start:start + self.page_size]]
+                                                            for codes, text in self._cells]) + '</table>\n'
+
+    def top(self):
+        for page in self.pages():
+            return page.head(self.top_n)
+        return self.df[self.columns]
+
+    def chunks(self, fmt='html'):
+        """Chunk generator for one of FORMATS."""
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown report format {fmt!r} (expected one of {sorted(FORMATS)})")
+        return getattr(self, fmt)()
+
+    def html(self):
+        summary = self.summary()
+        yield HTML_HEAD
+        yield f"<p><b>Generated:</b> {self.generated.strftime('%Y-%m-%d %H:%M IST')}</p>\n"
+        yield "<h2>Executive Summary</h2>\n"
+        yield f"<p>{summary['high']} HIGH-risk incidents detected (anonymized) out of {summary['total']}.</p>\n"
+        yield f"<h2>Top {self.top_n} Threats</h2>\n" + html_table(self.top())
+        for name, title in (('by_mitre', 'MITRE Techniques'), ('by_user', 'Users')):
+            if summary[name] is not None:
+                yield f"<h2>{title}</h2>\n"
+                yield from iter_html_table(summary[name], self.page_size)
+        yield HTML_COMPLIANCE
+        n_pages = -(-len(self.df) // self.page_size)
+        yield f"<h2>All Incidents</h2>\n<p>{len(self.df)} incidents in {n_pages} pages of {self.page_size}, highest risk first.</p>\n"
+        for number, table in enumerate(self.html_pages(), 1):
+            yield f'<h3 id="page-{number}">Page {number} of {n_pages}</h3>\n' + table
+        yield HTML_TAIL
+
+    def json(self):
+        """One JSON document: summaries first, then the incidents array streamed page by page."""
+        summary = self.summary()
+        yield '{' + f'"generated":{json.dumps(self.generated.isoformat())},'
+        yield f'"total":{summary["total"]},"high":{summary["high"]},'
+        yield f'"top":{self.top().to_json(orient="records")},'
+        for name in SUMMARY_KEYS:
+            table = summary[name]
+            yield f'"{name}":{"null" if table is None else table.to_json(orient="records")},'
+        yield '"incidents":['
+        for i, page in enumerate(self.pages()):
+            yield (',' if i else '') + page.to_json(orient='records')[1:-1]
+        yield ']}\n'
+
+    def ndjson(self):
+        """One JSON object per incident line, highest risk first."""
+        for page in self.pages():
+            yield page.to_json(orient='records', lines=True).rstrip('\n') + '\n'
+
+def render_report(df, generated=None, page_size=PAGE_SIZE):
+    """M12: Report for the anonymized M11 results (rendered when iterated or written)."""
+    return Report(df, generated, page_size)
+
+def write_report(report, path='reports/forensic_report.html', fmt='html'):
+    """Write a Report (streamed chunk by chunk), an iterable of chunks or a string."""
+    report_dir = os.path.dirname(path)
+    if report_dir:
+        os.makedirs(report_dir, exist_ok=True)
+    chunks = report.chunks(fmt) if isinstance(report, Report) else [report] if isinstance(report, str) else report
+    with timed('report', rows=len(report.df) if isinstance(report, Report) else None), \
+            open(path, 'w', encoding='utf-8') as f:
+        for chunk in chunks:
+            f.write(chunk)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="M12: forensic report (HTML, JSON, NDJSON) from M11 results")
+    parser.add_argument('--input', default='features/m11_anonymized.csv')
+    parser.add_argument('--output', default='reports/forensic_report.html')
+    parser.add_argument('--json', default=None, help='also write the JSON report here')
+    parser.add_argument('--ndjson', default=None, help='also write one incident per line here')
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE)
+    args = parser.parse_args(argv)
+
+    df = pd.read_csv(args.input)
+    report = render_report(df, page_size=args.page_size)
+    write_report(report, args.output)
+    for fmt in ('json', 'ndjson'):
+        if getattr(args, fmt):
+            write_report(report, getattr(args, fmt), fmt)
 
-print("=== M12 REPORTS & COMMERCIALIZATION ===")
-print("Generated reports/forensic_report.html (UTF-8)")
-print("-"*50)
-print("DEMO: Open reports/forensic_report.html in browser")
-print("-"*50)
-print("SaaS Value: FastAPI deployment ($29/mo) - NL forensics for SOC/DFIR teams")
-print("FULL FRAMEWORK: M0-M12 COMPLETE ✅")
-print("GitHub commits track every AI layer!")
+    print("=== M12 REPORTS & COMMERCIALIZATION ===")
+    print(f"Generated {args.output} (UTF-8)")
+    print("-"*50)
+    print(f"DEMO: Open {args.output} in browser")
+    print("-"*50)
+    print("SaaS Value: FastAPI deployment ($29/mo) - NL forensics for SOC/DFIR teams")
+    print("FULL FRAMEWORK: M0-M12 COMPLETE ✅")
+    print("GitHub commits track every AI layer!")
 
 if __name__ == "__main__":
-    pass
+    main()
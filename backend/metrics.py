@@ -0,0 +1,370 @@
+import bisect
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter as Tally
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# Seconds; spans sub-millisecond live-tail batches up to multi-minute pipeline runs
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+PROFILE_INTERVAL = 0.01
+PROFILE_MAX_DEPTH = 64
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels_text(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    """One metric family: label values -> value, rendered in Prometheus text format."""
+
+    kind = 'untyped'
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.labels) or any(name not in labels for name in self.labels):
+            raise ValueError(f"{self.name} takes labels {list(self.labels)}, got {sorted(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def samples(self):
+        """(suffix, label text, value) for every series."""
+        with self.lock:
+            items = list(self.values.items())
+        for key, value in sorted(items):
+            yield '', _labels_text(self.labels, key), value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {_escape(self.help)}', f'# TYPE {self.name} {self.kind}']
+        lines += [f'{self.name}{suffix}{labels} {_number(value)}' for suffix, labels, value in self.samples()]
+        return '\n'.join(lines)
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self.values.get(self._key(labels), 0)
+
+class Gauge(Metric):
+    """Set/inc gauge; with ``fn`` the (unlabelled) value is read when rendered instead."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, help, labels=(), fn=None):
+        super().__init__(name, help, labels)
+        self.fn = fn
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        if self.fn is None:
+            yield from super().samples()
+        else:
+            yield '', '', self.fn()
+
+class Histogram(Metric):
+    """Cumulative-bucket histogram; per series: [count per bucket..., +Inf count, sum]."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            counts = self.values.get(key)
+            if counts is None:
+                counts = self.values[key] = [0] * (len(self.buckets) + 2)
+            counts[slot] += 1
+            counts[-1] += value
+
+    def count(self, **labels):
+        counts = self.values.get(self._key(labels))
+        return sum(counts[:-1]) if counts else 0
+
+    def samples(self):
+        with self.lock:
+            items = [(key, list(counts)) for key, counts in self.values.items()]
+        for key, counts in sorted(items):
+            total = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts[:-1]):
+                total += count
+                yield '_bucket', _labels_text(self.labels, key, f'le="{_number(bound)}"'), total
+            labels = _labels_text(self.labels, key)
+            yield '_sum', labels, counts[-1]
+            yield '_count', labels, total
+
+class Registry:
+    """Named metrics; asking for an existing name returns it, so modules imported twice share series."""
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _get(self, cls, name, help, labels, **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, help, labels, **kwargs)
+            elif type(metric) is not cls or metric.labels != tuple(labels):
+                raise ValueError(f"Metric {name!r} already registered as {metric.kind} {list(metric.labels)}")
+            return metric
+
+    def counter(self, name, help, labels=()):
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name, help, labels=(), fn=None):
+        return self._get(Gauge, name, help, labels, fn=fn)
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help, labels, buckets=buckets)
+
+    def render(self):
+        """Every metric in Prometheus text exposition format."""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram('forensics_stage_seconds', 'Wall time of instrumented stage calls', ['stage'])
+STAGE_ROWS = REGISTRY.counter('forensics_stage_rows_total', 'Rows processed by instrumented stages', ['stage'])
+STAGE_ERRORS = REGISTRY.counter('forensics_stage_errors_total', 'Instrumented stage calls that raised', ['stage'])
+HTTP_SECONDS = REGISTRY.histogram('forensics_http_request_seconds', 'HTTP request latency by route template',
+                                  ['method', 'route'])
+HTTP_REQUESTS = REGISTRY.counter('forensics_http_requests_total', 'HTTP responses by route template and status',
+                                 ['method', 'route', 'status'])
+HTTP_IN_PROGRESS = REGISTRY.gauge('forensics_http_requests_in_progress', 'HTTP requests being served')
+
+def record_stage(stage, seconds, rows=None, failed=False):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    if rows:
+        STAGE_ROWS.inc(rows, stage=stage)
+    if failed:
+        STAGE_ERRORS.inc(stage=stage)
+
+def _rows(value):
+    shape = getattr(value, 'shape', None)
+    return int(shape[0]) if shape else None
+
+class StageTimer:
+    """Times one stage; see timed()."""
+
+    def __init__(self, stage, rows=None):
+        self.stage = stage
+        self.rows = rows
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record_stage(self.stage, time.perf_counter() - self.start, self.rows, failed=exc_type is not None)
+        return False
+
+    def __call__(self, fn):
+        stage, rows = self.stage, self.rows
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                record_stage(stage, time.perf_counter() - start, failed=True)
+                raise
+            if rows is not None:
+                count = rows(result)
+            else:
+                count = _rows(result)
+                if count is None and args:
+                    count = _rows(args[0])
+            record_stage(stage, time.perf_counter() - start, count)
+            return result
+        return wrapper
+
+def timed(stage, rows=None):
+    """Record a stage's wall time, rows and failures in forensics_stage_*.
+
+    As a decorator, rows default to the length of the returned frame/array,
+    else of the first argument; ``rows(result)`` overrides that. As a
+    context manager, set ``.rows`` on the yielded timer.
+    """
+    return StageTimer(stage, rows)
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request, labelled by route template (not raw path).
+
+    Requests served by a mounted app are labelled with the mount prefix.
+    Streaming responses are timed until their last chunk is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        status = ['500']
+        root_path = scope.get('root_path', '')
+
+        async def send_status(message):
+            if message['type'] == 'http.response.start':
+                status[0] = str(message['status'])
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            seconds = time.perf_counter() - start
+            HTTP_IN_PROGRESS.dec()
+            route = getattr(scope.get('route'), 'path', None)
+            if route is None:
+                mount = scope.get('root_path', '')
+                route = mount[len(root_path):] if mount != root_path else 'unmatched'
+            HTTP_SECONDS.observe(seconds, method=scope['method'], route=route)
+            HTTP_REQUESTS.inc(method=scope['method'], route=route, status=status[0])
+
+def _frame_label(code, cache={}):
+    label = cache.get(code)
+    if label is None:
+        name = getattr(code, 'co_qualname', code.co_name)
+        label = cache[code] = f"{os.path.basename(code.co_filename)}:{name}"
+    return label
+
+class SamplingProfiler:
+    """Statistical wall-clock profiler that can be started and stopped at runtime.
+
+    While running, a daemon thread snapshots every other thread's stack each
+    ``interval`` seconds and counts identical stacks, so the cost is paid by
+    the sampler rather than the code being profiled, and nothing is hooked
+    when it is stopped. ``duration`` stops it automatically. Results are
+    folded stacks (flamegraph.pl / speedscope input) or a top-N table.
+    """
+
+    def __init__(self, interval=PROFILE_INTERVAL, max_depth=PROFILE_MAX_DEPTH):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = Tally()  # 'outer;...;leaf' -> samples
+        self.samples = 0
+        self.started_at = None
+        self.stopped_at = None
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, interval=None, duration=None, reset=True):
+        """Start sampling (no-op if already running); returns True if it started."""
+        with self.lock:
+            if self.running:
+                return False
+            if reset:
+                self.stacks = Tally()
+                self.samples = 0
+            self.interval = interval or self.interval
+            self.started_at, self.stopped_at = time.time(), None
+            self.stop_event = threading.Event()
+            deadline = time.monotonic() + duration if duration else None
+            self.thread = threading.Thread(target=self._run, args=(self.stop_event, deadline),
+                                           name='sampling-profiler', daemon=True)
+            self.thread.start()
+            return True
+
+    def stop(self):
+        """Stop sampling; returns True if it was running."""
+        thread = self.thread
+        if thread is None:
+            return False
+        self.stop_event.set()
+        if thread is not threading.current_thread():
+            thread.join()
+        return True
+
+    def _stack(self, frame):
+        labels = []
+        while frame is not None and len(labels) < self.max_depth:
+            labels.append(_frame_label(frame.f_code))
+            frame = frame.f_back
+        return ';'.join(reversed(labels))
+
+    def _run(self, stop_event, deadline):
+        me = threading.get_ident()
+        while not stop_event.wait(self.interval):
+            stacks = [self._stack(frame) for ident, frame in sys._current_frames().items() if ident != me]
+            with self.lock:
+                self.stacks.update(stacks)
+                self.samples += 1
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+        self.stopped_at = time.time()
+
+    def folded(self):
+        """One 'frame;frame;... count' line per distinct stack, most sampled first."""
+        with self.lock:
+            return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+    def top(self, n=20):
+        """Functions by samples on top of the stack (self) and anywhere on it (total)."""
+        own, total = Tally(), Tally()
+        with self.lock:
+            stacks = list(self.stacks.items())
+        for stack, count in stacks:
+            frames = stack.split(';')
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        return [{'function': name, 'self': count, 'total': total[name]} for name, count in own.most_common(n)]
+
+    def status(self):
+        return {'running': self.running, 'interval': self.interval, 'samples': self.samples,
+                'stacks': len(self.stacks), 'started_at': self.started_at, 'stopped_at': self.stopped_at}
+
+profiler = SamplingProfiler(float(os.environ.get('PROFILE_INTERVAL', PROFILE_INTERVAL)))
+
+REGISTRY.gauge('forensics_profiler_running', 'Whether the sampling profiler is running',
+               fn=lambda: int(profiler.running))
+REGISTRY.gauge('forensics_profiler_samples', 'Samples taken by the current/last profiling session',
+               fn=lambda: profiler.samples)
@@ -5,35 +5,48 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from sklearn.ensemble import IsolationForest
-import joblib
-from features import engineer_features
+from features import engineer_features, FEATURE_COLUMNS
 from ingestion import get_timeline
+from models.registry import save_model, find_model, feature_schema_hash, scoring_context
+from models.batch_scoring import score_matrix, labels_from_scores
 
-def train_baseline_model():
-    timeline = get_timeline()
+def fit_isolation_forest(X, n_jobs=None):
+    """Baseline IsolationForest configuration shared by M4 and M5."""
+    model = IsolationForest(contamination=0.1, random_state=42, n_jobs=n_jobs)
+    return model.fit(X)
+
+def train_baseline_model(timeline=None, n_jobs=None):
+    timeline = get_timeline() if timeline is None else timeline
     features_df = engineer_features(timeline)
     
-    feature_cols = ['login_hour', 'events_per_user', 'failed_logins', 
-                   'is_suspicious_action', 'ip_change']
-    X = features_df[feature_cols].values
+    X = features_df[FEATURE_COLUMNS].values
+    model = fit_isolation_forest(X, n_jobs=n_jobs)
     
-    model = IsolationForest(contamination=0.1, random_state=42)
-    model.fit(X)
-    
-    joblib.dump(model, "models/baseline_isolation_forest.pkl")
+    save_model(model, FEATURE_COLUMNS, features_df)
     print("M4: Trained Isolation Forest baseline")
     print(f"Features shape: {X.shape}")
     return model
 
-def score_anomalies(model, features_df):
-    """Score new data for anomalies."""
-    feature_cols = ['login_hour', 'events_per_user', 'failed_logins', 
-                   'is_suspicious_action', 'ip_change']
-    X = features_df[feature_cols].values
-    anomaly_scores = model.decision_function(X)
-    anomaly_labels = model.predict(X)  # -1 = anomaly, 1 = normal
+def score_anomalies(model, features_df, n_jobs=None, n_workers=1):
+    """Score new data for anomalies.
+
+    ``model=None`` scores with the latest registered model (memory-mapped)
+    instead of training. Scores are computed once and labels derived from
+    them; ``n_workers`` > 1 shards large matrices across a process pool and
+    ``n_jobs`` parallelizes across trees within each process.
+    """
+    if model is None:
+        # Only the path is needed; score_matrix memory-maps the model itself
+        meta = find_model(FEATURE_COLUMNS)
+        if meta is None:
+            raise FileNotFoundError(f"No registered model for schema {feature_schema_hash(FEATURE_COLUMNS)}")
+        model = meta['path']
+    X = features_df[FEATURE_COLUMNS].values
+    with scoring_context(n_jobs):
+        anomaly_scores = score_matrix(model, X, n_workers=n_workers)
+    anomaly_labels = labels_from_scores(anomaly_scores)  # -1 = anomaly, 1 = normal
     
-    results = features_df.copy()
+    results = features_df.copy(deep=False)  # new columns only; the input's are shared
     results['anomaly_score'] = anomaly_scores
     results['is_anomaly'] = anomaly_labels
     
@@ -0,0 +1,100 @@
+import numpy as np
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import joblib
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from backend.metrics import timed
+
+DEFAULT_CHUNK_ROWS = 250_000
+
+# Worker-side globals, set once per process by _init_worker
+_worker = {}
+
+def labels_from_scores(scores):
+    """IsolationForest.predict from decision_function output, without a second pass."""
+    labels = np.ones(len(scores), dtype=int)  # 1 = normal
+    labels[scores < 0] = -1  # -1 = anomaly
+    return labels
+
+def _init_worker(model_path, x_name, out_name, shape):
+    x_shm = shared_memory.SharedMemory(name=x_name)
+    out_shm = shared_memory.SharedMemory(name=out_name)
+    _worker['shm'] = (x_shm, out_shm)
+    _worker['X'] = np.ndarray(shape, dtype=np.float64, buffer=x_shm.buf)
+    _worker['out'] = np.ndarray(shape[0], dtype=np.float64, buffer=out_shm.buf)
+    _worker['model'] = joblib.load(model_path, mmap_mode='r')
+
+def _score_range(bounds):
+    start, stop = bounds
+    _worker['out'][start:stop] = _worker['model'].decision_function(_worker['X'][start:stop])
+    return bounds
+
+@contextmanager
+def _model_file(model):
+    """Path workers can mmap: registry path as-is, or a temporary dump of a model object."""
+    if isinstance(model, (str, os.PathLike)):
+        yield model
+        return
+    fd, path = tempfile.mkstemp(suffix='.joblib')
+    os.close(fd)
+    try:
+        joblib.dump(model, path)
+        yield path
+    finally:
+        os.remove(path)
+
+@contextmanager
+def _scoring_pool(model, X, n_workers):
+    """Process pool whose workers see X and the output through shared memory."""
+    x_shm = shared_memory.SharedMemory(create=True, size=max(X.nbytes, 1))
+    out_shm = shared_memory.SharedMemory(create=True, size=max(X.shape[0] * 8, 1))
+    try:
+        np.ndarray(X.shape, dtype=np.float64, buffer=x_shm.buf)[:] = X
+        out = np.ndarray(X.shape[0], dtype=np.float64, buffer=out_shm.buf)
+        with _model_file(model) as model_path:
+            with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                     initargs=(model_path, x_shm.name, out_shm.name, X.shape)) as executor:
+                yield executor, out
+        del out
+    finally:
+        for shm in (x_shm, out_shm):
+            shm.close()
+            shm.unlink()
+
+def iter_score_chunks(model, X, n_workers=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """M4: Stream ``(start, stop, scores)`` decision_function chunks in row order.
+
+    ``model`` is a fitted estimator or a path to a joblib dump of one (e.g. a
+    registry path, which workers memory-map). With more than one worker the
+    matrix is copied once into shared memory and sharded across a process
+    pool, so no chunk is pickled; small inputs are scored in-process.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    n_workers = n_workers or os.cpu_count() or 1
+    bounds = [(start, min(start + chunk_rows, len(X))) for start in range(0, len(X), chunk_rows)]
+    if n_workers == 1 or len(bounds) <= 1:
+        if isinstance(model, (str, os.PathLike)):
+            model = joblib.load(model, mmap_mode='r')
+        for start, stop in bounds:
+            yield start, stop, model.decision_function(X[start:stop])
+        return
+    with _scoring_pool(model, X, min(n_workers, len(bounds))) as (executor, out):
+        for start, stop in executor.map(_score_range, bounds):
+            yield start, stop, out[start:stop].copy()
+
+@timed('model_scoring')
+def score_matrix(model, X, n_workers=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """decision_function for the whole matrix via iter_score_chunks."""
+    scores = np.empty(len(X), dtype=np.float64)
+    for start, stop, chunk in iter_score_chunks(model, X, n_workers, chunk_rows):
+        scores[start:stop] = chunk
+    return scores
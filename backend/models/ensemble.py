@@ -2,11 +2,13 @@ import pandas as pd
 import numpy as np
 import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # project root
 
-from sklearn.ensemble import IsolationForest
-import joblib
-from features import engineer_features
+from features import engineer_features, FEATURE_COLUMNS
 from ingestion import get_timeline
+from models.baseline import fit_isolation_forest
+from models.registry import load_or_train, scoring_context
+from backend.metrics import timed
 
 def rule_based_anomalies(features_df):
     """Simple statistical rules (non-ML)."""
@@ -26,18 +28,21 @@ def rule_based_anomalies(features_df):
     
     return scores
 
-def ensemble_detect():
-    """M5: Combine ML + Rules."""
-    timeline = get_timeline()
+def ensemble_detect(timeline=None, model=None, n_jobs=None, retrain=False):
+    """M5: Combine ML + Rules.
+
+    Scores with ``model`` or the latest registered one for the feature
+    schema; a model is only fit when none is registered or ``retrain``.
+    """
+    timeline = get_timeline() if timeline is None else timeline
     features_df = engineer_features(timeline)
     
     # ML model
-    model = IsolationForest(contamination=0.1, random_state=42)
-    feature_cols = ['login_hour', 'events_per_user', 'failed_logins', 'is_suspicious_action', 'ip_change']
-    X = features_df[feature_cols].values
-    model.fit(X)
-    
-    ml_scores = model.decision_function(X) * -1  # Invert (higher = more anomalous)
+    if model is None:
+        model, _ = load_or_train(features_df, FEATURE_COLUMNS, fit_isolation_forest, retrain=retrain)
+    X = features_df[FEATURE_COLUMNS].values
+    with scoring_context(n_jobs), timed('model_scoring', rows=len(X)):
+        ml_scores = model.decision_function(X) * -1  # Invert (higher = more anomalous)
     
     # Rule scores
     rule_scores = rule_based_anomalies(features_df)
@@ -45,7 +50,7 @@ def ensemble_detect():
     # Ensemble: average
     ensemble_scores = (ml_scores + rule_scores) / 2
     
-    results = features_df.copy()
+    results = features_df.copy(deep=False)  # new columns only; the input's are shared
     results['ml_score'] = ml_scores
     results['rule_score'] = rule_scores
     results['ensemble_score'] = ensemble_scores
@@ -0,0 +1,128 @@
+import pandas as pd
+import hashlib
+import json
+import os
+import glob
+import re
+import tempfile
+from datetime import datetime
+from contextlib import nullcontext
+
+import joblib
+
+REGISTRY_DIR = "models/registry"
+
+def feature_schema_hash(feature_cols):
+    """Short stable hash of the ordered feature columns a model was fit on."""
+    return hashlib.sha256(json.dumps(list(feature_cols)).encode()).hexdigest()[:12]
+
+def training_window(features_df):
+    """(start, end) of the training data as ISO strings, or (None, None)."""
+    if 'timestamp' not in features_df or features_df.empty:
+        return None, None
+    ts = pd.to_datetime(features_df['timestamp'])
+    return ts.min().isoformat(), ts.max().isoformat()
+
+def scoring_context(n_jobs=None):
+    """Parallel tree scoring for IsolationForest.score_samples/decision_function.
+
+    sklearn walks the trees through joblib with its default n_jobs, so the
+    worker count is set around the call rather than on the estimator.
+    """
+    return joblib.parallel_config(n_jobs=n_jobs) if n_jobs else nullcontext()
+
+def _claim_version(schema_dir):
+    """(version, open model file): the next free version, claimed by creating its model file.
+
+    The version is one past the highest on disk (deleted versions are never
+    reused) and the exclusive create fails if a concurrent save took it first.
+    """
+    names = os.listdir(schema_dir)
+    version = max([int(m.group(1)) for m in map(re.compile(r'v(\d+)\.').match, names) if m], default=0) + 1
+    while True:
+        try:
+            return version, open(os.path.join(schema_dir, f"v{version:04d}.joblib"), 'xb')
+        except FileExistsError:
+            version += 1
+
+def save_model(model, feature_cols, features_df, registry_dir=REGISTRY_DIR):
+    """Register a fitted model under its feature-schema hash with a new version.
+
+    Models are dumped uncompressed so load_model can memory-map their arrays.
+    The metadata is written last (atomically), so a version is only listed
+    once its model is complete. Returns the metadata written beside the model.
+    """
+    schema = feature_schema_hash(feature_cols)
+    schema_dir = os.path.join(registry_dir, schema)
+    os.makedirs(schema_dir, exist_ok=True)
+    version, model_file = _claim_version(schema_dir)
+    window_start, window_end = training_window(features_df)
+    meta = {
+        'version': version,
+        'schema_hash': schema,
+        'feature_columns': list(feature_cols),
+        'window_start': window_start,
+        'window_end': window_end,
+        'n_samples': len(features_df),
+        'model': type(model).__name__,
+        'params': {k: v for k, v in model.get_params().items() if isinstance(v, (int, float, str, bool, type(None)))},
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'path': os.path.join(schema_dir, f"v{version:04d}.joblib"),
+    }
+    try:
+        with model_file:
+            joblib.dump(model, model_file)
+    except BaseException:
+        os.remove(meta['path'])
+        raise
+    fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=schema_dir)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, os.path.join(schema_dir, f"v{version:04d}.json"))
+    print(f"Registered {meta['model']} v{version} for schema {schema} ({window_start} → {window_end})")
+    return meta
+
+def list_models(feature_cols, registry_dir=REGISTRY_DIR):
+    """Metadata of every registered version for this feature schema, oldest first."""
+    schema_dir = os.path.join(registry_dir, feature_schema_hash(feature_cols))
+    metas = []
+    for path in sorted(glob.glob(os.path.join(schema_dir, "v*.json"))):
+        with open(path) as f:
+            metas.append(json.load(f))
+    return metas
+
+def find_model(feature_cols, version=None, window_start=None, window_end=None, registry_dir=REGISTRY_DIR):
+    """Metadata of the newest matching model, or None."""
+    for meta in reversed(list_models(feature_cols, registry_dir)):
+        if version is not None and meta['version'] != version:
+            continue
+        if window_start is not None and meta['window_start'] != pd.Timestamp(window_start).isoformat():
+            continue
+        if window_end is not None and meta['window_end'] != pd.Timestamp(window_end).isoformat():
+            continue
+        return meta
+    return None
+
+def load_model(feature_cols, version=None, window_start=None, window_end=None, mmap_mode='r',
+               registry_dir=REGISTRY_DIR):
+    """Load a registered model, memory-mapping its tree arrays by default.
+
+    Returns (model, metadata); raises FileNotFoundError if nothing matches.
+    """
+    meta = find_model(feature_cols, version, window_start, window_end, registry_dir)
+    if meta is None:
+        raise FileNotFoundError(f"No registered model for schema {feature_schema_hash(feature_cols)}")
+    return joblib.load(meta['path'], mmap_mode=mmap_mode), meta
+
+def load_or_train(features_df, feature_cols, train_fn, retrain=False, registry_dir=REGISTRY_DIR):
+    """Latest registered model for the schema, fitting and registering one if none exists.
+
+    ``train_fn(X)`` must return a fitted model.
+    """
+    if not retrain:
+        meta = find_model(feature_cols, registry_dir=registry_dir)
+        if meta is not None:
+            return joblib.load(meta['path'], mmap_mode='r'), meta
+    model = train_fn(features_df[feature_cols].values)
+    meta = save_model(model, feature_cols, features_df, registry_dir)
+    return model, meta
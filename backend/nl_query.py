@@ -1,34 +1,248 @@
 import pandas as pd
+import numpy as np
+import argparse
 import re
+from collections import namedtuple
+from functools import lru_cache
+
+INCIDENTS_PATH = 'features/explainable_risk_assessment.csv'
+RESULT_COLUMNS = ['user', 'action', 'final_risk_score', 'risk_level', 'mitre_tag', 'explanation']
+
+# Query words -> risk levels / substrings of action names
+RISK_TERMS = {'critical': 'HIGH', 'high': 'HIGH', 'medium': 'MEDIUM', 'low': 'LOW'}
+ACTION_TERMS = {'usb': 'usb', 'login': 'login', 'logon': 'login', 'file': 'file',
+                'privilege': 'privilege', 'escalat': 'escalation', 'exfil': 'exfil'}
+USER_PATTERN = re.compile(r'\buser\d+\b')
+MITRE_PATTERN = re.compile(r'\bt(?:a)?\d{4}(?:\.\d{3})?\b')
+DATE = r'(\d{4}-\d{2}-\d{2}(?:[ t]\d{2}:\d{2}(?::\d{2})?)?)'
+LAST_PATTERN = re.compile(r'\b(?:last|past)\s+(\d+)?\s*(minute|hour|day|week)s?\b')
+BETWEEN_PATTERN = re.compile(rf'\bbetween\s+{DATE}\s+and\s+{DATE}')
+SINCE_PATTERN = re.compile(rf'\b(?:since|after|from)\s+{DATE}')
+UNTIL_PATTERN = re.compile(rf'\b(?:before|until|to)\s+{DATE}')
+ON_PATTERN = re.compile(rf'\bon\s+{DATE}')
+
+# Structured filter an NL query parses to. Empty tuples / None = no constraint.
+# ``start``/``end`` bound a half-open timestamp range; ``last`` is a window
+# ending at the newest event, resolved against the data at search time.
+QueryPlan = namedtuple('QueryPlan', ['risk_levels', 'action_terms', 'users', 'words', 'mitre',
+                                     'start', 'end', 'last'])
+
+_incidents = {}  # path -> DataFrame, filled on first query
+_indexes = {}    # path -> IncidentIndex
+
+def load_incidents(path=INCIDENTS_PATH):
+    """M8 explainable results, read once per path on first use rather than at import."""
+    if path not in _incidents:
+        _incidents[path] = pd.read_csv(path)
+    return _incidents[path]
+
+def load_index(path=INCIDENTS_PATH):
+    """IncidentIndex over load_incidents(path), built once."""
+    if path not in _indexes:
+        _indexes[path] = IncidentIndex(load_incidents(path))
+    return _indexes[path]
+
+def parse_query(query):
+    """M9: Natural language -> QueryPlan (cached per normalized query)."""
+    return _parse(' '.join(query.lower().split()))
+
+@lru_cache(maxsize=1024)
+def _parse(query):
+    risk_levels = sorted({level for term, level in RISK_TERMS.items() if re.search(rf'\b{term}\b', query)})
+    action_terms = sorted({sub for term, sub in ACTION_TERMS.items() if re.search(rf'\b{term}', query)})
+    start = end = last = None
+    match = LAST_PATTERN.search(query)
+    if match:
+        last = pd.Timedelta(int(match.group(1) or 1), unit={'minute': 'min', 'hour': 'h', 'day': 'D', 'week': 'W'}[match.group(2)])
+    match = BETWEEN_PATTERN.search(query)
+    if match:
+        start, end = pd.Timestamp(match.group(1)), pd.Timestamp(match.group(2))
+    else:
+        match = ON_PATTERN.search(query)
+        if match:
+            start = pd.Timestamp(match.group(1)).normalize()
+            end = start + pd.Timedelta(days=1)
+        match = SINCE_PATTERN.search(query)
+        start = pd.Timestamp(match.group(1)) if match else start
+        match = UNTIL_PATTERN.search(query)
+        end = pd.Timestamp(match.group(1)) if match else end
+    return QueryPlan(
+        risk_levels=tuple(risk_levels),
+        action_terms=tuple(action_terms),
+        users=tuple(sorted(set(USER_PATTERN.findall(query)))),
+        words=tuple(sorted(set(re.findall(r'[\w.@-]+', query)))),
+        mitre=tuple(sorted({tag.upper() for tag in MITRE_PATTERN.findall(query)})),
+        start=start, end=end, last=last,
+    )
+
+class IncidentIndex:
+    """Inverted indexes over the incident table for QueryPlan filters.
+
+    Categorical columns are factorized once (lazily, on first use) into codes
+    plus per-code sorted row postings; timestamps into an int64 array. A
+    search walks the most selective constraint's postings and checks the
+    others by code lookup, so cost follows the smallest match set, and only
+    the requested page of rows is materialized.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.n = len(df)
+        self._columns = {}
+        self._ts = None
+        self._ts_order = None
+        self._ts_ordered = None
+
+    def _column(self, name):
+        """(codes, lowercase uniques, postings, bounds) for one column."""
+        if name not in self._columns:
+            codes, uniques = pd.factorize(self.df[name])
+            codes = codes.astype(np.int32)
+            dtype = np.int32 if self.n < 2**31 else np.int64
+            postings = np.argsort(codes, kind='stable').astype(dtype)  # rows grouped by code, ascending
+            bounds = np.searchsorted(codes[postings], np.arange(len(uniques) + 1))
+            self._columns[name] = (codes, [str(u).lower() for u in uniques], postings, bounds)
+        return self._columns[name]
+
+    def _timestamps(self):
+        if self._ts is None:
+            ts = pd.to_datetime(self.df['timestamp'], errors='coerce').to_numpy('datetime64[ns]').view(np.int64)
+            self._ts = ts  # NaT is int64 min, so it falls outside every range
+            self._ts_sorted = bool(np.all(ts[1:] >= ts[:-1]))
+            self._ts_newest = int(ts.max()) if len(ts) else None
+        return self._ts
+
+    def _categorical(self, name, matches):
+        """(codes selected by ``matches(unique)``, match count) for one column."""
+        _, uniques, _, bounds = self._column(name)
+        selected = np.array([i for i, value in enumerate(uniques) if matches(value)], dtype=np.int64)
+        return selected, int((bounds[selected + 1] - bounds[selected]).sum())
+
+    def _constraints(self, plan):
+        """Constraints as (match count, kind, column, selection), most selective first."""
+        constraints = []
+        if plan.risk_levels:
+            levels = {level.lower() for level in plan.risk_levels}
+            constraints.append(('risk_level', lambda v: v in levels))
+        if plan.action_terms:
+            constraints.append(('action', lambda v: any(term in v for term in plan.action_terms)))
+        if plan.mitre:
+            mitre = [tag.lower() for tag in plan.mitre]
+            constraints.append(('mitre_tag', lambda v: any(tag in v for tag in mitre)))
+        if 'user' in self.df:
+            _, users, _, _ = self._column('user')
+            known = set(users)
+            named = set(plan.users) | {word for word in plan.words if word in known}
+            if named:
+                constraints.append(('user', lambda v: v in named))
+        resolved = []
+        for name, matches in constraints:
+            if name not in self.df:
+                continue
+            selected, size = self._categorical(name, matches)
+            resolved.append((size, 'codes', name, selected))
+        if (plan.start is not None or plan.end is not None or plan.last is not None) and 'timestamp' in self.df:
+            self._timestamps()
+            start = plan.start.value if plan.start is not None else np.iinfo(np.int64).min + 1
+            end = plan.end.value if plan.end is not None else np.iinfo(np.int64).max
+            if plan.last is not None and self._ts_newest is not None:
+                start, end = max(start, self._ts_newest - plan.last.value), min(end, self._ts_newest + 1)
+            resolved.append((self._time_size(start, end), 'time', 'timestamp', (start, end)))
+        return sorted(resolved, key=lambda c: c[0])
+
+    def _sorted_ts(self):
+        """(row order by time, timestamps in that order), for unsorted tables."""
+        if self._ts_order is None:
+            self._ts_order = np.argsort(self._timestamps(), kind='stable')
+            self._ts_ordered = self._ts[self._ts_order]
+        return self._ts_order, self._ts_ordered
+
+    def _time_size(self, start, end):
+        ts = self._timestamps()
+        if self._ts_sorted:
+            return int(np.searchsorted(ts, end, 'left') - np.searchsorted(ts, start, 'left'))
+        _, ordered = self._sorted_ts()
+        return int(np.searchsorted(ordered, end, 'left') - np.searchsorted(ordered, start, 'left'))
+
+    def _allowed(self, name, selection):
+        """Code -> selected lookup; code -1 (missing) hits the trailing False."""
+        allowed = np.zeros(len(self._column(name)[1]) + 1, dtype=bool)
+        allowed[selection] = True
+        return allowed
+
+    def _rows(self, kind, name, selection, size):
+        """Sorted rows matching one constraint: a range, a postings view or an array."""
+        if kind == 'time':
+            ts, (start, end) = self._timestamps(), selection
+            if self._ts_sorted:
+                return range(np.searchsorted(ts, start, 'left'), np.searchsorted(ts, end, 'left'))
+            order, ordered = self._sorted_ts()
+            return np.sort(order[np.searchsorted(ordered, start, 'left'):np.searchsorted(ordered, end, 'left')])
+        codes, _, postings, bounds = self._column(name)
+        if len(selection) == 0:  # unknown user, term or level
+            return np.empty(0, dtype=np.intp)
+        if len(selection) == 1:
+            return postings[bounds[selection[0]]:bounds[selection[0] + 1]]
+        if size > self.n // 8:
+            return np.flatnonzero(self._allowed(name, selection)[codes])  # one pass beats merging big lists
+        return np.sort(np.concatenate([postings[bounds[c]:bounds[c + 1]] for c in selection]))
+
+    def match_rows(self, plan):
+        """Sorted rows matching a QueryPlan (a range when they are contiguous)."""
+        constraints = self._constraints(plan)
+        if not constraints:
+            return range(self.n)
+        size, kind, name, selection = constraints[0]
+        rows = self._rows(kind, name, selection, size)
+        for _, kind, name, selection in constraints[1:]:
+            if len(rows) == 0:
+                break
+            if isinstance(rows, range):  # slices of the columns, no gather
+                values = self._timestamps()[rows.start:rows.stop] if kind == 'time' else \
+                    self._column(name)[0][rows.start:rows.stop]
+            else:
+                values = self._timestamps()[rows] if kind == 'time' else self._column(name)[0][rows]
+            keep = (values >= selection[0]) & (values < selection[1]) if kind == 'time' else \
+                self._allowed(name, selection)[values]
+            rows = rows.start + np.flatnonzero(keep) if isinstance(rows, range) else rows[keep]
+        return rows
+
+    def search(self, query, page=0, page_size=10, columns=None):
+        """One page of matches: {'total', 'page', 'page_size', 'plan', 'rows' (DataFrame)}."""
+        plan = parse_query(query)
+        rows = self.match_rows(plan)
+        page_rows = np.asarray(rows[page * page_size:(page + 1) * page_size])
+        frame = self.df.iloc[page_rows]
+        if columns is not None:
+            frame = frame[[col for col in columns if col in frame]]
+        return {'total': len(rows), 'page': page, 'page_size': page_size, 'plan': plan, 'rows': frame}
+
+def nl_query(query, df=None, page=0, page_size=10, index=None):
+    """M9: Search ``df`` (default: the M8 results file) and print one page of matches."""
+    if index is None:
+        index = load_index() if df is None else IncidentIndex(df)
+    result = index.search(query, page, page_size, RESULT_COLUMNS)
 
-# Load explainable data
-df = pd.read_csv('features/explainable_risk_assessment.csv')
-
-def nl_query(query):
-    """M9: Translate natural language to filters."""
-    query_lower = query.lower()
-    results = df.copy()
-    
-    # Keyword filters
-    if 'high' in query_lower or 'critical' in query_lower:
-        results = results[results['risk_level'] == 'HIGH']
-    if 'usb' in query_lower:
-        results = results[results['action'].str.contains('usb', case=False, na=False)]
-    if any(user in query_lower for user in ['user1', 'user2', 'user3']):
-        results = results[results['user'].str.lower().str.contains(re.search(r'user\d', query_lower).group(), na=False)]
-    if 'login' in query_lower:
-        results = results[results['action'].str.contains('login', case=False, na=False)]
-    
     print(f"=== M9 NL QUERY: '{query}' ===")
-    print(f"Found {len(results)} matching incidents:")
-    print(results[['user', 'action', 'final_risk_score', 'risk_level', 'mitre_tag', 'explanation']].head(10))
-    return results
+    print(f"Found {result['total']} matching incidents:")
+    print(result['rows'])
+    return result
 
-if __name__ == "__main__":
-    # Test queries
-    nl_query("show high risk USB events")
-    print("\n---")
-    nl_query("high risk for user1")
-    print("\n---")
-    nl_query("all logins")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="M9: natural-language queries over M8 results")
+    parser.add_argument('queries', nargs='*',
+                        default=["show high risk USB events", "high risk for user1", "all logins"])
+    parser.add_argument('--input', default=INCIDENTS_PATH)
+    parser.add_argument('--page', type=int, default=0)
+    parser.add_argument('--page-size', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    index = load_index(args.input)
+    for i, query in enumerate(args.queries):
+        if i:
+            print("\n---")
+        nl_query(query, page=args.page, page_size=args.page_size, index=index)
     print("M9 NATURAL LANGUAGE ✅")
+
+if __name__ == "__main__":
+    main()
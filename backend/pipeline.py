@@ -0,0 +1,263 @@
+import pandas as pd
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import sys
+import time
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from backend.ingestion import get_timeline
+from backend.features import engineer_features
+from backend.risk_scoring import assess_risk
+from backend.explainable import EXPLANATION_RULES, explain_risks
+from backend.m10_adaptive import apply_mitre_enhanced, get_mitre_map
+from backend.m11_privacy import mask_pii, get_pseudonymizer
+from backend.m12_report import render_report, write_report
+from backend.evaluate import evaluate, print_evaluation
+from backend.columnar import save_frame, load_frame
+from backend.events import compact_events
+from backend.metrics import REGISTRY, profiler
+
+PIPELINE_STAGE_SECONDS = REGISTRY.histogram('forensics_pipeline_stage_seconds',
+                                            'Pipeline stage wall time by outcome (ran, cached, checkpoint)',
+                                            ['stage', 'status'])
+PIPELINE_STAGE_ROWS = REGISTRY.counter('forensics_pipeline_stage_rows_total', 'Rows output by pipeline stages that ran',
+                                       ['stage'])
+
+_module_digests = {}  # module name -> sha256 of its source file
+
+def _module_digest(name):
+    if name not in _module_digests:
+        try:
+            with open(sys.modules[name].__file__, 'rb') as f:
+                _module_digests[name] = hashlib.sha256(f.read()).hexdigest()
+        except (AttributeError, KeyError, OSError, TypeError):
+            _module_digests[name] = name
+    return _module_digests[name]
+
+def _project_modules(name):
+    """``name`` and the backend/ modules it uses (via its globals), transitively, sorted.
+
+    Matched by file, since some modules import siblings without the backend. prefix.
+    """
+    backend_dir = os.path.join(project_root, 'backend', '')
+    seen, todo = set(), [name]
+    while todo:
+        module = sys.modules.get(todo.pop())
+        if module is None or module.__name__ in seen:
+            continue
+        seen.add(module.__name__)
+        for value in vars(module).values():
+            dep = value.__name__ if inspect.ismodule(value) else getattr(value, '__module__', None)
+            path = getattr(sys.modules.get(dep) if isinstance(dep, str) else None, '__file__', None) or ''
+            if path and os.path.abspath(path).startswith(backend_dir):
+                todo.append(dep)
+    return sorted(seen)
+
+class Stage:
+    """One DAG node: ``fn(*inputs, **params)`` -> output.
+
+    ``csv`` is the file the standalone module script writes for this stage,
+    used only when a run is asked to export the legacy hand-off files.
+    """
+
+    def __init__(self, name, fn, inputs, csv=None):
+        self.name = name
+        self.fn = fn
+        self.inputs = tuple(inputs)
+        self.csv = csv
+        self._version = None
+
+    def version(self):
+        """Hash of the source of the stage function's module and every backend
+        module it uses, so edits to callees and rule tables invalidate its cache too."""
+        if self._version is None:
+            modules = _project_modules(self.fn.__module__)
+            self._version = hashlib.sha256("|".join(f"{name}:{_module_digest(name)}" for name in modules)
+                                           .encode()).hexdigest()
+        return self._version
+
+# M3 -> M12 as a declared DAG; 'timeline' is the external input
+STAGES = (
+    Stage('features', engineer_features, ['timeline'], csv='features/timeline_features.csv'),
+    Stage('risk', assess_risk, ['features'], csv='features/risk_assessment.csv'),
+    Stage('explained', explain_risks, ['risk'], csv='features/explainable_risk_assessment.csv'),
+    Stage('adaptive', apply_mitre_enhanced, ['explained'], csv='features/m10_mitre_adaptive.csv'),
+    Stage('anonymized', mask_pii, ['adaptive'], csv='features/m11_anonymized.csv'),
+    Stage('report', render_report, ['anonymized']),
+    Stage('evaluation', evaluate, ['anonymized']),
+)
+
+def frame_hash(df):
+    """Content hash of a DataFrame (values, index, column names and dtypes)."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def _params_hash(params):
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+class Pipeline:
+    """Runs the stage DAG in one process, passing DataFrames in memory.
+
+    Each stage's cache key chains its code version, params and its inputs'
+    keys, and external inputs are keyed by content hash, so a key changes
+    exactly when something upstream of the stage changed. Stages whose key
+    matches the last run are skipped (their output is reused from memory,
+    or from a checkpoint when ``checkpoint_dir`` is set). Checkpoints are
+    only written with ``checkpoint_dir``, as binary columnar frames.
+    Stage functions must not mutate their inputs.
+    """
+
+    def __init__(self, stages=STAGES, checkpoint_dir=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.checkpoint_dir = checkpoint_dir
+        self.memo = {}  # stage -> (key, output)
+        self.log = []   # (stage, 'ran' | 'cached' | 'checkpoint', seconds) for the last run
+
+    def plan(self, targets=None):
+        """Stages needed for ``targets`` (default: all), in dependency order."""
+        targets = list(self.stages) if targets is None else list(targets)
+        order, visiting = [], set()
+
+        def visit(name):
+            if name in order or name not in self.stages:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline cycle through stage {name!r}")
+            visiting.add(name)
+            for dep in self.stages[name].inputs:
+                visit(dep)
+            visiting.discard(name)
+            order.append(name)
+
+        for name in targets:
+            if name not in self.stages:
+                raise KeyError(f"Unknown stage {name!r}")
+            visit(name)
+        return order
+
+    def _checkpoint_path(self, name, key):
+        return os.path.join(self.checkpoint_dir, f"{name}-{key[:16]}")
+
+    def _load_checkpoint(self, name, key):
+        if self.checkpoint_dir is None:
+            return None
+        path = self._checkpoint_path(name, key)
+        return load_frame(path) if os.path.exists(os.path.join(path, "meta.json")) else None
+
+    def _save_checkpoint(self, name, key, output):
+        if self.checkpoint_dir is None or not isinstance(output, pd.DataFrame):
+            return
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        path = self._checkpoint_path(name, key)
+        save_frame(output, path)
+        # Keep only the newest checkpoint per stage
+        for entry in os.listdir(self.checkpoint_dir):
+            stale = os.path.join(self.checkpoint_dir, entry)
+            if entry.startswith(f"{name}-") and stale != path and not entry.endswith(".tmp"):
+                shutil.rmtree(stale, ignore_errors=True)
+
+    def run(self, inputs, targets=None, params=None):
+        """Run the stages ``targets`` need; returns {stage: output} for every planned stage."""
+        params = params or {}
+        keys = {name: frame_hash(value) if isinstance(value, pd.DataFrame) else _params_hash(value)
+                for name, value in inputs.items()}
+        values = dict(inputs)
+        self.log = []
+        for name in self.plan(targets):
+            stage = self.stages[name]
+            missing = [dep for dep in stage.inputs if dep not in values]
+            if missing:
+                raise KeyError(f"Stage {name!r} is missing inputs {missing}")
+            stage_params = params.get(name, {})
+            key = hashlib.sha256("|".join(
+                [name, stage.version(), _params_hash(stage_params)] + [keys[dep] for dep in stage.inputs]
+            ).encode()).hexdigest()
+
+            start = time.perf_counter()
+            cached = self.memo.get(name)
+            if cached is not None and cached[0] == key:
+                output, status = cached[1], 'cached'
+            else:
+                output, status = self._load_checkpoint(name, key), 'checkpoint'
+                if output is None:
+                    output, status = stage.fn(*[values[dep] for dep in stage.inputs], **stage_params), 'ran'
+                    self._save_checkpoint(name, key, output)
+                self.memo[name] = (key, output)
+            seconds = time.perf_counter() - start
+            self.log.append((name, status, seconds))
+            PIPELINE_STAGE_SECONDS.observe(seconds, stage=name, status=status)
+            if status == 'ran' and isinstance(output, pd.DataFrame):
+                PIPELINE_STAGE_ROWS.inc(len(output), stage=name)
+            values[name], keys[name] = output, key
+        return {name: values[name] for name in self.plan(targets)}
+
+    def export_csv(self, outputs):
+        """Write the legacy per-module CSV hand-off files for the given outputs."""
+        for name, output in outputs.items():
+            stage = self.stages.get(name)
+            if stage is not None and stage.csv and isinstance(output, pd.DataFrame):
+                os.makedirs(os.path.dirname(stage.csv), exist_ok=True)
+                output.to_csv(stage.csv, index=False)
+
+def default_params(mitre_path='docs/mitre_mapping.yml'):
+    """Stage params for STAGES; the M8 rules, the MITRE map and the M11 key fingerprint are part of the cache keys."""
+    return {
+        'explained': {'rules': EXPLANATION_RULES},
+        'adaptive': {'mapping': get_mitre_map(mitre_path)},
+        'anonymized': {'pseudonymizer': get_pseudonymizer()},
+    }
+
+def run_pipeline(timeline=None, targets=None, pipeline=None, checkpoint_dir=None, params=None):
+    """M3-M12 in one process. Returns ({stage: output}, pipeline)."""
+    timeline = compact_events(get_timeline() if timeline is None else timeline)
+    pipeline = Pipeline(checkpoint_dir=checkpoint_dir) if pipeline is None else pipeline
+    params = default_params() if params is None else params
+    return pipeline.run({'timeline': timeline}, targets=targets, params=params), pipeline
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the M3-M12 forensics pipeline in one process")
+    parser.add_argument('--targets', nargs='+', default=None, help='stages to produce (default: all)')
+    parser.add_argument('--checkpoint-dir', default=None,
+                        help='persist binary columnar checkpoints here and reuse them across runs')
+    parser.add_argument('--export-csv', action='store_true',
+                        help='also write the legacy features/*.csv hand-off files')
+    parser.add_argument('--report', default='reports/forensic_report.html')
+    parser.add_argument('--profile', default=None, help='sample the run and write folded stacks here')
+    parser.add_argument('--metrics', default=None, help='write the run\'s metrics (Prometheus text) here')
+    args = parser.parse_args()
+
+    if args.profile:
+        profiler.start()
+    outputs, pipeline = run_pipeline(targets=args.targets, checkpoint_dir=args.checkpoint_dir)
+    print("=== PIPELINE M3-M12 ===")
+    for name, status, seconds in pipeline.log:
+        print(f"{name:>12}: {status:<10} {seconds:.2f}s")
+    if args.export_csv:
+        pipeline.export_csv(outputs)
+        print("Exported legacy CSV hand-off files")
+    if 'report' in outputs:
+        write_report(outputs['report'], args.report)
+        print(f"Generated {args.report}")
+    if 'evaluation' in outputs:
+        print_evaluation(outputs['evaluation'])
+    if args.profile:
+        profiler.stop()
+        with open(args.profile, 'w') as f:
+            f.write(profiler.folded())
+        print(f"Profile: {profiler.samples} samples -> {args.profile}")
+    if args.metrics:
+        with open(args.metrics, 'w') as f:
+            f.write(REGISTRY.render())
+        print(f"Metrics -> {args.metrics}")
+
+if __name__ == "__main__":
+    main()
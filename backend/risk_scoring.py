@@ -3,13 +3,16 @@ import numpy as np
 import sys
 import os
 
-# Bulletproof path setup
-project_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
-sys.path.insert(0, project_root)
+# Bulletproof path setup: sibling modules resolve however this file is imported
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, backend_dir)
+sys.path.append(os.path.dirname(backend_dir))  # project root, for backend.metrics
 
 # Direct imports (no backend. prefix)
 from ingestion import get_timeline
 from features import engineer_features
+from backend.events import categorical
+from backend.metrics import timed
 
 import pickle
 
@@ -21,16 +24,21 @@ MITRE_MAP = {
     'privilege_escalation': 'TA0004 - Privilege Escalation'
 }
 
-def calculate_risk_score(timeline):
-    """M7: 0-100 risk score from all modules."""
-    features_df = engineer_features(timeline)
-    
+@timed('risk_scoring')
+def score_risk(features_df, events_max=None):
+    """M7 risk components for engineered features.
+
+    ``events_max`` normalizes the event-density term; it defaults to the max
+    in ``features_df`` and can be a running max when scoring a stream.
+    Returns (ml_score, temporal_risk, suspicious_mult, risk_score).
+    """
     # Normalize ML anomaly (if exists, else 0)
     ml_score = np.abs(features_df.get('anomaly_score', 0)) / 0.2
     ml_score = np.clip(ml_score, 0, 1)
     
     # Temporal risk (event density)
-    temporal_risk = features_df['events_per_user'] / features_df['events_per_user'].max()
+    events_max = features_df['events_per_user'].max() if events_max is None else events_max
+    temporal_risk = features_df['events_per_user'] / events_max
     
     # Suspicious action multiplier
     suspicious_mult = 1 + (features_df['is_suspicious_action'] * 0.5)
@@ -38,16 +46,29 @@ def calculate_risk_score(timeline):
     # Final risk calculation (0-100)
     risk_score = (ml_score * 30 + temporal_risk * 20 + suspicious_mult * 20) * 2
     risk_score = np.clip(risk_score, 0, 100)
+    return ml_score, temporal_risk, suspicious_mult, risk_score
+
+def assess_risk(features_df):
+    """M7: Risk components, MITRE tag, 0-100 score and level per engineered event."""
+    ml_score, temporal_risk, suspicious_mult, risk_score = score_risk(features_df)
     
-    results = features_df.copy()
+    results = features_df.copy(deep=False)  # new columns only; the input's are shared
     results['ml_contribution'] = ml_score * 30
     results['temporal_contribution'] = temporal_risk * 20
     results['mitre_multiplier'] = suspicious_mult
-    results['mitre_tag'] = results['action'].map(MITRE_MAP).fillna('Recon')
+    # Tag per distinct action; rows without one (code -1) get the trailing 'Recon'
+    codes, actions = pd.factorize(results['action'])
+    tags = [MITRE_MAP.get(action, 'Recon') for action in actions] + ['Recon']
+    results['mitre_tag'] = categorical(codes, tags, index=results.index)
     results['final_risk_score'] = risk_score.round(1)
     results['risk_level'] = pd.cut(results['final_risk_score'], 
                                    bins=[0, 30, 70, 100], 
                                    labels=['LOW', 'MEDIUM', 'HIGH'])
+    return results
+
+def calculate_risk_score(timeline):
+    """M7: 0-100 risk score from all modules."""
+    results = assess_risk(engineer_features(timeline))
     
     print("=== M7 RISK SCORING ===")
     print(results.nlargest(5, 'final_risk_score')[['user', 'action', 'mitre_tag', 'final_risk_score', 'risk_level']])
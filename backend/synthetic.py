@@ -0,0 +1,265 @@
+import pandas as pd
+import numpy as np
+import argparse
+import os
+import shutil
+import sys
+from datetime import datetime
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from backend.columnar import save_frame, load_frame
+from backend.detection.sequence_mining import KILL_CHAINS
+
+# Background action mix; usb_insert/privilege_escalation score +50 like the
+# original dashboard generator, which gives the same ~38% HIGH-risk rows.
+ACTION_WEIGHTS = {'login': 0.2, 'file_access': 0.2, 'usb_insert': 0.2, 'privilege_escalation': 0.2, 'dataexfil': 0.2}
+HIGH_RISK_ACTIONS = ('usb_insert', 'privilege_escalation')
+ACTION_TAGS = {'login': 'TA0001', 'file_access': 'TA0002', 'usb_insert': 'T1201',
+               'privilege_escalation': 'TA0004', 'dataexfil': 'TA0010'}
+COLUMNS = ['timestamp', 'user', 'action', 'source_ip', 'status', 'final_risk_score', 'mitre_tag']
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+CHUNK_ROWS = 200_000
+CHAIN_STEP_SECONDS = (30, 900)   # gap between consecutive kill-chain steps
+
+class SyntheticLogs:
+    """Seeded, vectorized synthetic event stream for load tests.
+
+    Rows are produced in chunks of ``chunk_rows`` with NumPy (no per-row
+    Python), so memory is O(chunk) whatever ``rows`` is. Each chunk covers
+    its own slice of [start, start + span) and is time-sorted, so the whole
+    stream is in timestamp order. Users follow a Zipf-like skew
+    (``user_skew`` 0 = uniform) and keep a home IP, switching to a random
+    one with ``ip_change_rate``. About ``attack_rate`` of the rows are
+    injected kill chains (``chains``: name -> ordered actions) by one user
+    minutes apart. Chunk k draws from a generator seeded with (seed, k),
+    so output is reproducible for a given seed and chunk size.
+    """
+
+    def __init__(self, rows, users=1000, actions=ACTION_WEIGHTS, chains=KILL_CHAINS, attack_rate=0.001,
+                 fail_rate=0.1, ip_change_rate=0.05, n_ips=20_000, user_skew=1.0,
+                 start='2026-01-01', span='1D', seed=None, chunk_rows=CHUNK_ROWS):
+        self.rows = int(rows)
+        self.seed = np.random.SeedSequence().entropy if seed is None else seed
+        self.chunk_rows = chunk_rows
+        self.attack_rate = attack_rate
+        self.fail_rate = fail_rate
+        self.ip_change_rate = ip_change_rate
+        self.start = int(pd.Timestamp(start).floor('s').value // 10**9)
+        self.span = max(int(pd.Timedelta(span).total_seconds()), 1)
+
+        weights = np.array(list(actions.values()), dtype=float)
+        self.action_p = weights / weights.sum()
+        chains = list(chains.values()) if isinstance(chains, dict) else list(chains)
+        self.actions = list(dict.fromkeys(list(actions) + [step for chain in chains for step in chain]))
+        codes = {action: i for i, action in enumerate(self.actions)}
+        self.chain_steps = np.full((len(chains), max((len(c) for c in chains), default=0)), -1, dtype=np.int16)
+        for i, chain in enumerate(chains):
+            self.chain_steps[i, :len(chain)] = [codes[step] for step in chain]
+        self.chain_lengths = (self.chain_steps >= 0).sum(axis=1)
+
+        rng = np.random.default_rng([self.seed, 2**32 - 1])  # fixed per-seed tables
+        user_p = 1.0 / np.arange(1, users + 1) ** user_skew
+        self.user_p = user_p / user_p.sum()
+        self.user_names = np.array([f'user{i}' for i in range(users)], dtype=object)
+        ips = rng.choice(256**3, n_ips, replace=False)
+        self.ip_names = np.array([f'10.{i >> 16}.{(i >> 8) & 255}.{i & 255}' for i in ips], dtype=object)
+        self.home_ip = rng.integers(0, n_ips, users)
+        self.is_high = np.isin(self.actions, HIGH_RISK_ACTIONS)
+        self.tag_codes, self.tag_names = pd.factorize(pd.Series([ACTION_TAGS.get(a, 'Unknown') for a in self.actions]))
+
+    def __len__(self):
+        return self.rows
+
+    def _chains(self, rng, budget, t0, t1):
+        """(seconds, user, action, ip) arrays for kill chains filling about ``budget`` rows."""
+        if budget <= 0 or len(self.chain_lengths) == 0:
+            return None
+        n = rng.poisson(budget / self.chain_lengths.mean())
+        if n == 0:
+            return None
+        which = rng.integers(0, len(self.chain_lengths), n)
+        steps = self.chain_steps[which]
+        present = steps >= 0
+        # Gaps shrink when the chunk's time slice is short, so chains never leave it
+        high = max(1, min(CHAIN_STEP_SECONDS[1], (t1 - t0) // steps.shape[1]))
+        gaps = rng.integers(min(CHAIN_STEP_SECONDS[0], high), high + 1, steps.shape)
+        gaps[:, 0] = 0
+        seconds = rng.integers(t0, max(t1 - high * (steps.shape[1] - 1), t0 + 1), n)[:, None] + np.cumsum(gaps, axis=1)
+        users = np.broadcast_to(rng.integers(0, len(self.user_p), n)[:, None], steps.shape)
+        ips = np.broadcast_to(rng.integers(0, len(self.ip_names), n)[:, None], steps.shape)
+        return seconds[present], users[present], steps[present], ips[present]
+
+    def chunk(self, k):
+        """Chunk ``k`` as a DataFrame (categorical columns, datetime64 timestamps)."""
+        first = k * self.chunk_rows
+        rows = max(0, min(self.chunk_rows, self.rows - first))
+        rng = np.random.default_rng([self.seed, k])
+        t0 = self.start + self.span * first // max(self.rows, 1)
+        t1 = max(self.start + self.span * (first + rows) // max(self.rows, 1), t0 + 1)
+
+        chains = self._chains(rng, min(rng.binomial(rows, self.attack_rate), rows), t0, t1)
+        n_chain = 0 if chains is None else min(len(chains[0]), rows)
+        n = rows - n_chain
+        seconds = rng.integers(t0, t1, n)
+        users = rng.choice(len(self.user_p), n, p=self.user_p)
+        actions = rng.choice(len(self.action_p), n, p=self.action_p)
+        ips = np.where(rng.random(n) < self.ip_change_rate, rng.integers(0, len(self.ip_names), n), self.home_ip[users])
+        if n_chain:
+            seconds, users, actions, ips = (np.concatenate([a, b[:n_chain]]) for a, b in zip((seconds, users, actions, ips), chains))
+        order = np.argsort(seconds, kind='stable')
+        seconds, users, actions, ips = seconds[order], users[order], actions[order], ips[order]
+
+        failed = (actions == self.actions.index('login')) & (rng.random(rows) < self.fail_rate) \
+            if 'login' in self.actions else np.zeros(rows, dtype=bool)
+        score = rng.uniform(20, 70, rows) + 50 * self.is_high[actions] + rng.uniform(-10, 20, rows)
+        return pd.DataFrame({
+            'timestamp': seconds.astype('datetime64[s]'),
+            'user': pd.Categorical.from_codes(users, self.user_names),
+            'action': pd.Categorical.from_codes(actions, self.actions),
+            'source_ip': pd.Categorical.from_codes(ips, self.ip_names),
+            'status': pd.Categorical.from_codes(failed.astype(np.int8), ['success', 'fail']),
+            'final_risk_score': np.round(score, 1),
+            'mitre_tag': pd.Categorical.from_codes(self.tag_codes[actions], self.tag_names),
+        }, index=pd.RangeIndex(first, first + rows))[COLUMNS]
+
+    def chunks(self):
+        for k in range(-(-self.rows // self.chunk_rows)):
+            yield self.chunk(k)
+
+    def csv_chunks(self, reservoir=None):
+        """Encoded CSV text per chunk (header first); O(chunk) memory. Chunks also feed ``reservoir``."""
+        yield (','.join(COLUMNS) + '\n').encode()
+        for frame in self.chunks():
+            if reservoir is not None:
+                reservoir.add(frame)
+            yield csv_text(frame).encode()
+
+    def write_csv(self, path):
+        with open(path, 'wb') as f:
+            for data in self.csv_chunks():
+                f.write(data)
+
+    def write_columnar(self, path):
+        """One save_frame() part per chunk under ``path`` (read back with iter_columnar)."""
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        for k, frame in enumerate(self.chunks()):
+            save_frame(frame.reset_index(drop=True), os.path.join(path, f"part-{k:05d}"))
+
+_TIME_OF_DAY = None  # 'HH:MM:SS' for every second of a day, built on first use
+
+def _csv_field(value):
+    text = str(value)
+    return '"' + text.replace('"', '""') + '"' if any(c in text for c in ',"\n\r') else text
+
+def _csv_cells(series):
+    """Cell text per row, formatted once per distinct value (or per day / tenth for times and scores)."""
+    global _TIME_OF_DAY
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        pool = np.array([_csv_field(c) for c in series.cat.categories] + [''], dtype=object)
+        return pool[series.cat.codes.to_numpy()]
+    if series.dtype.kind == 'M':
+        if _TIME_OF_DAY is None:
+            seconds = np.arange(86400)
+            _TIME_OF_DAY = np.array([f" {h:02d}:{m:02d}:{s:02d}" for h, m, s in
+                                     zip(seconds // 3600, seconds // 60 % 60, seconds % 60)], dtype=object)
+        seconds = series.to_numpy('datetime64[s]').astype(np.int64)
+        days, codes = np.unique(seconds // 86400, return_inverse=True)
+        dates = np.array([str(day) for day in days.astype('datetime64[D]')], dtype=object)
+        return dates[codes] + _TIME_OF_DAY[seconds % 86400]
+    if series.dtype.kind == 'f':
+        tenths = np.round(series.to_numpy() * 10).astype(np.int64)
+        low = tenths.min() if len(tenths) else 0
+        pool = np.array([f"{t / 10:.1f}" for t in range(low, (tenths.max() if len(tenths) else 0) + 1)], dtype=object)
+        return pool[tenths - low]
+    return np.array([_csv_field(v) for v in series], dtype=object)
+
+def csv_text(frame):
+    """CSV rows (no header) for a generated chunk, assembled column-wise rather than by to_csv."""
+    if len(frame) == 0:
+        return ''
+    cells = [_csv_cells(frame[col]) for col in frame.columns]
+    rows = cells[0]
+    for column in cells[1:]:
+        rows = rows + ',' + column
+    return ''.join(rows + '\n')
+
+def iter_columnar(path, mmap_mode=None):
+    """Frames of a write_columnar() directory, in order."""
+    for part in sorted(entry for entry in os.listdir(path) if entry.startswith('part-')):
+        yield load_frame(os.path.join(path, part), mmap_mode=mmap_mode)
+
+class Reservoir:
+    """Uniform sample of ``k`` rows from a stream of frames in O(k) memory.
+
+    Algorithm R applied per frame: row i (0-based, global) replaces a
+    random slot with probability k / (i + 1); when several rows of a frame
+    hit one slot the last wins, as if processed one by one.
+    """
+
+    def __init__(self, k, seed=None):
+        self.k = k
+        self.rng = np.random.default_rng(seed)
+        self.rows = None
+        self.seen = 0
+
+    def add(self, frame):
+        frame = frame.reset_index(drop=True)
+        held = 0 if self.rows is None else len(self.rows)
+        fill = min(self.k - held, len(frame))
+        if fill > 0:
+            head = frame.iloc[:fill].assign(_position=np.arange(self.seen, self.seen + fill))
+            self.rows = head if self.rows is None else pd.concat([self.rows, head], ignore_index=True)
+        fill = max(fill, 0)
+        positions = np.arange(self.seen + fill, self.seen + len(frame))
+        slots = self.rng.integers(0, positions + 1)
+        hit = np.flatnonzero(slots < self.k)
+        if len(hit):
+            targets, last = np.unique(slots[hit][::-1], return_index=True)
+            rows = hit[::-1][last]
+            self.rows = pd.concat([self.rows.drop(index=targets),
+                                   frame.iloc[fill + rows].assign(_position=positions[rows])], ignore_index=True)
+        self.seen += len(frame)
+
+    def sample(self):
+        """The sampled rows, in stream order."""
+        if self.rows is None:
+            return pd.DataFrame(columns=COLUMNS)
+        return self.rows.sort_values('_position', kind='stable').drop(columns='_position').reset_index(drop=True)
+
+def reservoir_sample(frames, k, seed=None):
+    """Reservoir sample of ``k`` rows over an iterable of frames."""
+    reservoir = Reservoir(k, seed)
+    for frame in frames:
+        reservoir.add(frame)
+    return reservoir.sample()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synthetic forensic logs for load tests (chunked, seeded)")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--output', default='datasets/synthetic.csv')
+    parser.add_argument('--format', choices=['csv', 'columnar'], default='csv')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--user-skew', type=float, default=1.0, help='Zipf exponent of user activity (0 = uniform)')
+    parser.add_argument('--attack-rate', type=float, default=0.001, help='fraction of rows in injected kill chains')
+    parser.add_argument('--start', default='2026-01-01')
+    parser.add_argument('--span', default='1D')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    generator = SyntheticLogs(args.rows, users=args.users, user_skew=args.user_skew, attack_rate=args.attack_rate,
+                              start=args.start, span=args.span, seed=args.seed, chunk_rows=args.chunk_rows)
+    started = datetime.now()
+    if args.format == 'csv':
+        generator.write_csv(args.output)
+    else:
+        generator.write_columnar(args.output)
+    print(f"=== SYNTHETIC LOGS: {args.rows:,} rows ({args.format}) ===")
+    print(f"Saved {args.output} in {(datetime.now() - started).total_seconds():.1f}s")
+
+if __name__ == "__main__":
+    main()
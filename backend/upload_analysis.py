@@ -0,0 +1,124 @@
+import pandas as pd
+import os
+from datetime import datetime
+
+import jinja2
+
+from backend.metrics import timed
+
+RISK_COLUMNS = ['final_risk_score', 'finalriskscore', 'risk_score', 'riskscore']
+MITRE_COLUMNS = ['mitre_tag', 'mitretag']
+HIGH_RISK_THRESHOLD = 80
+TOP_N = 20
+DEFAULT_CHUNKSIZE = 100_000
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+REPORT_TEMPLATE = 'forensic_report.html'
+
+class UploadAggregator:
+    """Running /analyze aggregates over CSV chunks, O(chunk) memory.
+
+    Keeps the high-risk count, the set of MITRE tags, the top-N rows by risk
+    and the (MITRE tag, action) counts; nothing else from a chunk survives.
+    """
+
+    def __init__(self, top_n=TOP_N):
+        self.top_n = top_n
+        self.total = 0
+        self.highrisk = 0
+        self.risk_col = None
+        self.mitre_col = None
+        self.mitre_tags = set()
+        self.top = None
+        self.heatmap = None
+        self.columns = None
+
+    def add(self, chunk):
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+            self.risk_col = next((col for col in RISK_COLUMNS if col in chunk.columns), None)
+            self.mitre_col = next((col for col in MITRE_COLUMNS if col in chunk.columns), None)
+        self.total += len(chunk)
+        if self.mitre_col:
+            self.mitre_tags.update(chunk[self.mitre_col].dropna().unique())
+        if not self.risk_col:
+            return
+        self.highrisk += int((chunk[self.risk_col] >= HIGH_RISK_THRESHOLD).sum())
+        # Earlier rows go first so ties resolve exactly like one nlargest() over the file
+        candidates = chunk.nlargest(self.top_n, self.risk_col)
+        self.top = candidates if self.top is None else \
+            pd.concat([self.top, candidates]).nlargest(self.top_n, self.risk_col)
+        if self.mitre_col:
+            counts = chunk.groupby([self.mitre_col, 'action']).size()
+            self.heatmap = counts if self.heatmap is None else self.heatmap.add(counts, fill_value=0)
+
+    def _column(self, name, default='N/A'):
+        """Top-row column like row.get(name, default), as a whole Series."""
+        return self.top[name] if name and name in self.top else pd.Series(default, index=self.top.index)
+
+    def result(self):
+        """Summary in the shape /api/results serves (minus the timestamp)."""
+        risk_col, mitre_col = self.risk_col, self.mitre_col
+        precision = round((self.highrisk / self.total * 100), 1) if self.total > 0 else 0.0
+        top_threats = []
+        heatmap_data = {}
+        timeline_data = []
+        if risk_col:
+            risk = self.top[risk_col].astype(float)
+            threats = pd.DataFrame({
+                "user": self._column('user'),
+                "action": self._column('action'),
+                "risk": risk,
+                "mitre": self._column(mitre_col),
+            })
+            threats["explain"] = (threats["action"].astype(str) + " by " + threats["user"].astype(str)
+                                  + " matches MITRE " + threats["mitre"].astype(str).str[:6])
+            top_threats = threats.to_dict('records')
+            timeline_data = pd.DataFrame({"time": self._column('timestamp', 'Unknown'), "risk": risk}).to_dict('records')
+
+            # MITRE Heatmap
+            if mitre_col and self.heatmap is not None:
+                heatmap = self.heatmap.sort_index()
+                keys = (heatmap.index.get_level_values(0).astype(str).str[:10] + "|"
+                        + heatmap.index.get_level_values(1).astype(str))
+                heatmap_data = dict(zip(keys, heatmap.astype(int).tolist()))
+        return {
+            "highrisk": self.highrisk, "precision": precision, "mitrecount": len(self.mitre_tags),
+            "total": self.total, "threats": top_threats, "heatmap": heatmap_data,
+            "timeline": timeline_data,
+        }
+
+@timed('upload_analysis', rows=lambda summary: summary['total'])
+def analyze_csv(fileobj, chunksize=DEFAULT_CHUNKSIZE, on_chunk=None):
+    """Stream a CSV (path or binary file object) through UploadAggregator.
+
+    ``on_chunk(rows_so_far)`` runs after every chunk (progress reporting and
+    cancellation for pool jobs, see backend.jobs.checkpoint).
+    """
+    aggregator = UploadAggregator()
+    for chunk in pd.read_csv(fileobj, chunksize=chunksize):
+        aggregator.add(chunk)
+        if on_chunk is not None:
+            on_chunk(aggregator.total)
+    return aggregator.result()
+
+_report_env = None
+
+def render_upload_report(data):
+    """Stream the /analyze forensic report as rendered chunks (templates/forensic_report.html)."""
+    global _report_env
+    if _report_env is None:
+        # Same options as the dashboard's Jinja2Templates, usable in pool workers without FastAPI
+        _report_env = jinja2.Environment(loader=jinja2.FileSystemLoader(TEMPLATE_DIR), autoescape=True)
+    return _report_env.get_template(REPORT_TEMPLATE).generate(**data)
+
+def analyze_upload(source, report_path, on_chunk=None, **fields):
+    """/analyze body: summary of an uploaded CSV plus its forensic report, written to ``report_path``.
+
+    ``fields`` (analysis_id, tenant, ...) are added to the result. Runs in a
+    pool worker or in-process; it only needs the file and the output path.
+    """
+    summary = analyze_csv(source, on_chunk=on_chunk)
+    result = {**summary, "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), **fields}
+    with timed("upload_report"), open(report_path, "w", encoding="utf-8") as f:
+        f.writelines(render_upload_report(result))
+    return result
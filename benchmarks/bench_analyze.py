@@ -0,0 +1,97 @@
+"""/analyze benchmark: chunked, vectorized result building vs the original handler body.
+
+Writes synthetic uploads at each size, checks the summaries match, and
+times parse + aggregate + result building + report rendering.
+
+    python benchmarks/bench_analyze.py --sizes 10000 100000 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+os.chdir(project_root)
+
+from backend.dashboard import render_report
+
+# Value pools of the original /generate_dataset, which these uploads mimic
+MITRE_TAGS = ["TA0001", "TA0002", "TA0004", "TA0008", "TA0010", "T1201", "T1059", "T1078"]
+ACTIONS = ["login", "usbinsert", "fileaccess", "privilegeescalation", "dataexfil"]
+USERS = ["user1", "user2", "admin", "guest"]
+from backend.upload_analysis import analyze_csv
+
+def legacy_analyze(path):
+    """Original /analyze body: whole-file parse, iterrows builders, html += report."""
+    df = pd.read_csv(path)
+    risk_col = next((col for col in ['final_risk_score', 'finalriskscore', 'risk_score', 'riskscore'] if col in df.columns), None)
+    highrisk = len(df[df[risk_col] >= 80]) if risk_col else 0
+    precision = round((highrisk / len(df) * 100), 1) if len(df) > 0 else 0.0
+    mitre_col = next((col for col in ['mitre_tag', 'mitretag'] if col in df.columns), None)
+    mitrecount = df[mitre_col].nunique() if mitre_col else 0
+    top_threats, heatmap_data, timeline_data = [], {}, []
+    if risk_col:
+        for _, row in df.nlargest(20, risk_col).iterrows():
+            top_threats.append({
+                "user": row.get('user', 'N/A'), "action": row.get('action', 'N/A'), "risk": float(row[risk_col]),
+                "mitre": row.get(mitre_col, 'N/A') if mitre_col else 'N/A',
+                "explain": f"{row.get('action', 'N/A')} by {row.get('user', 'N/A')} matches MITRE {row.get(mitre_col, 'N/A')[:6]}"})
+            timeline_data.append({"time": row.get('timestamp', 'Unknown'), "risk": float(row[risk_col])})
+        if mitre_col:
+            for _, row in df.groupby([mitre_col, 'action']).size().reset_index(name='count').iterrows():
+                heatmap_data[f"{row[mitre_col][:10]}|{row['action']}"] = int(row['count'])
+    data = {"highrisk": highrisk, "precision": precision, "mitrecount": int(mitrecount), "total": len(df),
+            "threats": top_threats, "heatmap": heatmap_data, "timeline": timeline_data}
+    html = "<table>"
+    for t in data['threats']:
+        html += f"<tr><td>{t['user']}</td><td>{t['action']}</td><td>{t['risk']}</td><td>{t['mitre']}</td></tr>"
+    return data, html + "</table>"
+
+def current_analyze(path):
+    data = analyze_csv(path)
+    return data, "".join(render_report(data))
+
+def write_upload(path, n, seed=42):
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('2026-01-01T00:00')
+    action = rng.choice(ACTIONS, n)
+    risk = rng.uniform(20, 70, n) + np.isin(action, ["usbinsert", "privilegeescalation"]) * 50 + rng.uniform(-10, 20, n)
+    pd.DataFrame({
+        'timestamp': pd.Series(start + rng.integers(0, 1440, n).astype('timedelta64[m]')).dt.strftime('%Y-%m-%d %H:%M'),
+        'user': rng.choice(USERS, n),
+        'action': action,
+        'final_risk_score': risk.round(1),
+        'mitre_tag': rng.choice(MITRE_TAGS, n),
+    }).to_csv(path, index=False)
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--legacy-max', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'current s':>10} {'legacy s':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            path = os.path.join(tmp, f"upload_{n}.csv")
+            write_upload(path, n)
+            (data, _), fast_s = timed(current_analyze, path)
+            if n <= args.legacy_max:
+                (legacy, _), slow_s = timed(legacy_analyze, path)
+                assert data == legacy, f"summary mismatch at {n} rows"
+                print(f"{n:>12,} {fast_s:>10.2f} {slow_s:>10.2f} {slow_s / fast_s:>7.1f}x")
+            else:
+                print(f"{n:>12,} {fast_s:>10.2f} {'-':>10} {'-':>8}")
+
+if __name__ == "__main__":
+    main()
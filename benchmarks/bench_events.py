@@ -0,0 +1,107 @@
+"""Event representation benchmark: compact (categorical, narrow int) frames vs plain object strings.
+
+Checks that get_timeline's categorical decode matches the original string
+JOIN and that M3-M11 give the same values on compact and plain input, then
+reports per size: timeline load time, memory per event at each stage and
+the traced peak allocation of loading the timeline and running the stages
+(every stage output stays alive, as in the pipeline).
+
+    python benchmarks/bench_events.py --sizes 100000 1000000
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backend.events import event_bytes
+from backend.ingestion import get_timeline, stream_csv_log
+from backend.m10_adaptive import get_mitre_map
+from backend.m11_privacy import Pseudonymizer
+from backend.pipeline import Pipeline
+from backend.synthetic import SyntheticLogs
+from bench_features import assert_values_equal
+
+STAGES = ['timeline', 'features', 'risk', 'explained', 'adaptive', 'anonymized']
+
+def legacy_get_timeline(db_path):
+    """Original read: dictionary strings joined in SQL, nanosecond timestamps."""
+    conn = sqlite3.connect(db_path)
+    try:
+        df = pd.read_sql(
+            "SELECT e.ts AS timestamp, d_user.value AS user, d_action.value AS action, "
+            "d_source_ip.value AS source_ip, d_status.value AS status FROM events e "
+            "LEFT JOIN dict_user d_user ON d_user.id = e.user_id "
+            "LEFT JOIN dict_action d_action ON d_action.id = e.action_id "
+            "LEFT JOIN dict_source_ip d_source_ip ON d_source_ip.id = e.source_ip_id "
+            "LEFT JOIN dict_status d_status ON d_status.id = e.status_id "
+            "ORDER BY e.ts, e.rowid", conn)
+    finally:
+        conn.close()
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
+    return df
+
+def run_stages(timeline, params):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Pipeline().run({'timeline': timeline}, targets=['anonymized'], params=params)
+
+def traced_peak(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    params = {'adaptive': {'mapping': get_mitre_map(os.path.join(project_root, 'docs', 'mitre_mapping.yml'))},
+              'anonymized': {'pseudonymizer': Pseudonymizer(b'\0' * 32)}}
+    scratch = tempfile.mkdtemp(prefix='bench_events_')
+    print(f"{'rows':>10} {'mode':>8} {'load s':>7} {'stages s':>9} {'peak MB':>8}  bytes/event " + " ".join(STAGES))
+    for n in args.sizes:
+        csv_path, db_path = os.path.join(scratch, f'{n}.csv'), os.path.join(scratch, f'{n}.sqlite')
+        SyntheticLogs(n, seed=args.seed).write_csv(csv_path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            stream_csv_log(csv_path, db_path, progress=None)
+
+        start = time.perf_counter()
+        plain = legacy_get_timeline(db_path)
+        plain_s = time.perf_counter() - start
+        start = time.perf_counter()
+        compact = get_timeline(db_path=db_path)
+        compact_s = time.perf_counter() - start
+        assert_values_equal(compact, plain)
+
+        outputs = {}
+        for mode, timeline, load_s, load in (('plain', plain, plain_s, lambda: legacy_get_timeline(db_path)),
+                                             ('compact', compact, compact_s, lambda: get_timeline(db_path=db_path))):
+            start = time.perf_counter()
+            outputs[mode] = {'timeline': timeline, **run_stages(timeline, params)}
+            stages_s = time.perf_counter() - start
+            peak = traced_peak(lambda: run_stages(load(), params))
+            sizes = " ".join(f"{event_bytes(outputs[mode][stage]):.0f}" for stage in STAGES)
+            print(f"{n:>10,} {mode:>8} {load_s:>7.2f} {stages_s:>9.2f} {peak:>8.0f}  {sizes}")
+        for stage in STAGES[1:]:
+            assert_values_equal(outputs['compact'][stage], outputs['plain'][stage])
+        os.remove(csv_path)
+    shutil.rmtree(scratch, ignore_errors=True)
+    print("check: compact timeline and stage outputs match plain strings")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""M8 benchmark: rule-table explain_risks vs the original per-row apply.
+
+    python benchmarks/bench_explain.py --sizes 1000000 10000000 --legacy-max 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from backend.explainable import explain_risks
+from backend.risk_scoring import MITRE_MAP
+
+def legacy_explain_incident(row):
+    """Original M8 explain_incident, kept for parity."""
+    explanations = []
+    if row['final_risk_score'] > 80:
+        explanations.append(f"Extreme risk score ({row['final_risk_score']:.1f})")
+    if 'usb' in str(row['action']).lower():
+        explanations.append("USB insert (MITRE T1201: Exploitation)")
+    elif 'login' in str(row['action']).lower():
+        explanations.append("Repeated logins flagged")
+    if 'T1201' in str(row['mitre_tag']):
+        explanations.append("Client execution technique")
+    if row['risk_level'] == 'HIGH':
+        explanations.append("Classified as critical incident")
+    top_reasons = explanations[:3]
+    return '; '.join(top_reasons) if top_reasons else "Routine activity"
+
+def make_risks(n, seed=42):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'action': rng.choice(list(MITRE_MAP) + ['dataexfil'], n),
+        'final_risk_score': np.round(rng.uniform(0, 100, n), 1),
+    })
+    df['mitre_tag'] = df['action'].map(MITRE_MAP).fillna('Recon')
+    df['risk_level'] = pd.cut(df['final_risk_score'], bins=[0, 30, 70, 100], labels=['LOW', 'MEDIUM', 'HIGH'])
+    return df
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--legacy-max', type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'rules s':>8} {'legacy s':>9} {'speedup':>8}")
+    for n in args.sizes:
+        df = make_risks(n)
+        fast, fast_s = timed(explain_risks, df)
+        if n <= args.legacy_max:
+            slow, slow_s = timed(df.apply, legacy_explain_incident, axis=1)
+            assert (fast['explanation'] == slow).all(), "explain_risks differs from the legacy rules"
+            print(f"{n:>12,} {fast_s:>8.2f} {slow_s:>9.2f} {slow_s / fast_s:>7.1f}x")
+        else:
+            print(f"{n:>12,} {fast_s:>8.2f} {'-':>9} {'-':>8}")
+
+if __name__ == "__main__":
+    main()
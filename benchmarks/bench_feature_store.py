@@ -0,0 +1,106 @@
+"""M3 feature store benchmark: append_batch (incremental) vs recomputing features over the archive.
+
+Checks that a batch whose feature write fails leaves nothing behind (no
+events, dictionary codes, features or state) and that a failed rebuild
+keeps the previous features, then reports per-batch append time as the
+archive grows against a full engineer_features pass over it.
+
+    python benchmarks/bench_feature_store.py --rows 1000000 --batch 10000
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from backend import feature_store
+from backend.feature_store import append_batch, load_features, rebuild_features
+from backend.features import engineer_features
+from backend.synthetic import SyntheticLogs
+
+TABLES = ['events', 'event_attributes', 'dict_user', 'event_features', 'feature_state']
+
+def table_counts(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in TABLES}
+    finally:
+        conn.close()
+
+@contextlib.contextmanager
+def failing(name):
+    """Make feature_store.``name`` raise for the duration of the block."""
+    original = getattr(feature_store, name)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError(f"forced failure in {name}")
+
+    setattr(feature_store, name, fail)
+    try:
+        yield
+    finally:
+        setattr(feature_store, name, original)
+
+def check(scratch):
+    db_path = os.path.join(scratch, 'check.sqlite')
+    frames = list(SyntheticLogs(6000, seed=5, chunk_rows=2000).chunks())
+    append_batch(frames[0], db_path)
+    before, loaded = table_counts(db_path), len(load_features(db_path=db_path))
+    new_users = frames[1].assign(user=frames[1]['user'].astype(str) + '_new')
+    for name in ('_update_features', '_save_state'):  # before and after event_features is written
+        with failing(name):
+            try:
+                append_batch(new_users, db_path)
+                raise AssertionError(f"{name} failure not raised")
+            except RuntimeError:
+                pass
+        assert table_counts(db_path) == before, (name, table_counts(db_path), before)
+    assert len(load_features(db_path=db_path)) == loaded
+    append_batch(frames[1], db_path)
+    features = load_features(db_path=db_path)
+    with failing('_save_state'), contextlib.redirect_stdout(io.StringIO()):
+        try:
+            rebuild_features(db_path, chunksize=1000)
+            raise AssertionError("rebuild failure not raised")
+        except RuntimeError:
+            pass
+    pd.testing.assert_frame_equal(load_features(db_path=db_path), features)
+    print("check: failed appends and rebuilds commit nothing")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--batch', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix='bench_feature_store_')
+    try:
+        check(scratch)
+        db_path = os.path.join(scratch, 'store.sqlite')
+        archive = []
+        print(f"{'archive rows':>13} {'append ms':>10} {'recompute ms':>13}")
+        for i, batch in enumerate(SyntheticLogs(args.rows, seed=args.seed, chunk_rows=args.batch).chunks()):
+            start = time.perf_counter()
+            append_batch(batch, db_path)
+            append_ms = (time.perf_counter() - start) * 1000
+            archive.append(batch)
+            if i % 5 == 0:
+                start = time.perf_counter()
+                engineer_features(pd.concat(archive, ignore_index=True))
+                recompute_ms = (time.perf_counter() - start) * 1000
+                print(f"{sum(map(len, archive)):>13,} {append_ms:>10.1f} {recompute_ms:>13.1f}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
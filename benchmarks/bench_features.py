@@ -0,0 +1,95 @@
+"""M3 benchmark: vectorized engineer_features vs the original row-wise version.
+
+Checks parity against the legacy implementation on every size where the
+legacy path is run (values only: flags and counts are narrower ints, and
+compact categorical input must give the same features as plain strings),
+then times the vectorized engine alone at larger sizes.
+
+    python benchmarks/bench_features.py --sizes 1000000 10000000 --legacy-max 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from backend.events import compact_events
+from backend.features import engineer_features
+
+def legacy_engineer_features(df):
+    """Original M3 implementation (apply/transform lambdas), kept for parity."""
+    features = df.copy()
+    features['login_hour'] = pd.to_datetime(features['timestamp']).dt.hour
+    features['events_per_user'] = features.groupby('user')['user'].transform('count')
+    features['failed_logins'] = features.apply(lambda row: 1 if row['action'] == 'login' and row['status'] == 'fail' else 0, axis=1)
+    features['failed_logins'] = features.groupby('user')['failed_logins'].transform('cumsum')
+    features['is_suspicious_action'] = features['action'].isin(['usb_insert', 'privilege_escalation']).astype(int)
+    features['ip_change'] = features.groupby('user')['source_ip'].transform(lambda x: x.ne(x.shift()).cumsum())
+    return features[['timestamp', 'user', 'action', 'source_ip', 'status', 'login_hour', 'events_per_user', 'failed_logins', 'is_suspicious_action', 'ip_change']]
+
+def make_timeline(n, n_users=5000, n_ips=20000, seed=42):
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('2026-01-01T00:00:00')
+    return pd.DataFrame({
+        'timestamp': np.sort(start + rng.integers(0, 30 * 86400, n).astype('timedelta64[s]')),
+        'user': pd.Categorical.from_codes(rng.integers(0, n_users, n), [f'user{i}' for i in range(n_users)]).astype(object),
+        'action': rng.choice(['login', 'file_access', 'usb_insert', 'privilege_escalation'], n, p=[0.5, 0.4, 0.05, 0.05]),
+        'source_ip': pd.Categorical.from_codes(rng.integers(0, n_ips, n), [f'10.0.{i // 256}.{i % 256}' for i in range(n_ips)]).astype(object),
+        'status': rng.choice(['success', 'fail'], n, p=[0.9, 0.1]),
+    })
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+def assert_values_equal(fast, slow):
+    """Frames equal up to the compact dtypes (categorical strings, narrow ints)."""
+    plain = lambda df: df.apply(lambda s: s.astype(object) if isinstance(s.dtype, pd.CategoricalDtype) else s)
+    pd.testing.assert_frame_equal(plain(fast), plain(slow), check_dtype=False)
+
+def check_parity():
+    """Edge cases the random timeline does not hit: missing users and IPs.
+
+    Missing IPs are NaN as read_csv produces them; the legacy path treats a
+    leading None differently from NaN, which the vectorized path does not copy.
+    """
+    df = pd.DataFrame({
+        'timestamp': ['2026-01-01 10:00', '2026-01-01 11:00', '2026-01-01 12:00', '2026-01-01 13:00', '2026-01-01 14:00'],
+        'user': ['user1', None, 'user1', 'user2', 'user1'],
+        'action': ['login', 'login', 'login', 'usb_insert', 'login'],
+        'source_ip': ['1.1.1.1', '2.2.2.2', np.nan, np.nan, '1.1.1.1'],
+        'status': ['fail', 'fail', 'fail', 'success', 'success'],
+    })
+    assert_values_equal(engineer_features(df), legacy_engineer_features(df))
+    df = make_timeline(50_000, n_users=50, n_ips=20)
+    assert_values_equal(engineer_features(df), legacy_engineer_features(df))
+    assert_values_equal(engineer_features(compact_events(df)), legacy_engineer_features(df))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--legacy-max', type=int, default=1_000_000,
+                        help='largest size to also run (and parity-check) the legacy path on')
+    args = parser.parse_args()
+
+    check_parity()
+    print("Parity with legacy engineer_features: OK")
+    print(f"{'rows':>12} {'vectorized s':>13} {'legacy s':>10} {'speedup':>8}")
+    for n in args.sizes:
+        df = make_timeline(n)
+        fast, fast_s = timed(engineer_features, df)
+        if n <= args.legacy_max:
+            slow, slow_s = timed(legacy_engineer_features, df)
+            assert_values_equal(fast, slow)
+            print(f"{n:>12,} {fast_s:>13.2f} {slow_s:>10.2f} {slow_s / fast_s:>7.1f}x")
+        else:
+            print(f"{n:>12,} {fast_s:>13.2f} {'-':>10} {'-':>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""/analyze execution benchmark: process-pool jobs vs the original in-thread analysis.
+
+Checks the job scheduler (per-tenant limits, round-robin fairness,
+cancellation, recovery from a crashed worker), then runs concurrent
+uploads against the app in-process while a probe pings a cheap endpoint,
+and reports upload throughput and probe latency (event-loop responsiveness).
+
+    python benchmarks/bench_jobs.py --sizes 200000 1000000 --uploads 4
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from backend.jobs import JobCancelled, JobLimitError, JobManager, checkpoint
+from backend.synthetic import SyntheticLogs
+
+def _sleep_job(seconds, steps=20):
+    for i in range(steps):
+        time.sleep(seconds / steps)
+        checkpoint(i + 1)
+    return seconds
+
+def _crash_job():
+    os._exit(1)
+
+def check():
+    manager = JobManager(max_workers=2, per_tenant=1, max_queued=2)
+    manager.warm()
+    busy = [manager.submit('a', _sleep_job, (0.3,)) for _ in range(2)]
+    other = manager.submit('b', _sleep_job, (0.3,))
+    assert [job.status for job in busy + [other]] == ['running', 'queued', 'running'], "per-tenant limit / fairness"
+    manager.submit('a', _sleep_job, (0.3,))
+    try:
+        manager.submit('a', _sleep_job, (0.3,))
+        raise AssertionError("queue limit not enforced")
+    except JobLimitError:
+        pass
+    assert manager.cancel(busy[0].id)
+    try:
+        busy[0].outcome.result(timeout=10)
+        raise AssertionError("cancelled job completed")
+    except JobCancelled:
+        pass
+    assert busy[1].outcome.result(timeout=10) == 0.3 and other.outcome.result(timeout=10) == 0.3
+    crashed = manager.submit('c', _crash_job)
+    try:
+        crashed.outcome.result(timeout=30)
+    except RuntimeError:
+        pass
+    assert crashed.status == 'failed', crashed.status
+    assert manager.submit('c', _sleep_job, (0.05,)).outcome.result(timeout=60) == 0.05, "pool not restarted"
+    manager.shutdown()
+    print("check: tenant limits, round-robin, queue limit, cancellation and worker-crash recovery OK")
+
+async def probe(client, stop, latencies, interval=0.02):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get('/api/heatmap')
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+
+async def load(app, bodies, upload):
+    import httpx
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+        stop, latencies = asyncio.Event(), []
+        prober = asyncio.create_task(probe(client, stop, latencies))
+        start = time.perf_counter()
+        await asyncio.gather(*[upload(client, i, body) for i, body in enumerate(bodies)])
+        seconds = time.perf_counter() - start
+        stop.set()
+        await prober
+    return seconds, latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[200_000, 1_000_000])
+    parser.add_argument('--uploads', type=int, default=4, help='concurrent uploads (one tenant each)')
+    args = parser.parse_args()
+
+    check()
+    os.environ.setdefault('AUDIT_LOG_PATH', os.path.join(tempfile.gettempdir(), 'bench_jobs_audit.jsonl'))
+    os.chdir(project_root)
+    from backend import dashboard
+    dashboard.jobs.warm()
+
+    async def pooled(client, i, body):
+        response = await client.post('/analyze', files={'file': ('upload.csv', body)},
+                                     headers={'X-Tenant-ID': f'bench-pool-{time.time_ns()}-{i}'})
+        assert response.status_code == 200, response.text
+
+    async def legacy(client, i, body):
+        # Original handler body: the whole analysis in a thread of this process
+        tenant = f'bench-thread-{time.time_ns()}-{i}'
+        with tempfile.TemporaryFile() as f:
+            f.write(body)
+            await asyncio.to_thread(dashboard.run_analysis, f, tenant)
+
+    print(f"{'rows':>10} {'mode':>7} {'uploads s':>10} {'rows/s':>11} {'probe p50 ms':>13} {'probe p99 ms':>13} {'max ms':>8}")
+    for n in args.sizes:
+        bodies = [b''.join(SyntheticLogs(n, seed=i).csv_chunks()) for i in range(args.uploads)]
+        for mode, upload in (('thread', legacy), ('pool', pooled)):
+            seconds, latencies = asyncio.run(load(dashboard.app, bodies, upload))
+            latencies.sort()
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(f"{n:>10,} {mode:>7} {seconds:>10.2f} {n * args.uploads / seconds:>11,.0f} "
+                  f"{statistics.median(latencies) * 1e3:>13.1f} {p99 * 1e3:>13.1f} {latencies[-1] * 1e3:>8.1f}")
+    dashboard.jobs.shutdown()
+
+if __name__ == "__main__":
+    main()
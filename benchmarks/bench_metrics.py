@@ -0,0 +1,78 @@
+"""Instrumentation benchmark: per-call cost of timed()/metrics and the sampling profiler's overhead.
+
+Checks that the Prometheus text is well formed (cumulative buckets, _count
+matching calls), then reports the fixed cost a timed stage call adds, the
+/metrics render time, and M3 feature engineering with the profiler off and on.
+
+    python benchmarks/bench_metrics.py --sizes 100000 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backend.features import engineer_features
+from backend.metrics import Registry, SamplingProfiler, STAGE_SECONDS, timed
+from bench_features import make_timeline
+
+def check():
+    registry = Registry()
+    latency = registry.histogram('check_seconds', 'check', ['stage'], buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.5, 5):
+        latency.observe(value, stage='a"b')
+    text = registry.render()
+    for line in ('check_seconds_bucket{stage="a\\"b",le="0.1"} 1', 'check_seconds_bucket{stage="a\\"b",le="1"} 3',
+                 'check_seconds_bucket{stage="a\\"b",le="+Inf"} 4', 'check_seconds_count{stage="a\\"b"} 4'):
+        assert line in text.splitlines(), (line, text)
+    before = STAGE_SECONDS.count(stage='bench_check')
+    noop = timed('bench_check')(lambda: None)
+    for _ in range(10):
+        noop()
+    assert STAGE_SECONDS.count(stage='bench_check') == before + 10
+    print("check: exposition format and call counts OK")
+
+def per_call(fn, calls=200_000):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--interval', type=float, default=0.01)
+    args = parser.parse_args()
+
+    check()
+    bare = per_call(lambda: None)
+    wrapped = per_call(timed('bench_overhead')(lambda: None))
+    print(f"timed() overhead: {(wrapped - bare) * 1e6:.2f} µs per call")
+    registry = Registry()
+    latency = registry.histogram('bench_seconds', 'bench', ['route'])
+    for i in range(200):
+        latency.observe(i / 1000, route=f'/route/{i}')
+    start = time.perf_counter()
+    text = registry.render()
+    print(f"render: {(time.perf_counter() - start) * 1e3:.1f} ms for 200 histogram series ({len(text) / 1024:.0f} KB)")
+
+    print(f"{'rows':>10} {'plain s':>8} {'profiled s':>11} {'overhead':>9} {'samples':>8}")
+    for n in args.sizes:
+        timeline = make_timeline(n)
+        start = time.perf_counter()
+        engineer_features(timeline)
+        plain = time.perf_counter() - start
+        profiler = SamplingProfiler(args.interval)
+        profiler.start()
+        start = time.perf_counter()
+        engineer_features(timeline)
+        profiled = time.perf_counter() - start
+        profiler.stop()
+        print(f"{n:>10,} {plain:>8.2f} {profiled:>11.2f} {profiled / plain - 1:>9.1%} {profiler.samples:>8}")
+        print("   hottest: " + ", ".join(f"{row['function']} ({row['self']})" for row in profiler.top(3)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""M10 benchmark: grouped apply_mitre_enhanced vs the original per-action loop.
+
+Checks parity with the legacy loop, then times tagging with the shipped
+mapping and with a large technique-level mapping (many actions).
+
+    python benchmarks/bench_mitre.py --sizes 1000000 10000000 --legacy-max 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backend.m10_adaptive import MitreMap, apply_mitre_enhanced, load_mitre_map, repeat_patterns
+from bench_features import assert_values_equal
+
+def legacy_apply_mitre_enhanced(df, mapping):
+    """Original M10 loop, kept for parity."""
+    df = df.copy()
+    df['mitre_tag'] = df['action'].map(mapping).fillna('Unknown')
+    pattern_counts = repeat_patterns(df)
+    for action, count in pattern_counts.items():
+        if count > 2:
+            df.loc[df['action']==action, 'final_risk_score'] *= 1.2
+            df['mitre_tag'] = df['mitre_tag'].where(df['action']!=action, f"{mapping.get(action, 'Unknown')} (Repeat x{count})")
+    df['risk_level'] = pd.cut(df['final_risk_score'], bins=[0,30,70,100], labels=['LOW','MEDIUM','HIGH'])
+    return df
+
+def make_risks(n, actions, seed=42):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'user': rng.choice([f'user{i}' for i in range(500)], n),
+        'action': rng.choice(actions, n),
+        'final_risk_score': np.round(rng.uniform(0, 100, n), 1),
+    })
+    df['risk_level'] = pd.cut(df['final_risk_score'], bins=[0, 30, 70, 100], labels=['LOW', 'MEDIUM', 'HIGH'])
+    return df
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--legacy-max', type=int, default=100_000)
+    parser.add_argument('--techniques', type=int, default=1_000, help='entries in the large mapping')
+    args = parser.parse_args()
+
+    shipped = load_mitre_map(os.path.join(project_root, 'docs', 'mitre_mapping.yml'))
+    large = {f'action_{i}': {'id': f'T{1000 + i % 9000}.{i % 1000:03d}', 'name': f'Technique {i}'}
+             for i in range(args.techniques)}
+    large_tags = {action: f"{entry['id']} - {entry['name']}" for action, entry in large.items()}
+    cases = [('shipped', shipped, shipped, list(shipped) + ['dataexfil']),
+             (f'{args.techniques} techniques', large, large_tags, list(large) + ['dataexfil'])]
+
+    print(f"{'mapping':>16} {'rows':>12} {'grouped s':>10} {'legacy s':>9} {'speedup':>8}")
+    for label, mapping, tag_map, actions in cases:
+        compiled = MitreMap(mapping)
+        for n in args.sizes:
+            df = make_risks(n, actions)
+            fast, fast_s = timed(apply_mitre_enhanced, df, compiled)
+            if n <= args.legacy_max:
+                slow, slow_s = timed(legacy_apply_mitre_enhanced, df, tag_map)
+                assert_values_equal(fast, slow)
+                print(f"{label:>16} {n:>12,} {fast_s:>10.2f} {slow_s:>9.2f} {slow_s / fast_s:>7.1f}x")
+            else:
+                print(f"{label:>16} {n:>12,} {fast_s:>10.2f} {'-':>9} {'-':>8}")
+
+if __name__ == "__main__":
+    main()
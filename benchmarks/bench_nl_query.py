@@ -0,0 +1,126 @@
+"""M9 benchmark: indexed IncidentIndex.search vs the original copy-and-scan nl_query.
+
+Checks every query's match count and first page against a brute-force
+mask over the whole table, then reports per-query latency.
+
+    python benchmarks/bench_nl_query.py --rows 20000000 --no-check
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from backend.nl_query import IncidentIndex
+
+QUERIES = [
+    "show high risk USB events",
+    "high risk for user1",
+    "all logins",
+    "critical usb last 3 days",
+    "user42 user43 logins between 2026-01-05 and 2026-01-07",
+    "T1201 medium",
+    "privilege escalation for user7 on 2026-01-10",
+    "usb or login since 2026-01-20",
+    "login by user999999",  # constraints that match nothing
+    "data exfil events",
+    "low risk T1234",
+]
+
+def legacy_nl_query(df, query):
+    """Original M9 filtering (full copy + str.contains scans), kept for timing."""
+    query_lower = query.lower()
+    results = df.copy()
+    if 'high' in query_lower or 'critical' in query_lower:
+        results = results[results['risk_level'] == 'HIGH']
+    if 'usb' in query_lower:
+        results = results[results['action'].str.contains('usb', case=False, na=False)]
+    if any(user in query_lower for user in ['user1', 'user2', 'user3']):
+        results = results[results['user'].str.lower().str.contains(re.search(r'user\d', query_lower).group(), na=False)]
+    if 'login' in query_lower:
+        results = results[results['action'].str.contains('login', case=False, na=False)]
+    return results
+
+def make_incidents(n, n_users=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    actions = ['login', 'file_access', 'usb_insert', 'privilege_escalation', 'dataexfil']
+    tags = ['TA0001 - Initial Access', 'TA0002 - Execution', 'T1201 - Exploitation for Client Execution',
+            'TA0004 - Privilege Escalation']
+    return pd.DataFrame({
+        'timestamp': np.datetime64('2026-01-01') + np.sort(rng.integers(0, 30 * 86400, n)).astype('timedelta64[s]'),
+        'user': pd.Categorical.from_codes(rng.integers(0, n_users, n), [f'user{i}' for i in range(n_users)]),
+        'action': pd.Categorical.from_codes(rng.choice(5, n, p=[.5, .3, .08, .07, .05]), actions),
+        'final_risk_score': np.round(rng.uniform(0, 100, n), 1),
+        'risk_level': pd.Categorical.from_codes(rng.choice(3, n, p=[.5, .3, .2]), ['LOW', 'MEDIUM', 'HIGH']),
+        'mitre_tag': pd.Categorical.from_codes(rng.integers(0, 4, n), tags),
+    })
+
+def brute_force(df, plan, lower):
+    """Matching rows for a QueryPlan by full-column masks (``lower``: lowercased string columns)."""
+    mask = np.ones(len(df), dtype=bool)
+    if plan.risk_levels:
+        mask &= df['risk_level'].isin(plan.risk_levels).to_numpy()
+    if plan.action_terms:
+        action = lower['action']
+        mask &= np.logical_or.reduce([action.str.contains(term, regex=False).to_numpy() for term in plan.action_terms])
+    if plan.mitre:
+        tag = lower['mitre_tag']
+        mask &= np.logical_or.reduce([tag.str.contains(t.lower(), regex=False).to_numpy() for t in plan.mitre])
+    users = set(plan.users) | {word for word in plan.words if word in lower['users']}
+    if users:
+        mask &= lower['user'].isin(users).to_numpy()
+    ts = df['timestamp']
+    start, end = plan.start, plan.end
+    if plan.last is not None:
+        start = max(start, ts.max() - plan.last) if start is not None else ts.max() - plan.last
+        end = min(end, ts.max() + pd.Timedelta(1)) if end is not None else ts.max() + pd.Timedelta(1)
+    if start is not None:
+        mask &= (ts >= start).to_numpy()
+    if end is not None:
+        mask &= (ts < end).to_numpy()
+    return np.flatnonzero(mask)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--no-check', action='store_true', help='skip the brute-force check (large tables)')
+    parser.add_argument('--legacy', action='store_true', help='also time the original nl_query filtering')
+    args = parser.parse_args()
+
+    df = make_incidents(args.rows)
+    index = IncidentIndex(df)
+    start = time.perf_counter()
+    for query in QUERIES:
+        index.search(query)
+    print(f"Index build (lazy, first queries): {time.perf_counter() - start:.2f}s over {args.rows:,} rows")
+
+    if not args.no_check:
+        lower = {col: df[col].astype(str).str.lower() for col in ('user', 'action', 'mitre_tag')}
+        lower['users'] = set(lower['user'].unique())
+    if args.legacy:
+        legacy_df = df.astype({'user': object, 'action': object, 'risk_level': object, 'mitre_tag': object})
+
+    print(f"{'indexed ms':>11} {'legacy ms':>10} {'matches':>10}  query")
+    for query in QUERIES:
+        start = time.perf_counter()
+        result = index.search(query, page=1)
+        fast_ms = (time.perf_counter() - start) * 1000
+        if not args.no_check:
+            expected = brute_force(df, result['plan'], lower)
+            assert result['total'] == len(expected), query
+            assert (result['rows'].index.to_numpy() == expected[10:20]).all(), query
+        legacy_ms = '-'
+        if args.legacy:
+            start = time.perf_counter()
+            legacy_nl_query(legacy_df, query)
+            legacy_ms = f"{(time.perf_counter() - start) * 1000:.1f}"
+        print(f"{fast_ms:>11.1f} {legacy_ms:>10} {result['total']:>10,}  {query}")
+
+if __name__ == "__main__":
+    main()
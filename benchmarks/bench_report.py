@@ -0,0 +1,88 @@
+"""M12 benchmark: streamed Report (HTML/JSON/NDJSON) vs the original one-string render.
+
+Writes each format to a temp dir, checks that every incident is present
+(HTML rows, JSON/NDJSON records round-trip) and reports time, output size
+and the largest chunk held in memory at once.
+
+    python benchmarks/bench_report.py --sizes 1000000 --legacy-max 1000000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from backend.m12_report import FORMATS, render_report, write_report
+
+def legacy_render_report(df):
+    """Original M12 f-string report (top 5 + value_counts), kept for timing."""
+    return f"""
+<h2>Executive Summary</h2>
+<p>{len(df[df['risk_level']=='HIGH'])} HIGH-risk incidents detected (anonymized).</p>
+<h2>Top 5 Threats</h2>
+{ df.nlargest(5,'final_risk_score')[['user','action','final_risk_score','mitre_tag','explanation']].to_html(classes='table') }
+<h2>MITRE Techniques</h2>
+<p>{df['mitre_tag'].value_counts().to_dict()}</p>
+"""
+
+def make_incidents(n, n_users=2000, seed=7):
+    rng = np.random.default_rng(seed)
+    tags = ['TA0001 - Initial Access', 'TA0002 - Execution (Repeat x9)', 'T1201 - Exploitation for Client Execution',
+            'TA0004 - Privilege Escalation', 'Unknown']
+    reasons = ['Repeated logins flagged', 'USB insert (MITRE T1201: Exploitation); Client <execution> technique',
+               'Routine activity', 'Classified as critical incident']
+    score = np.round(rng.uniform(0, 100, n), 1)
+    return pd.DataFrame({
+        'user': np.array([f'{i:08x}' for i in range(n_users)], dtype=object)[rng.integers(0, n_users, n)],
+        'action': rng.choice(['login', 'file_access', 'usb_insert', 'privilege_escalation', 'dataexfil'], n),
+        'final_risk_score': score,
+        'risk_level': pd.cut(score, bins=[0, 30, 70, 100], labels=['LOW', 'MEDIUM', 'HIGH']),
+        'mitre_tag': rng.choice(tags, n),
+        'explanation': rng.choice(reasons, n),
+    })
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--legacy-max', type=int, default=1_000_000)
+    parser.add_argument('--page-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'format':>7} {'stream s':>9} {'MB':>8} {'max chunk KB':>13} {'legacy s':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            df = make_incidents(n)
+            legacy = '-'
+            if n <= args.legacy_max:
+                start = time.perf_counter()
+                legacy_render_report(df)
+                legacy = f"{time.perf_counter() - start:.2f}"
+            report = render_report(df, page_size=args.page_size)
+            for fmt in FORMATS:
+                path = os.path.join(tmp, f'report.{fmt}')
+                start = time.perf_counter()
+                write_report(report, path, fmt)
+                seconds = time.perf_counter() - start
+                max_chunk = max(len(chunk) for chunk in report.chunks(fmt))
+                if fmt == 'html':
+                    with open(path, encoding='utf-8') as f:
+                        rows = sum(line.startswith('<tr><td>') for line in f)
+                    assert rows >= n, (rows, n)
+                elif fmt == 'json':
+                    with open(path) as f:
+                        assert len(json.load(f)['incidents']) == n
+                else:
+                    back = pd.read_json(path, lines=True)
+                    assert len(back) == n and np.isclose(back['final_risk_score'].sum(), df['final_risk_score'].sum())
+                print(f"{n:>10,} {fmt:>7} {seconds:>9.2f} {os.path.getsize(path) / 2**20:>8.1f} "
+                      f"{max_chunk / 1024:>13.0f} {legacy if fmt == 'html' else '':>9}")
+
+if __name__ == "__main__":
+    main()
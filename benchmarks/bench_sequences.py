@@ -0,0 +1,68 @@
+"""M6.1 benchmark: array-based sequence mining vs the original groupby loop.
+
+Checks tumbling-window parity with the legacy temporal_patterns loop, then
+times tumbling sequences, n-gram ranking and kill-chain search.
+
+    python benchmarks/bench_sequences.py --sizes 1000000 5000000 --legacy-max 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backend.detection.sequence_mining import tumbling_sequences, top_patterns, find_kill_chains
+from bench_features import make_timeline
+
+ACTIONS = ['login', 'file_access', 'usb_insert', 'privilege_escalation', 'dataexfil']
+
+def legacy_sequences(timeline):
+    """Original M6.1 loop (groupby over 1h floors), kept for parity."""
+    timeline = timeline.copy()
+    timeline['timestamp'] = pd.to_datetime(timeline['timestamp'])
+    timeline = timeline.sort_values('timestamp', kind='stable')
+    timeline['window'] = timeline['timestamp'].dt.floor('1h')
+    sequences = []
+    for (user, window), group in timeline.groupby(['user', 'window']):
+        seq = group['action'].tolist()
+        sequences.append({'user': user, 'window': window, 'sequence': ' → '.join(seq), 'length': len(seq)})
+    return [s for s in sequences if s['length'] >= 2]
+
+def make_events(n, seed=42):
+    df = make_timeline(n, n_users=max(50, n // 2000), seed=seed)
+    df['action'] = np.random.default_rng(seed).choice(ACTIONS, n, p=[0.4, 0.4, 0.07, 0.08, 0.05])
+    return df
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--legacy-max', type=int, default=1_000_000,
+                        help='largest size to also run (and parity-check) the legacy loop on')
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'tumbling s':>11} {'legacy s':>9} {'n-grams s':>10} {'chains s':>9} {'chains':>8}")
+    for n in args.sizes:
+        df = make_events(n)
+        fast, fast_s = timed(tumbling_sequences, df)
+        legacy_s = '-'
+        if n <= args.legacy_max:
+            slow, slow_s = timed(legacy_sequences, df)
+            assert fast == slow, "tumbling_sequences differs from the legacy loop"
+            legacy_s = f"{slow_s:.2f}"
+        _, ngram_s = timed(top_patterns, df)
+        chains, chain_s = timed(find_kill_chains, df)
+        print(f"{n:>12,} {fast_s:>11.2f} {legacy_s:>9} {ngram_s:>10.2f} {chain_s:>9.2f} {len(chains):>8,}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Startup benchmark: cold import time and data-file access per module.
+
+Imports each module in a fresh interpreter (as dashboard cold start and a
+spawned worker do) and records wall time plus every file opened under the
+data directories. Exits non-zero if any import touches them.
+
+    python benchmarks/bench_startup.py --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    'backend.dashboard',
+    'backend.pipeline',
+    'backend.models.batch_scoring',
+    'backend.explainable',
+    'backend.m10_adaptive',
+    'backend.m11_privacy',
+    'backend.m12_report',
+    'backend.nl_query',
+    'backend.evaluate',
+]
+DATA_DIRS = ['features', 'docs']
+
+PROBE = """
+import importlib, json, os, sys, time
+roots = [os.path.abspath(d) + os.sep for d in {data_dirs!r}]
+opened = []
+def hook(event, args):
+    if event == 'open' and isinstance(args[0], (str, bytes, os.PathLike)):
+        path = os.path.abspath(os.fsdecode(args[0]))
+        if any(path.startswith(root) for root in roots):
+            opened.append(os.path.relpath(path))
+sys.addaudithook(hook)
+start = time.perf_counter()
+importlib.import_module({module!r})
+print(json.dumps({{'seconds': time.perf_counter() - start, 'opened': sorted(set(opened))}}))
+"""
+
+def probe(module):
+    out = subprocess.run([sys.executable, '-c', PROBE.format(module=module, data_dirs=DATA_DIRS)],
+                         cwd=project_root, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modules', nargs='+', default=MODULES)
+    parser.add_argument('--repeat', type=int, default=3, help='cold imports per module (median reported)')
+    args = parser.parse_args()
+
+    touched = {}
+    print(f"{'module':<32} {'import s':>9}  data files opened")
+    for module in args.modules:
+        runs = [probe(module) for _ in range(args.repeat)]
+        opened = sorted({path for run in runs for path in run['opened']})
+        if opened:
+            touched[module] = opened
+        seconds = statistics.median(run['seconds'] for run in runs)
+        print(f"{module:<32} {seconds:>9.3f}  {', '.join(opened) or '-'}")
+    if touched:
+        print(f"FAIL: {len(touched)} module(s) read data files at import")
+        sys.exit(1)
+    print("OK: no module reads data files at import")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""End-to-end benchmark suite: ingestion through reports, /analyze and the live-tail WebSocket.
+
+Generates seeded SyntheticLogs datasets at each size in a scratch directory,
+times every stage ``--repeat`` times and writes throughput, p50/p99 latency
+and peak RSS per (stage, rows) to a JSON results file. With ``--baseline``
+the run is compared against a saved results file and the script exits 1
+when a stage got slower (or used more memory) than the tolerance allows.
+
+    python benchmarks/bench_suite.py --sizes 10000 100000 1000000
+    python benchmarks/bench_suite.py --save-baseline benchmarks/results/baseline.json
+    python benchmarks/bench_suite.py --baseline benchmarks/results/baseline.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+os.chdir(project_root)  # the dashboard resolves templates/static dirs against the cwd
+os.environ.setdefault("AUDIT_LOG_PATH", os.path.join(tempfile.gettempdir(), "bench_suite_audit.jsonl"))
+
+from fastapi.testclient import TestClient
+
+from backend import dashboard
+from backend.explainable import explain_risks
+from backend.features import FEATURE_COLUMNS, engineer_features
+from backend.ingestion import get_timeline, load_csv_log
+from backend.live_tail import FileTailSource, LiveScorer, LiveTail
+from backend.m10_adaptive import MitreMap, apply_mitre_enhanced, load_mitre_map
+from backend.m11_privacy import Pseudonymizer, mask_pii
+from backend.m12_report import render_report, write_report
+from backend.models.baseline import fit_isolation_forest
+from backend.models.ensemble import ensemble_detect
+from backend.risk_scoring import calculate_risk_score
+from backend.synthetic import SyntheticLogs
+
+STAGES = ['generate_csv', 'load_csv_log', 'get_timeline', 'engineer_features', 'fit_isolation_forest',
+          'ensemble_detect', 'calculate_risk_score', 'explain_risks', 'apply_mitre_enhanced', 'mask_pii',
+          'report_html', 'report_json', 'analyze_endpoint', 'websocket_tail']
+
+def current_rss():
+    """Resident set size in bytes (/proc on Linux, else the peak so far)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class PeakRSS:
+    """Samples RSS on a thread while the block runs; ``peak`` in bytes."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, current_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.start = current_rss()
+        self.peak = self.start
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+def summarize(stage, rows, latencies, peak, start_rss, units=None):
+    """One results record; throughput is ``units`` (default rows) per p50 second."""
+    latencies = np.asarray(latencies)
+    p50 = float(np.percentile(latencies, 50))
+    return {
+        'stage': stage, 'rows': rows, 'runs': len(latencies),
+        'p50_s': round(p50, 6), 'p99_s': round(float(np.percentile(latencies, 99)), 6),
+        'mean_s': round(float(latencies.mean()), 6),
+        'throughput_rows_s': round((rows if units is None else units) / p50, 1) if p50 > 0 else None,
+        'peak_rss_mb': round(peak / 2**20, 1), 'rss_delta_mb': round((peak - start_rss) / 2**20, 1),
+    }
+
+def measure(stage, rows, fn, repeat, setup=None):
+    """Time ``fn(setup())`` ``repeat`` times (setup untimed, stage output silenced)."""
+    latencies, peak, start_rss, result = [], 0, current_rss(), None
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        with PeakRSS() as rss, contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = fn(arg) if setup else fn()
+            latencies.append(time.perf_counter() - start)
+        peak = max(peak, rss.peak)
+    return result, summarize(stage, rows, latencies, peak, start_rss)
+
+def bench_analyze(client, csv_path, rows, requests):
+    """/analyze latency per request; a fresh tenant each time so no request hits the cache.
+
+    The analysis runs in a pool worker, so RSS here is the server process only.
+    """
+    with open(csv_path, 'rb') as f:
+        body = f.read()
+    latencies, start_rss = [], current_rss()
+    with PeakRSS() as rss:
+        for i in range(requests):
+            start = time.perf_counter()
+            response = client.post('/analyze', files={'file': ('upload.csv', body, 'text/csv')},
+                                   headers={dashboard.TENANT_HEADER: f'bench-{time.time_ns()}-{i}'})
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200 and response.json()['total'] == rows, response.text[:200]
+    return summarize('analyze_endpoint', rows, latencies, rss.peak, start_rss)
+
+def bench_websocket(client, csv_path, events, model, batch=1000):
+    """Live tail from the start of ``csv_path`` over /ws/logs; latency is per received frame."""
+    dashboard.live_tail = LiveTail(FileTailSource(csv_path, from_start=True), scorer=LiveScorer(model),
+                                   poll_interval=0.01)
+    received, gaps, start_rss = 0, [], current_rss()
+    with PeakRSS() as rss:
+        start = last = time.perf_counter()
+        with client.websocket_connect(f'/ws/logs?batch={batch}&queue={events}&policy=drop_newest') as ws:
+            while received < events:
+                frame = ws.receive_json()
+                received += len(frame['events']) + frame['dropped']
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+        elapsed = time.perf_counter() - start
+    record = summarize('websocket_tail', events, gaps, rss.peak, start_rss)
+    record['throughput_rows_s'] = round(received / elapsed, 1)  # events/s end to end, not per frame
+    return record
+
+def run_suite(sizes, repeat, requests, ws_max, stages, seed, scratch):
+    mitre_map = MitreMap(load_mitre_map(os.path.join(project_root, 'docs', 'mitre_mapping.yml')))
+    key = np.random.default_rng(seed).bytes(32)
+    # Stages write features/, reports/ etc. relative to the cwd, so run them in the
+    # scratch dir; the dashboard's template path is pinned to the project first.
+    loader = dashboard.templates.env.loader
+    loader.searchpath = [os.path.abspath(path) for path in loader.searchpath]
+    os.chdir(scratch)
+    for name in ('data', 'features', 'models', 'reports', dashboard.ANALYSIS_REPORT_DIR):
+        os.makedirs(name, exist_ok=True)
+    client = TestClient(dashboard.app)
+    dashboard.jobs.warm()  # /analyze runs in the worker pool; the app's lifespan warms it at startup
+    results = []
+
+    def record(entry):
+        results.append(entry)
+        print(f"{entry['stage']:>22} {entry['rows']:>10,} {entry['p50_s']:>9.3f} {entry['p99_s']:>9.3f} "
+              f"{entry['throughput_rows_s'] or 0:>13,.0f} {entry['peak_rss_mb']:>9.0f}")
+
+    print(f"{'stage':>22} {'rows':>10} {'p50 s':>9} {'p99 s':>9} {'rows/s':>13} {'RSS MB':>9}")
+    for n in sizes:
+        csv_path, db_path = os.path.join(scratch, f'logs_{n}.csv'), os.path.join(scratch, 'data', f'raw_{n}.sqlite')
+
+        def run(stage, fn, setup=None):
+            """Stage output; timed ``repeat`` times when selected, else run once as an input for later stages."""
+            output, entry = measure(stage, n, fn, repeat if stage in stages else 1, setup)
+            if stage in stages:
+                record(entry)
+            return output
+
+        def fresh_db():
+            if os.path.exists(db_path):
+                os.remove(db_path)
+
+        generator = SyntheticLogs(n, seed=seed)
+        run('generate_csv', lambda: generator.write_csv(csv_path))
+        run('load_csv_log', lambda _: load_csv_log(csv_path, db_path), setup=fresh_db)
+        timeline = run('get_timeline', lambda: get_timeline(db_path=db_path))
+        features = run('engineer_features', lambda: engineer_features(timeline))
+        X = features[FEATURE_COLUMNS].to_numpy(dtype=float)
+        model = run('fit_isolation_forest', lambda: fit_isolation_forest(X))
+        if 'ensemble_detect' in stages:
+            run('ensemble_detect', lambda: ensemble_detect(timeline, model=model))
+        risk = run('calculate_risk_score', lambda: calculate_risk_score(timeline))
+        explained = run('explain_risks', lambda: explain_risks(risk))
+        adaptive = run('apply_mitre_enhanced', lambda: apply_mitre_enhanced(explained, mitre_map))
+        # A fresh Pseudonymizer per run, so every run hashes cold
+        anonymized = run('mask_pii', lambda p: mask_pii(adaptive, pseudonymizer=p), setup=lambda: Pseudonymizer(key))
+        for fmt in ('html', 'json'):
+            if f'report_{fmt}' in stages:
+                path = os.path.join(scratch, 'reports', f'report_{n}.{fmt}')
+                run(f'report_{fmt}', lambda: write_report(render_report(anonymized), path, fmt))
+        if 'analyze_endpoint' in stages:
+            with contextlib.redirect_stdout(io.StringIO()):
+                entry = bench_analyze(client, csv_path, n, requests)
+            record(entry)
+        if 'websocket_tail' in stages and n <= ws_max:
+            with contextlib.redirect_stdout(io.StringIO()):
+                entry = bench_websocket(client, csv_path, n, model)
+            record(entry)
+    return results
+
+def environment(args):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'created': datetime.now(timezone.utc).isoformat(), 'commit': commit,
+        'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count(),
+        'numpy': np.__version__, 'pandas': pd.__version__,
+        'sizes': args.sizes, 'repeat': args.repeat, 'requests': args.requests, 'seed': args.seed,
+    }
+
+def compare(results, baseline, tolerance, rss_tolerance, min_delta):
+    """Print current vs baseline per (stage, rows); returns the regressed records."""
+    base = {(entry['stage'], entry['rows']): entry for entry in baseline['results']}
+    regressions = []
+    print(f"\n{'stage':>22} {'rows':>10} {'p50 s':>9} {'base s':>9} {'ratio':>7} {'RSS MB':>8} {'base MB':>8}  status")
+    for entry in results:
+        old = base.get((entry['stage'], entry['rows']))
+        if old is None:
+            print(f"{entry['stage']:>22} {entry['rows']:>10,} {entry['p50_s']:>9.3f} {'-':>9} {'-':>7} "
+                  f"{entry['peak_rss_mb']:>8.0f} {'-':>8}  new")
+            continue
+        # Compared on throughput: rows / p50 per stage, end-to-end events/s for the WebSocket
+        ratio = old['throughput_rows_s'] / entry['throughput_rows_s'] if entry['throughput_rows_s'] else float('inf')
+        slower = ratio > 1 + tolerance and \
+            entry['rows'] / entry['throughput_rows_s'] - entry['rows'] / old['throughput_rows_s'] > min_delta
+        heavier = entry['peak_rss_mb'] > old['peak_rss_mb'] * (1 + rss_tolerance)
+        status = 'SLOWER' if slower else 'ok'
+        status += ' +RSS' if heavier else ''
+        if slower or heavier:
+            regressions.append(entry)
+        print(f"{entry['stage']:>22} {entry['rows']:>10,} {entry['p50_s']:>9.3f} {old['p50_s']:>9.3f} {ratio:>6.2f}x "
+              f"{entry['peak_rss_mb']:>8.0f} {old['peak_rss_mb']:>8.0f}  {status}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per stage')
+    parser.add_argument('--requests', type=int, default=5, help='/analyze requests per size')
+    parser.add_argument('--ws-max', type=int, default=100_000, help='largest size streamed over the WebSocket')
+    parser.add_argument('--stages', nargs='+', default=STAGES, choices=STAGES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmarks/results/latest.json')
+    parser.add_argument('--baseline', default=None, help='results file to compare against')
+    parser.add_argument('--save-baseline', default=None, help='also write this run to this path')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown (0.25 = 25%%)')
+    parser.add_argument('--rss-tolerance', type=float, default=0.25, help='allowed peak RSS growth')
+    parser.add_argument('--min-delta', type=float, default=0.01, help='ignore slowdowns under this many seconds')
+    args = parser.parse_args()
+
+    output = os.path.join(project_root, args.output)
+    baseline_path = os.path.join(project_root, args.baseline) if args.baseline else None
+    baseline = None
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+
+    scratch = tempfile.mkdtemp(prefix='bench_suite_')
+    try:
+        results = run_suite(args.sizes, args.repeat, args.requests, args.ws_max, set(args.stages), args.seed, scratch)
+    finally:
+        os.chdir(project_root)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    report = {'meta': environment(args), 'results': results}
+    for path in filter(None, [output, args.save_baseline and os.path.join(project_root, args.save_baseline)]):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved {os.path.relpath(path, project_root)}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance, args.rss_tolerance, args.min_delta)
+        if regressions:
+            print(f"{len(regressions)} regression(s) against {args.baseline}")
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+if __name__ == "__main__":
+    main()